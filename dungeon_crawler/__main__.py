@@ -1,10 +1,36 @@
 #!/usr/bin/env python3
 
-from dungeon_crawler import DungeonCrawler
+import os
+import sys
+import signal
+from dungeon_crawler import DungeonCrawler, WorldWatcher, SessionStore, EventLog
+from dungeon_crawler.session_store import FINAL_OUTCOMES
+
+SAVE_DIR = os.path.join(os.path.expanduser("~"), ".dungeon_crawler")
 
 def main():
-    game = DungeonCrawler()
-    game.run()
+    # Pick up edits to rooms.json, enemies.json and spawns.json without restarting
+    watcher = WorldWatcher()
+    watcher.start()
+    # Keep profiles and finished runs for the leaderboards
+    os.makedirs(SAVE_DIR, exist_ok=True)
+    store = SessionStore(os.path.join(SAVE_DIR, "sessions.db"))
+    # Record moves, fights and deaths for python -m dungeon_crawler.analytics
+    events = EventLog(os.path.join(SAVE_DIR, "events.log"))
+    # python -m dungeon_crawler SESSION_ID picks a run back up where it was left
+    session_id = sys.argv[1] if len(sys.argv) > 1 else None
+    game = DungeonCrawler(watcher=watcher, store=store, events=events, session_id=session_id,
+                          profile_dir=os.path.join(SAVE_DIR, "profiles"))
+    # kill -USR1 <pid> toggles a profile capture, like typing :prof start / :prof stop
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: game.stop_profile() if game.profiler else game.start_profile())
+    try:
+        game.run()
+    finally:
+        events.close()
+        store.close()
+    if game.outcome not in FINAL_OUTCOMES and game.game_state.player_name:
+        print(f"Resume this run with: python -m dungeon_crawler {game.session_id}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
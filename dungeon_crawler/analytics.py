@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Incremental analytics over event logs: room heatmaps, where players die,
+how long fights last and which enemies kill which classes.
+
+Each run reads only the records appended since the last one, in fixed-size
+chunks, and folds them into count arrays kept in a state file. The arrays
+grow with the number of rooms, classes and enemies seen, never with the
+number of events.
+
+Usage: python -m dungeon_crawler.analytics [LOG] [--state FILE] [--top N]
+"""
+
+import os
+import sys
+import json
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .event_log import RECORD, MOVE, COMBAT, DEATH, WON, FLED, DIED, name_hash, read_names, check_header
+from .world import DATA_DIR, FileWorldSource
+
+EVENT_DTYPE = np.dtype([
+    ('time', '<u4'), ('room', '<u8'), ('player_class', '<u8'), ('enemy', '<u8'),
+    ('rounds', '<u2'), ('health', '<u2'), ('kind', 'u1'), ('outcome', 'u1'), ('pad', 'V6')
+])
+assert EVENT_DTYPE.itemsize == RECORD.size
+
+STATE_VERSION = 2  # Saved totals from another version are started over
+
+CHUNK_RECORDS = 1 << 20  # Records read per chunk, about 24 MB
+MAX_ROUNDS = 50  # Fights longer than this share the last histogram bin
+SAVE_DIR = os.path.join(os.path.expanduser("~"), ".dungeon_crawler")
+
+class Axis:
+    """Dense slots for the name hashes seen along one dimension, in order of first appearance"""
+    def __init__(self, keys: Optional[np.ndarray] = None):
+        self.keys = keys if keys is not None else np.zeros(0, dtype=np.uint64)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def slots(self, hashes: np.ndarray) -> np.ndarray:
+        """Return the slot of every hash, adding slots for hashes not seen before"""
+        unique = np.unique(hashes)
+        new = unique[~np.isin(unique, self.keys)]
+        if len(new):
+            self.keys = np.concatenate([self.keys, new])
+        order = np.argsort(self.keys, kind='stable')
+        return order[np.searchsorted(self.keys, hashes, sorter=order)]
+
+def _fit(counts: np.ndarray, shape: Tuple[int, ...]) -> np.ndarray:
+    """Zero-pad a count array up to shape"""
+    if counts.shape == shape:
+        return counts
+    return np.pad(counts, [(0, want - have) for have, want in zip(counts.shape, shape)])
+
+class EventAnalytics:
+    """Running totals over one or more event logs"""
+    AXES = ('rooms', 'classes', 'enemies')
+    COUNTS = ('room_visits', 'room_deaths', 'kills', 'fight_rounds', 'fight_outcomes')
+
+    def __init__(self):
+        self.rooms, self.classes, self.enemies = Axis(), Axis(), Axis()
+        self.room_visits = np.zeros(0, dtype=np.int64)  # [room]
+        self.room_deaths = np.zeros(0, dtype=np.int64)  # [room]
+        self.kills = np.zeros((0, 0), dtype=np.int64)  # [enemy, class] deaths
+        self.fight_rounds = np.zeros((0, MAX_ROUNDS + 1), dtype=np.int64)  # [enemy, rounds]
+        self.fight_outcomes = np.zeros((0, 4), dtype=np.int64)  # [enemy, outcome]
+        self.offsets: Dict[str, int] = {}  # Bytes of each log already counted
+
+    @classmethod
+    def load(cls, path: str) -> 'EventAnalytics':
+        """Load saved totals, or start empty if there are none yet or they are from another version"""
+        analytics = cls()
+        if not os.path.exists(path):
+            return analytics
+        with np.load(path, allow_pickle=False) as data:
+            if 'version' not in data or int(data['version']) != STATE_VERSION:
+                return analytics
+            for axis in cls.AXES:
+                setattr(analytics, axis, Axis(data[axis]))
+            for name in cls.COUNTS:
+                setattr(analytics, name, data[name])
+            analytics.offsets = json.loads(str(data['offsets']))
+        return analytics
+
+    def save(self, path: str) -> None:
+        """Write the totals, replacing the old file only once the new one is complete"""
+        arrays = {axis: getattr(self, axis).keys for axis in self.AXES}
+        arrays.update({name: getattr(self, name) for name in self.COUNTS})
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez(f, version=np.array(STATE_VERSION), offsets=np.array(json.dumps(self.offsets)), **arrays)
+        os.replace(tmp, path)
+
+    def ingest(self, log_path: str) -> int:
+        """Count the records appended to a log since the last call and return how many there were"""
+        offset = self.offsets.get(log_path, RECORD.size)
+        if os.path.getsize(log_path) < offset:
+            offset = RECORD.size  # The log was truncated or replaced
+        total = 0
+        with open(log_path, 'rb') as f:
+            check_header(log_path, f.read(RECORD.size))
+            f.seek(offset)
+            while True:
+                data = f.read(CHUNK_RECORDS * RECORD.size)
+                count = len(data) // RECORD.size
+                if count:
+                    self._add(np.frombuffer(data, dtype=EVENT_DTYPE, count=count))
+                    offset += count * RECORD.size
+                    total += count
+                if count < CHUNK_RECORDS:
+                    break
+        self.offsets[log_path] = offset
+        return total
+
+    def _add(self, events: np.ndarray) -> None:
+        kind = events['kind']
+        rooms = self.rooms.slots(events['room'])
+        classes = self.classes.slots(events['player_class'])
+        enemies = self.enemies.slots(events['enemy'])
+        n_rooms, n_classes, n_enemies = len(self.rooms), len(self.classes), len(self.enemies)
+
+        moves, deaths, fights = kind == MOVE, kind == DEATH, kind == COMBAT
+        self.room_visits = _fit(self.room_visits, (n_rooms,)) + np.bincount(rooms[moves], minlength=n_rooms)
+        self.room_deaths = _fit(self.room_deaths, (n_rooms,)) + np.bincount(rooms[deaths], minlength=n_rooms)
+
+        cells = enemies[deaths] * n_classes + classes[deaths]
+        self.kills = _fit(self.kills, (n_enemies, n_classes)) + np.bincount(
+            cells, minlength=n_enemies * n_classes).reshape(n_enemies, n_classes)
+
+        rounds = np.minimum(events['rounds'][fights], MAX_ROUNDS)
+        cells = enemies[fights] * (MAX_ROUNDS + 1) + rounds
+        self.fight_rounds = _fit(self.fight_rounds, (n_enemies, MAX_ROUNDS + 1)) + np.bincount(
+            cells, minlength=n_enemies * (MAX_ROUNDS + 1)).reshape(n_enemies, MAX_ROUNDS + 1)
+        cells = enemies[fights] * 4 + np.minimum(events['outcome'][fights], 3)
+        self.fight_outcomes = _fit(self.fight_outcomes, (n_enemies, 4)) + np.bincount(
+            cells, minlength=n_enemies * 4).reshape(n_enemies, 4)
+
+    def label(self, key: int, names: Dict[int, str]) -> str:
+        """Return the id a hash stands for, or the hash itself if the world does not know it"""
+        return names.get(int(key), f"#{int(key):016x}")
+
+    def top_rooms(self, counts: np.ndarray, names: Dict[int, str], limit: int = 10) -> List[Tuple[str, int]]:
+        """Return the rooms with the highest counts in a per-room array"""
+        order = np.argsort(counts, kind='stable')[::-1][:limit]
+        return [(self.label(self.rooms.keys[i], names), int(counts[i])) for i in order if counts[i]]
+
+    def fight_summary(self, names: Dict[int, str]) -> List[Dict[str, object]]:
+        """Return fight count, mean and 90th percentile length and outcome shares for every enemy"""
+        summary = []
+        bins = np.arange(MAX_ROUNDS + 1)
+        for i, histogram in enumerate(self.fight_rounds):
+            fights = int(histogram.sum())
+            if not fights:
+                continue
+            outcomes = self.fight_outcomes[i]
+            summary.append({
+                "enemy": self.label(self.enemies.keys[i], names),
+                "fights": fights,
+                "mean_rounds": float((histogram * bins).sum() / fights),
+                "p90_rounds": int(np.searchsorted(np.cumsum(histogram), 0.9 * fights)),
+                "won": outcomes[WON] / fights,
+                "fled": outcomes[FLED] / fights,
+                "died": outcomes[DIED] / fights
+            })
+        return sorted(summary, key=lambda row: -row["fights"])
+
+def world_names(rooms_path: Optional[str] = None, enemies_path: Optional[str] = None) -> Dict[int, str]:
+    """Map the hashes of every room, class and enemy id in a world back to the ids
+
+    Raises ValueError if two ids hash alike, since their counts would be merged.
+    """
+    from .dungeon_crawler import CHARACTER_CLASSES
+
+    source = FileWorldSource(rooms_path, enemies_path)
+    names = {name_hash(""): "(none)"}
+    for table in (source.rooms(), source.enemies(), CHARACTER_CLASSES):
+        for name in table:
+            if names.setdefault(name_hash(name), name) != name:
+                raise ValueError(f"{names[name_hash(name)]!r} and {name!r} share the id {name_hash(name):016x}")
+    return names
+
+def log_names(logs: List[str], world: Dict[int, str]) -> Dict[int, str]:
+    """Merge the name tables of logs over a world's names, so ids of names the world dropped still resolve"""
+    names = dict(world)
+    for log in logs:
+        for key, name in read_names(log).items():
+            name = name or "(none)"
+            if names.setdefault(key, name) != name:
+                raise ValueError(f"{names[key]!r} and {name!r} share the id {key:016x}")
+    return names
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Summarize gameplay event logs")
+    parser.add_argument('logs', nargs='*', default=[os.path.join(SAVE_DIR, 'events.log')])
+    parser.add_argument('--state', default=os.path.join(SAVE_DIR, 'analytics.npz'),
+                        help="file the running totals are kept in")
+    parser.add_argument('--rooms', default=os.path.join(DATA_DIR, 'rooms.json'))
+    parser.add_argument('--enemies', default=os.path.join(DATA_DIR, 'enemies.json'))
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    analytics = EventAnalytics.load(args.state)
+    for log in args.logs:
+        if os.path.exists(log):
+            print(f"{log}: {analytics.ingest(log)} new events", file=sys.stderr)
+    analytics.save(args.state)
+    names = log_names(args.logs, world_names(args.rooms, args.enemies))
+
+    print("Most visited rooms:")
+    for room, count in analytics.top_rooms(analytics.room_visits, names, args.top):
+        print(f"  {room:<24} {count}")
+    print("Deadliest rooms:")
+    for room, count in analytics.top_rooms(analytics.room_deaths, names, args.top):
+        print(f"  {room:<24} {count}")
+    print("Fights:")
+    for row in analytics.fight_summary(names):
+        print(f"  {row['enemy']:<24} {row['fights']} fights, {row['mean_rounds']:.1f} rounds on average "
+              f"(p90 {row['p90_rounds']}), won {row['won']:.0%}, fled {row['fled']:.0%}, died {row['died']:.0%}")
+    print("Deaths by enemy and class:")
+    classes = [analytics.label(key, names) for key in analytics.classes.keys]
+    print("  " + " " * 24 + "".join(f"{name:>12}" for name in classes))
+    for i, row in enumerate(analytics.kills):
+        if row.any():
+            print(f"  {analytics.label(analytics.enemies.keys[i], names):<24}" + "".join(f"{n:>12}" for n in row))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
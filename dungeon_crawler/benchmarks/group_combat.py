@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Benchmark group combat rounds against packs of growing size, against
+rolling each foe's attack with a Python loop over Enemy objects.
+
+Usage: python -m dungeon_crawler.benchmarks.group_combat [--sizes N ...] [--rounds N]
+"""
+
+import sys
+import time
+import argparse
+
+import numpy as np
+
+from ..combat import Enemy, EnemyGroup, CombatManager
+from ..world import DEFAULT_WORLD
+
+def run_group(enemies, size: int, rounds: int, action: str) -> float:
+    """Return the mean seconds per round of fighting a pack of size goblins"""
+    pack = {"name": "Horde", "members": [{"type": "goblin", "count": size}]}
+    group = EnemyGroup.from_pack(pack, enemies, np.random.default_rng(0))
+    group.health[:] = 1 << 30  # Nobody dies, so every round does the full amount of work
+    combat = CombatManager(player_health=20, player_class="wizard")
+    combat.group, combat.in_combat = group, True
+    start = time.perf_counter()
+    for _ in range(rounds):
+        combat.player_health = combat.mana = 1 << 30
+        combat.process_round(action)
+    return (time.perf_counter() - start) / rounds
+
+def run_loop(enemies, size: int, rounds: int) -> float:
+    """Return the mean seconds per round of attacking with one Enemy object per foe"""
+    data = enemies["goblin"]
+    foes = [Enemy(data['name'], 1 << 30, tuple(data['damage_range']), data['description'],
+                  data.get('hit_chance', 0.3)) for _ in range(size)]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        total = 0
+        for foe in foes:
+            if foe.health > 0:
+                damage, hit = foe.attack()
+                total += damage
+    return (time.perf_counter() - start) / rounds
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark batched group combat rounds")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 500, 5000])
+    parser.add_argument('--rounds', type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    enemies = DEFAULT_WORLD.enemies()
+    print(f"{'enemies':>8} {'attack us':>10} {'fireball us':>12} {'object loop us':>15}")
+    for size in args.sizes:
+        attack = run_group(enemies, size, args.rounds, "attack")
+        fireball = run_group(enemies, size, args.rounds, "cast fireball")
+        loop = run_loop(enemies, size, args.rounds)
+        print(f"{size:>8} {attack * 1e6:>10.1f} {fireball * 1e6:>12.1f} {loop * 1e6:>15.1f}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
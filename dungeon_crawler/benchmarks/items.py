@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark item index lookups and take/drop updates on a large world, for a
+session that has already moved many items around.
+
+Usage: python -m dungeon_crawler.benchmarks.items [--rooms N] [--items-per-room N] [--kinds N]
+       [--moves N] [--queries N]
+"""
+
+import sys
+import time
+import random
+import argparse
+
+from ..items import ItemBag, ItemChanges, ItemIndex
+from ..dungeon_crawler import FIND_LIMIT
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the global item index")
+    parser.add_argument('--rooms', type=int, default=1000000)
+    parser.add_argument('--items-per-room', type=int, default=3)
+    parser.add_argument('--kinds', type=int, default=1000, help="distinct item names")
+    parser.add_argument('--moves', type=int, default=2000, help="items the session has taken and dropped elsewhere")
+    parser.add_argument('--queries', type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    names = [f"Item {i}" for i in range(args.kinds)]
+    world = {f"room{i}": {"items": [rng.choice(names) for _ in range(args.items_per_room)]}
+             for i in range(args.rooms)}
+    start = time.perf_counter()
+    index = ItemIndex()
+    index.set_world_rooms(world)
+    print(f"Indexed {args.rooms * args.items_per_room} items in {args.rooms} rooms "
+          f"in {time.perf_counter() - start:.1f}s (once per world, shared by every session)")
+    bags = {room_id: ItemBag(room["items"]) for room_id, room in world.items()}
+    changes = ItemChanges()
+
+    # take then drop somewhere else, keeping rooms and the session's changes in step
+    room_ids = list(bags)
+    moves = [(rng.choice(room_ids), rng.choice(room_ids)) for _ in range(args.moves)]
+    start = time.perf_counter()
+    for source, target in moves:
+        bag = bags[source]
+        if not bag:
+            continue
+        item = next(iter(bag))
+        bag.remove(item)
+        changes.add(source, item, -1)
+        index.add_carried("bench", item)
+        index.remove_carried("bench", item)
+        bags[target].add(item)
+        changes.add(target, item, 1)
+    elapsed = time.perf_counter() - start
+    print(f"take + drop: {elapsed / args.moves * 1e6:.2f}us per item moved")
+
+    # find: resolve the name, count the rooms and list the first few, after those changes.
+    # The cost grows with how many rooms the session changed for the item, not with the world
+    queries = [rng.choice(names).lower() for _ in range(args.queries)]
+    start = time.perf_counter()
+    for query in queries:
+        item = index.name(query)
+        moved = changes.for_item(item)
+        index.room_count(item, moved)
+        index.first_rooms(item, FIND_LIMIT, moved)
+    elapsed = time.perf_counter() - start
+    print(f"find: {elapsed / args.queries * 1e6:.2f}us per lookup")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
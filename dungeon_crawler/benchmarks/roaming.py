@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark the cost of a turn of wandering monsters as the world grows,
+with a fixed number of players, against ticking every monster.
+
+Usage: python -m dungeon_crawler.benchmarks.roaming [--sizes N ...] [--players N] [--turns N]
+"""
+
+import sys
+import time
+import random
+import argparse
+from typing import Dict
+
+from ..dungeon_crawler import Room
+from ..roaming import RoamingEnemies
+from ..items import ItemBag
+
+ENEMY = {"type": "goblin", "name": "Goblin", "description": "A wandering goblin", "roams": True}
+
+def grid_world(side: int) -> Dict[str, Room]:
+    """Build a side x side grid of rooms joined to their compass neighbours"""
+    rooms = {}
+    for y in range(side):
+        for x in range(side):
+            exits = {}
+            if y > 0:
+                exits["north"] = f"{x},{y - 1}"
+            if y < side - 1:
+                exits["south"] = f"{x},{y + 1}"
+            if x < side - 1:
+                exits["east"] = f"{x + 1},{y}"
+            if x > 0:
+                exits["west"] = f"{x - 1},{y}"
+            room_id = f"{x},{y}"
+            rooms[room_id] = Room(room_id, room_id, "", exits, False, ItemBag(), None, None, len(rooms))
+    return rooms
+
+def run(rooms: Dict[str, Room], players: int, monsters: int, turns: int, tick_all: bool) -> float:
+    """Return the mean seconds per turn for moving every player and ticking the monsters"""
+    rng = random.Random(0)
+    room_ids = list(rooms)
+    roaming = RoamingEnemies(rooms, seed=0)
+    for _ in range(monsters):
+        roaming.add(ENEMY, rng.choice(room_ids))
+    positions = [rng.choice(room_ids) for _ in range(players)]
+    for player, room_id in enumerate(positions):
+        roaming.place_player(player, room_id)
+
+    start = time.perf_counter()
+    for _ in range(turns):
+        for player, room_id in enumerate(positions):
+            room_id = positions[player] = rng.choice(list(rooms[room_id].exits.values()))
+            roaming.place_player(player, room_id)
+        if tick_all:
+            roaming.turn += 1
+            for roamer in list(roaming.roamers.values()):
+                roaming._advance(roamer)
+        else:
+            roaming.tick()
+        for room_id in positions:
+            roaming.in_room(room_id)
+    return (time.perf_counter() - start) / turns
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark wandering monster turns against world size")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help="world sizes in rooms (rounded to a square grid)")
+    parser.add_argument('--players', type=int, default=8)
+    parser.add_argument('--density', type=float, default=0.1, help="monsters per room")
+    parser.add_argument('--turns', type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    print(f"{'rooms':>10} {'monsters':>10} {'active us/turn':>16} {'tick-all us/turn':>18}")
+    for size in args.sizes:
+        side = max(2, int(size ** 0.5))
+        rooms = grid_world(side)
+        monsters = int(len(rooms) * args.density)
+        active = run(rooms, args.players, monsters, args.turns, tick_all=False)
+        # Ticking everything gets slow fast, so time fewer turns of it
+        every = run(rooms, args.players, monsters, max(10, args.turns // 100), tick_all=True)
+        print(f"{len(rooms):>10} {monsters:>10} {active * 1e6:>16.1f} {every * 1e6:>18.1f}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark SessionStore write throughput and leaderboard query latency.
+
+Usage: python -m dungeon_crawler.benchmarks.session_store [--sessions N] [--writes N] [--runs N]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+from ..dungeon_crawler import GameState, CHARACTER_CLASSES
+from ..session_store import SessionStore, LEADERBOARD_METRICS
+
+OUTCOMES = ("died", "quit", "cleared")
+
+ROOM_IDS = tuple(f"room{i}" for i in range(1000))
+
+def make_state(rng: random.Random, index: int) -> GameState:
+    state = GameState(
+        player_name=f"Player{index}",
+        player_class=rng.choice(list(CHARACTER_CLASSES)),
+        health=rng.randint(1, 15),
+        inventory=["Torch", "Rusty Dagger"],
+        current_room="entry",
+        flags={},
+        steps_taken=rng.randint(0, 500),
+        enemies_defeated=rng.randint(0, 20),
+        items_used=rng.randint(0, 10),
+        start_time=time.time() - rng.uniform(0, 3600)
+    )
+    for room in rng.sample(range(len(ROOM_IDS)), 30):
+        state.mark_visited(room)
+    return state
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the SQLite session store")
+    parser.add_argument('--sessions', type=int, default=2000, help="concurrent sessions")
+    parser.add_argument('--writes', type=int, default=100000, help="snapshot writes")
+    parser.add_argument('--runs', type=int, default=100000, help="finished runs for the leaderboards")
+    parser.add_argument('--queries', type=int, default=1000, help="leaderboard queries")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    states = [make_state(rng, i) for i in range(args.sessions)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SessionStore(os.path.join(tmp, 'sessions.db'))
+
+        # Snapshot writes: how long the game loop spends queueing, and how long until committed
+        start = time.perf_counter()
+        for i in range(args.writes):
+            state = states[i % len(states)]
+            state.steps_taken += 1
+            store.save_snapshot(str(i % len(states)), state, ROOM_IDS)
+        queued = time.perf_counter() - start
+        store.flush()
+        committed = time.perf_counter() - start
+        print(f"Snapshot writes:   {args.writes} in {committed:.2f}s "
+              f"({args.writes / committed:,.0f}/s committed, "
+              f"{queued / args.writes * 1e6:.1f}us blocking per write)")
+
+        start = time.perf_counter()
+        for i in range(args.runs):
+            store.record_run(str(i), states[i % len(states)], OUTCOMES[i % len(OUTCOMES)])
+        store.flush()
+        elapsed = time.perf_counter() - start
+        print(f"Run inserts:       {args.runs} in {elapsed:.2f}s ({args.runs / elapsed:,.0f}/s)")
+
+        classes = [None] + list(CHARACTER_CLASSES)
+        metrics = list(LEADERBOARD_METRICS)
+        timings = []
+        for i in range(args.queries):
+            start = time.perf_counter()
+            store.top(metrics[i % len(metrics)], 10, classes[i % len(classes)])
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        print(f"Leaderboard top10: median {timings[len(timings) // 2] * 1e6:.0f}us, "
+              f"p99 {timings[int(len(timings) * 0.99)] * 1e6:.0f}us over {args.runs} runs")
+        store.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
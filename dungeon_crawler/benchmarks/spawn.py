@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Benchmark spawn decisions per second from the bundled spawn tables.
+
+Usage: python -m dungeon_crawler.benchmarks.spawn [--samples N] [--depth N]
+"""
+
+import sys
+import time
+import random
+import argparse
+
+from ..world import DEFAULT_WORLD
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark spawn table sampling")
+    parser.add_argument('--samples', type=int, default=2000000)
+    parser.add_argument('--depth', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    tables = DEFAULT_WORLD.spawn_tables()
+    rng = random.Random(0)
+    for region in tables.tables:
+        start = time.perf_counter()
+        sampler = tables.sampler(region, args.depth)
+        compiled = time.perf_counter() - start
+
+        start = time.perf_counter()
+        sampler.sample_many(rng, args.samples)
+        batch = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(args.samples // 10):
+            tables.roll(region, args.depth, rng)
+        single = time.perf_counter() - start
+
+        print(f"{region}: compiled in {compiled * 1e6:.0f}us, "
+              f"{args.samples / batch / 1e6:.2f}M/s in batches, "
+              f"{args.samples / 10 / single / 1e6:.2f}M/s one roll at a time")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark reloading a large rooms.json while a session keeps playing: how
+long the reload takes on the watcher's thread and the longest the game
+thread goes without running meanwhile.
+
+Usage: python -m dungeon_crawler.benchmarks.world_reload [--rooms N]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+
+from ..world import FileWorldSource
+from ..world_watcher import WorldWatcher
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark world reloads against a playing session")
+    parser.add_argument('--rooms', type=int, default=200000)
+    args = parser.parse_args(argv)
+
+    def room(i, description):
+        return {"title": f"Room {i}", "description": description, "exits": {"north": f"room{i + 1}"},
+                "dark": False, "items": ["Torch"] if i % 7 == 0 else [], "enemy": None, "npc": None}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rooms_path = os.path.join(tmp, 'rooms.json')
+        enemies_path = os.path.join(tmp, 'enemies.json')
+        with open(enemies_path, 'w') as f:
+            json.dump({"goblin": {"name": "Goblin", "health": 10}}, f)
+        with open(rooms_path, 'w') as f:
+            json.dump({f"room{i}": room(i, "Dusty") for i in range(args.rooms)}, f)
+        source = FileWorldSource(rooms_path, enemies_path)
+        start = time.perf_counter()
+        watcher = WorldWatcher(source)
+        source.warm()
+        print(f"First load of {args.rooms} rooms: {time.perf_counter() - start:.2f}s")
+
+        with open(rooms_path, 'w') as f:
+            json.dump({f"room{i}": room(i, "Dusty" if i % 100 else "Swept") for i in range(args.rooms)}, f)
+        stat = os.stat(rooms_path)
+        os.utime(rooms_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        # Stand-in for the game thread: how late does each short tick run?
+        done = threading.Event()
+        reload_time = []
+
+        def reload():
+            start = time.perf_counter()
+            watcher.check()
+            reload_time.append(time.perf_counter() - start)
+            done.set()
+
+        thread = threading.Thread(target=reload)
+        longest = 0.0
+        last = time.perf_counter()
+        thread.start()
+        while not done.is_set():
+            source.rooms()
+            source.item_index()
+            now = time.perf_counter()
+            longest = max(longest, now - last)
+            last = now
+        thread.join()
+        print(f"Reload on the watcher thread: {reload_time[0]:.2f}s")
+        print(f"Longest game thread gap during the reload: {longest * 1000:.1f}ms")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,11 +1,16 @@
 #!/usr/bin/env python3
 
+import copy
 from dataclasses import dataclass
-from typing import Dict, Optional, List, Tuple
+from typing import Any, Dict, Optional, List, Tuple
 import random
+import numpy as np
 from colorama import Fore, Style
 
-@dataclass
+FIREBALL_TARGETS = 3  # Foes a fireball hits in a group fight: the target and the next ones along
+GROUP_LISTING = 10  # Foes listed by number when a group fight starts
+
+@dataclass(slots=True)
 class Enemy:
     """Represents an enemy in the dungeon"""
     name: str
@@ -26,8 +31,114 @@ class Enemy:
             return damage, True
         return 0, False
 
+class EnemyGroup:
+    """A pack of enemies fought at once, stored as columns so a round resolves every attack in one batch"""
+    __slots__ = ('name', 'description', 'kind_types', 'kind_names', 'kinds', 'health', 'damage_low',
+                 'damage_high', 'hit_chance', 'rng')
+
+    def __init__(self, name: str, description: str, kind_types: List[str], kind_names: List[str],
+                 kinds: np.ndarray, health: np.ndarray, damage_low: np.ndarray, damage_high: np.ndarray,
+                 hit_chance: np.ndarray, rng: np.random.Generator):
+        self.name = name
+        self.description = description
+        self.kind_types = kind_types  # enemies.json type of each entry in the pack's members
+        self.kind_names = kind_names  # Display name of each enemy type in the pack
+        self.kinds = kinds  # Per foe: index into kind_names
+        self.health = health
+        self.damage_low = damage_low
+        self.damage_high = damage_high
+        self.hit_chance = hit_chance
+        self.rng = rng
+
+    @classmethod
+    def from_pack(cls, pack: Dict[str, Any], enemies: Dict[str, Dict[str, Any]],
+                  rng: np.random.Generator) -> 'EnemyGroup':
+        """Build a group from a room's pack, e.g. {"name": ..., "members": [{"type": "goblin", "count": 4}]}"""
+        members = pack['members']
+        data = []
+        for member in members:
+            if member['type'] not in enemies:
+                raise ValueError(f"Unknown enemy type: {member['type']}")
+            count = member.get('count', 1)
+            if not isinstance(count, int) or count < 1:
+                raise ValueError(f"Pack {pack['name']!r}: {member['type']} count must be at least 1, not {count!r}")
+            data.append(enemies[member['type']])
+        counts = np.array([member.get('count', 1) for member in members], dtype=np.int64)
+
+        def column(values, dtype) -> np.ndarray:
+            return np.repeat(np.array(values, dtype=dtype), counts)
+
+        return cls(
+            name=pack['name'],
+            description=pack.get('description', ""),
+            kind_types=[member['type'] for member in members],
+            kind_names=[enemy['name'] for enemy in data],
+            kinds=column(range(len(data)), np.int32),
+            health=column([enemy['health'] for enemy in data], np.int32),
+            damage_low=column([enemy['damage_range'][0] for enemy in data], np.int32),
+            damage_high=column([enemy['damage_range'][1] for enemy in data], np.int32),
+            hit_chance=column([enemy.get('hit_chance', 0.3) for enemy in data], np.float64),
+            rng=rng
+        )
+
+    @property
+    def size(self) -> int:
+        return len(self.health)
+
+    def copy(self) -> 'EnemyGroup':
+        """Return a copy with its own health and its own random stream"""
+        clone = copy.copy(self)
+        clone.health = self.health.copy()
+        clone.rng = self.rng.spawn(1)[0]
+        return clone
+
+    def label(self, index: int) -> str:
+        """Name a foe so the player can target it, such as Goblin 3"""
+        return f"{self.kind_names[self.kinds[index]]} {index + 1}"
+
+    def alive_count(self) -> int:
+        return int(np.count_nonzero(self.health > 0))
+
+    def alive_by_type(self) -> Dict[str, int]:
+        """Return enemy type -> foes of that type still standing, for every type in the pack"""
+        counts = np.bincount(self.kinds[self.health > 0], minlength=len(self.kind_types))
+        alive: Dict[str, int] = {}
+        for enemy_type, count in zip(self.kind_types, counts.tolist()):
+            alive[enemy_type] = alive.get(enemy_type, 0) + count
+        return alive
+
+    def is_alive(self, index: int) -> bool:
+        return 0 <= index < self.size and self.health[index] > 0
+
+    def next_alive(self, start: int, count: int) -> List[int]:
+        """Return up to count living foes, starting at start and wrapping around"""
+        order = np.roll(np.arange(self.size), -start)
+        living = order[self.health[order] > 0]
+        return living[:count].tolist()
+
+    def take_damage(self, indices: List[int], damage: int) -> List[int]:
+        """Damage each listed foe and return the ones it finished off"""
+        indices = np.asarray(indices, dtype=np.intp)
+        before = self.health[indices]
+        self.health[indices] = np.maximum(0, before - damage)
+        return indices[(before > 0) & (self.health[indices] <= 0)].tolist()
+
+    def attack(self, shielded: bool) -> Tuple[int, int]:
+        """Roll every living foe's attack at once and return (hits, total damage)"""
+        hits = (self.health > 0) & (self.rng.random(self.size) < self.hit_chance)
+        count = int(np.count_nonzero(hits))
+        if not count:
+            return 0, 0
+        damage = self.rng.integers(self.damage_low[hits], self.damage_high[hits], endpoint=True)
+        if shielded:
+            damage //= 2  # 50% damage reduction, per hit as against a single enemy
+        return count, int(damage.sum())
+
 class CombatManager:
     """Manages combat between player and enemies"""
+    __slots__ = ('player_health', 'player_class', 'enemy', 'in_combat',
+                 'shield_active', 'shield_rounds', 'mana', 'rounds', 'group', 'target')
+
     def __init__(self, player_health: int, player_class: str):
         self.player_health = player_health
         self.player_class = player_class
@@ -36,11 +147,26 @@ class CombatManager:
         self.shield_active = False
         self.shield_rounds = 0
         self.mana = 10  # Assuming a default mana value
+        self.rounds = 0  # Rounds fought in the current or last combat
+        self.group: Optional[EnemyGroup] = None  # Set instead of enemy when fighting a pack
+        self.target = 0  # Index of the foe attacks go to in a group fight
+
+    def fork(self) -> 'CombatManager':
+        """Return an independent copy of this fight"""
+        clone = CombatManager.__new__(CombatManager)
+        for slot in CombatManager.__slots__:
+            setattr(clone, slot, getattr(self, slot))
+        if self.enemy is not None:
+            clone.enemy = copy.copy(self.enemy)
+        if self.group is not None:
+            clone.group = self.group.copy()
+        return clone
 
     def start_combat(self, enemy: Enemy) -> None:
         """Start combat with an enemy"""
         self.enemy = enemy
         self.in_combat = True
+        self.rounds = 0
         print(f"\n{Fore.RED}Combat started with {enemy.name}!{Style.RESET_ALL}")
         print(f"{Fore.RED}{enemy.description}{Style.RESET_ALL}")
         
@@ -52,11 +178,38 @@ class CombatManager:
             print("- cast shield: Create a magical shield")
             print("- cast heal: Heal yourself")
         print("- flee: Attempt to flee from combat")
+        print("- hint: Ask which action looks best")
+        print(Fore.CYAN + "\nEnter your action: " + Style.RESET_ALL, end='')
+
+    def start_group(self, group: EnemyGroup) -> None:
+        """Start combat with a pack of enemies"""
+        self.group = group
+        self.target = 0
+        self.in_combat = True
+        self.rounds = 0
+        print(f"\n{Fore.RED}Combat started with {group.name} ({group.size} enemies)!{Style.RESET_ALL}")
+        if group.description:
+            print(f"{Fore.RED}{group.description}{Style.RESET_ALL}")
+        for index in range(min(group.size, GROUP_LISTING)):
+            print(f"{Fore.RED}  {index + 1}. {group.label(index)} ({group.health[index]} health){Style.RESET_ALL}")
+        if group.size > GROUP_LISTING:
+            print(f"{Fore.RED}  ...and {group.size - GROUP_LISTING} more{Style.RESET_ALL}")
+
+        print(Fore.GREEN + "\nCombat Options:")
+        print("- attack: Attack your target")
+        print("- target N: Switch your target to enemy N")
+        if self.player_class == "wizard":
+            print(f"- cast fireball: Cast a fireball that hits up to {FIREBALL_TARGETS} enemies")
+            print("- cast shield: Create a magical shield")
+            print("- cast heal: Heal yourself")
+        print("- flee: Attempt to flee from combat")
+        print("- hint: Ask which action looks best")
         print(Fore.CYAN + "\nEnter your action: " + Style.RESET_ALL, end='')
 
     def end_combat(self) -> None:
         """End the current combat"""
         self.enemy = None
+        self.group = None
         self.in_combat = False
         self.shield_active = False
         self.shield_rounds = 0
@@ -114,11 +267,14 @@ class CombatManager:
 
     def process_round(self, player_action: str) -> Tuple[bool, str]:
         """Process a combat round and return (combat_ended, message)"""
+        if self.in_combat and self.group is not None:
+            return self._process_group_round(player_action)
         if not self.in_combat or not self.enemy:
             return False, "Not in combat!"
         
         message = ""
         enemy_defeated = False
+        self.rounds += 1
         
         # Process player action
         if player_action == "attack":
@@ -181,4 +337,81 @@ class CombatManager:
             self.end_combat()
             return True, message
         
-        return False, message 
\ No newline at end of file
+        return False, message 
+
+    def _process_group_round(self, player_action: str) -> Tuple[bool, str]:
+        """Process a round against a pack: the player's action, then every foe's attack in one batch"""
+        group = self.group
+        if player_action.startswith("target "):
+            # Picking a target is free
+            number = player_action[7:].strip()
+            index = int(number) - 1 if number.isdigit() else -1
+            if not group.is_alive(index):
+                return False, f"{Fore.RED}There is no enemy {number} standing.{Style.RESET_ALL}"
+            self.target = index
+            return False, f"{Fore.GREEN}You turn to face {group.label(index)}.{Style.RESET_ALL}"
+
+        message = ""
+        self.rounds += 1
+        if not group.is_alive(self.target):
+            self.target = group.next_alive(self.target, 1)[0]
+
+        defeated: List[int] = []
+        if player_action == "attack":
+            damage, hit = self.player_attack()
+            if hit:
+                message += f"\n{Fore.GREEN}You hit {group.label(self.target)} for {damage} damage!{Style.RESET_ALL}"
+                defeated = group.take_damage([self.target], damage)
+            else:
+                message += f"\n{Fore.RED}You missed!{Style.RESET_ALL}"
+
+        elif player_action.startswith("cast "):
+            damage, spell_message = self.cast_spell(player_action[5:])
+            message += f"\n{Fore.BLUE}{spell_message}{Style.RESET_ALL}"
+            if damage > 0:
+                targets = group.next_alive(self.target, FIREBALL_TARGETS)
+                if len(targets) > 1:
+                    names = ", ".join(group.label(index) for index in targets)
+                    message += f"\n{Fore.BLUE}The blast engulfs {names}!{Style.RESET_ALL}"
+                defeated = group.take_damage(targets, damage)
+
+        elif player_action == "flee":
+            flee_chance = 0.5
+            if self.player_class == "scoundrel":
+                flee_chance += 0.2
+            if random.random() < flee_chance:
+                message += f"\n{Fore.GREEN}You successfully fled from {group.name}!{Style.RESET_ALL}"
+                self.end_combat()
+                return True, message
+            message += f"\n{Fore.RED}You failed to flee!{Style.RESET_ALL}"
+
+        for index in defeated:
+            message += f"\n{Fore.GREEN}You defeated {group.label(index)}!{Style.RESET_ALL}"
+        remaining = group.alive_count()
+        if not remaining:
+            message += f"\n{Fore.GREEN}You defeated {group.name}!{Style.RESET_ALL}"
+            self.end_combat()
+            return True, message
+        if defeated:
+            self.target = group.next_alive(self.target, 1)[0]
+            message += f"\n{Fore.GREEN}{remaining} left; you turn to {group.label(self.target)}.{Style.RESET_ALL}"
+
+        # Every foe still standing attacks at once
+        hits, damage = group.attack(self.shield_active)
+        if hits:
+            if self.shield_active:
+                # A shield wears down once per round, however many blows it turns
+                self.shield_rounds -= 1
+                if self.shield_rounds <= 0:
+                    self.shield_active = False
+                    message += f"\n{Fore.BLUE}Your shield fades away.{Style.RESET_ALL}"
+            self.player_health = max(0, self.player_health - damage)
+            blows = "enemy hits" if hits == 1 else "enemies hit"
+            message += f"\n{Fore.RED}{hits} {blows} you for {damage} damage!{Style.RESET_ALL}"
+            if self.player_health <= 0:
+                message += f"\n{Fore.RED}You have been defeated by {group.name}!{Style.RESET_ALL}"
+                self.end_combat()
+                return True, message
+        else:
+            message += f"\n{Fore.GREEN}{group.name} missed!{Style.RESET_ALL}"
+        return False, message
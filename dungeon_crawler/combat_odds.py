@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Exact win/death/flee odds for a fight, by dynamic programming over
+CombatManager's state space: player health x enemy health x mana x shield rounds.
+
+Usage: python -m dungeon_crawler.combat_odds [--policy POLICY] [--full] [--output FILE]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+# Mirrors the rules in CombatManager
+BASE_HIT_CHANCE = 0.5
+WARRIOR_HIT_BONUS = 0.1
+BASE_DAMAGE_RANGE = (1, 8)
+WARRIOR_DAMAGE_MULTIPLIER = 1.2
+BASE_FLEE_CHANCE = 0.5
+SCOUNDREL_FLEE_BONUS = 0.2
+FIREBALL_COST, FIREBALL_DAMAGE = 3, (8, 12)
+SHIELD_COST, SHIELD_ROUNDS = 2, 3
+HEAL_COST, HEAL_AMOUNT, HEAL_CAP = 4, (5, 10), 20
+STARTING_MANA = 10
+
+# How the player picks an action in each state
+POLICIES = {
+    "attack": "always attack",
+    "flee": "always try to flee",
+    "win": "pick the action with the best chance of winning",
+    "survive": "pick the action with the best chance of winning or escaping"
+}
+
+def uniform(low: int, high: int) -> List[int]:
+    return list(range(low, high + 1))
+
+class CombatOdds:
+    """Outcome probabilities for every state of one player class against one enemy type"""
+    def __init__(self, player_class: str, enemy: Dict[str, Any], policy: str = "win",
+                 max_health: int = HEAL_CAP, max_mana: int = STARTING_MANA):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy: {policy}")
+        self.player_class = player_class
+        self.policy = policy
+        self.max_health = max(max_health, HEAL_CAP)
+        self.max_enemy_health = enemy['health']
+        # Only a wizard choosing spells ever spends mana; fixed policies don't need the axis
+        self.max_mana = max_mana if player_class == "wizard" and policy not in ("attack", "flee") else 0
+        if policy in ("attack", "flee"):
+            self.actions = [policy]
+        else:
+            self.actions = ["attack", "flee"]
+            if player_class == "wizard":
+                self.actions += ["cast fireball", "cast shield", "cast heal"]
+
+        # Transition tables: (probability, amount) pairs for each random roll
+        hit_chance = BASE_HIT_CHANCE + (WARRIOR_HIT_BONUS if player_class == "warrior" else 0)
+        low, high = BASE_DAMAGE_RANGE
+        if player_class == "warrior":
+            low, high = int(low * WARRIOR_DAMAGE_MULTIPLIER), int(high * WARRIOR_DAMAGE_MULTIPLIER)
+        self.attack_hits = [(hit_chance / (high - low + 1), d) for d in uniform(low, high)]
+        self.attack_miss = 1 - hit_chance
+        self.flee_chance = BASE_FLEE_CHANCE + (SCOUNDREL_FLEE_BONUS if player_class == "scoundrel" else 0)
+        fireball = uniform(*FIREBALL_DAMAGE)
+        self.fireball_hits = [(1 / len(fireball), d) for d in fireball]
+        heals = uniform(*HEAL_AMOUNT)
+        self.heals = [(1 / len(heals), h) for h in heals]
+        enemy_damage = uniform(*enemy['damage_range'])
+        enemy_hit = enemy.get('hit_chance', 0.3)
+        self.enemy_hits = [(enemy_hit / len(enemy_damage), d) for d in enemy_damage]
+        self.enemy_miss = 1 - enemy_hit
+
+        # Flat tables indexed by _index(); win and flee odds, death is the rest
+        size = (self.max_mana + 1) * (self.max_enemy_health + 1) * (SHIELD_ROUNDS + 1) * (self.max_health + 1)
+        self.win = [0.0] * size
+        self.flee = [0.0] * size
+        self.best_action: List[Optional[str]] = [None] * size
+        # Odds once the player has acted and the enemy is about to: (win, flee) known part
+        # plus the chance of landing back in the same state
+        self._after_win = [0.0] * size
+        self._after_flee = [0.0] * size
+        self._build()
+
+    def _index(self, health: int, enemy_health: int, mana: int, shield_rounds: int) -> int:
+        return ((mana * (self.max_enemy_health + 1) + enemy_health) * (SHIELD_ROUNDS + 1)
+                + shield_rounds) * (self.max_health + 1) + health
+
+    def _build(self) -> None:
+        # Every transition either repeats the state or moves to one with less mana, or the
+        # same mana and less enemy health, or then fewer shield rounds, or then less
+        # player health (healing always costs mana), so this order fills in dependencies first
+        win, flee, after_win, after_flee = self.win, self.flee, self._after_win, self._after_flee
+        index = self._index
+        for mana in range(self.max_mana + 1):
+            for enemy_health in range(1, self.max_enemy_health + 1):
+                for shield in range(SHIELD_ROUNDS + 1):
+                    for health in range(1, self.max_health + 1):
+                        here = index(health, enemy_health, mana, shield)
+
+                        # The enemy's turn after the player acted without ending the fight
+                        rest_win = rest_flee = 0.0
+                        stay = self.enemy_miss
+                        for p, damage in self.enemy_hits:
+                            left = shield - 1 if shield else 0
+                            if shield:
+                                damage = int(damage * 0.5)
+                            if health - damage <= 0:
+                                continue
+                            if damage == 0 and not shield:
+                                stay += p
+                                continue
+                            target = index(health - damage, enemy_health, mana, left)
+                            rest_win += p * win[target]
+                            rest_flee += p * flee[target]
+
+                        best = None
+                        for action in self.actions:
+                            outcome = self._action_odds(action, health, enemy_health, mana, shield)
+                            if outcome is None:
+                                continue
+                            known_win, known_flee, repeat = outcome
+                            # repeat is the chance the enemy's turn starts from this very
+                            # state; solve V = known + repeat * (rest + stay * V)
+                            denominator = 1 - repeat * stay
+                            if denominator <= 0:
+                                continue
+                            odds_win = (known_win + repeat * rest_win) / denominator
+                            odds_flee = (known_flee + repeat * rest_flee) / denominator
+                            score = odds_win + odds_flee if self.policy == "survive" else odds_win
+                            if best is None or score > best[0] + 1e-12:
+                                best = (score, odds_win, odds_flee, action)
+
+                        if best is not None:
+                            _, win[here], flee[here], self.best_action[here] = best
+                        after_win[here] = rest_win + stay * win[here]
+                        after_flee[here] = rest_flee + stay * flee[here]
+
+    def _action_odds(self, action: str, health: int, enemy_health: int, mana: int,
+                     shield: int) -> Optional[Tuple[float, float, float]]:
+        """Return (win, flee, chance of the enemy acting from this same state) for an action"""
+        index = self._index
+        after_win, after_flee = self._after_win, self._after_flee
+        known_win = known_flee = 0.0
+
+        if action == "attack":
+            for p, damage in self.attack_hits:
+                if damage >= enemy_health:
+                    known_win += p
+                else:
+                    target = index(health, enemy_health - damage, mana, shield)
+                    known_win += p * after_win[target]
+                    known_flee += p * after_flee[target]
+            return known_win, known_flee, self.attack_miss
+
+        if action == "flee":
+            return 0.0, self.flee_chance, 1 - self.flee_chance
+
+        if action == "cast fireball":
+            if mana < FIREBALL_COST:
+                return None
+            for p, damage in self.fireball_hits:
+                if damage >= enemy_health:
+                    known_win += p
+                else:
+                    target = index(health, enemy_health - damage, mana - FIREBALL_COST, shield)
+                    known_win += p * after_win[target]
+                    known_flee += p * after_flee[target]
+            return known_win, known_flee, 0.0
+
+        if action == "cast shield":
+            if mana < SHIELD_COST:
+                return None
+            target = index(health, enemy_health, mana - SHIELD_COST, SHIELD_ROUNDS)
+            return after_win[target], after_flee[target], 0.0
+
+        if action == "cast heal":
+            if mana < HEAL_COST:
+                return None
+            for p, amount in self.heals:
+                target = index(min(HEAL_CAP, health + amount), enemy_health, mana - HEAL_COST, shield)
+                known_win += p * after_win[target]
+                known_flee += p * after_flee[target]
+            return known_win, known_flee, 0.0
+
+        return None
+
+    def lookup(self, health: int, enemy_health: int, mana: int = 0,
+               shield_rounds: int = 0) -> Tuple[float, float, float]:
+        """Return (win, die, flee) probabilities from a combat state"""
+        if enemy_health <= 0:
+            return 1.0, 0.0, 0.0
+        if health <= 0:
+            return 0.0, 1.0, 0.0
+        here = self._index(min(health, self.max_health), min(enemy_health, self.max_enemy_health),
+                           min(mana, self.max_mana), min(shield_rounds, SHIELD_ROUNDS))
+        win, flee = self.win[here], self.flee[here]
+        return win, max(0.0, 1.0 - win - flee), flee
+
+    def recommend(self, health: int, enemy_health: int, mana: int = 0, shield_rounds: int = 0) -> Optional[str]:
+        """Return the action the policy picks in a combat state"""
+        if health <= 0 or enemy_health <= 0:
+            return None
+        return self.best_action[self._index(min(health, self.max_health), min(enemy_health, self.max_enemy_health),
+                                            min(mana, self.max_mana), min(shield_rounds, SHIELD_ROUNDS))]
+
+_tables: Dict[tuple, 'Future[CombatOdds]'] = {}
+_tables_lock = threading.Lock()
+
+def _build(future: 'Future[CombatOdds]', player_class: str, enemy: Dict[str, Any], policy: str,
+           max_health: int) -> None:
+    try:
+        future.set_result(CombatOdds(player_class, enemy, policy, max_health))
+    except Exception as e:
+        future.set_exception(e)
+
+def build_odds_table(player_class: str, enemy: Dict[str, Any], policy: str = "win",
+                     max_health: int = HEAL_CAP) -> 'Future[CombatOdds]':
+    """Start building an odds table in a background thread, unless it is built or building
+
+    Big tables take a second or more, so sessions ask for them as a fight
+    starts and show them once the returned future is done.
+    """
+    key = (player_class, enemy['health'], tuple(enemy['damage_range']), enemy.get('hit_chance', 0.3),
+           policy, max(max_health, HEAL_CAP))
+    with _tables_lock:
+        future = _tables.get(key)
+        if future is None:
+            if policy not in POLICIES:
+                raise ValueError(f"Unknown policy: {policy}")
+            future = _tables[key] = Future()
+            threading.Thread(target=_build, args=(future, player_class, enemy, policy, max_health),
+                             name="combat-odds", daemon=True).start()
+    return future
+
+def odds_table(player_class: str, enemy: Dict[str, Any], policy: str = "win", max_health: int = HEAL_CAP) -> CombatOdds:
+    """Return the memoized odds table for a class, enemy stats and policy, waiting for it if needed"""
+    return build_odds_table(player_class, enemy, policy, max_health).result()
+
+def main(argv=None) -> int:
+    from .dungeon_crawler import CHARACTER_CLASSES
+    from .world import DATA_DIR
+
+    parser = argparse.ArgumentParser(description="Precompute combat odds for every class and enemy")
+    parser.add_argument('--enemies', default=os.path.join(DATA_DIR, 'enemies.json'))
+    parser.add_argument('--policy', choices=list(POLICIES), action='append',
+                        help="policy to tabulate (repeatable, default: all)")
+    parser.add_argument('--full', action='store_true', help="write every state, not just fight openings")
+    parser.add_argument('--output', help="file to write the table to (default: stdout)")
+    args = parser.parse_args(argv)
+
+    with open(args.enemies, 'r') as f:
+        enemies = json.load(f)
+
+    out = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        out.write("class\tenemy\tpolicy\thealth\tenemy_health\tmana\tshield\twin\tdie\tflee\taction\n")
+        for player_class, details in CHARACTER_CLASSES.items():
+            for enemy_type, enemy in enemies.items():
+                for policy in args.policy or list(POLICIES):
+                    start = time.perf_counter()
+                    table = odds_table(player_class, enemy, policy)
+                    elapsed = time.perf_counter() - start
+                    print(f"{player_class} vs {enemy_type} ({policy}): built in {elapsed * 1000:.0f}ms",
+                          file=sys.stderr)
+                    if args.full:
+                        states = [(h, e, m, s) for m in range(table.max_mana + 1)
+                                  for e in range(1, table.max_enemy_health + 1)
+                                  for s in range(SHIELD_ROUNDS + 1)
+                                  for h in range(1, table.max_health + 1)]
+                    else:
+                        low, high = details['health_range']
+                        states = [(h, enemy['health'], table.max_mana, 0) for h in range(low, high + 1)]
+                    for state in states:
+                        win, die, flee = table.lookup(*state)
+                        action = table.recommend(*state)
+                        out.write(f"{player_class}\t{enemy_type}\t{policy}\t" + "\t".join(map(str, state))
+                                  + f"\t{win:.6f}\t{die:.6f}\t{flee:.6f}\t{action}\n")
+    finally:
+        if args.output:
+            out.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
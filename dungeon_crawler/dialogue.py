@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+NPC dialogue trees compiled into an indexed node table.
+
+Trees are authored as JSON:
+
+    {"start": "greet",
+     "nodes": {"greet": {"text": "Well met.",
+                         "choices": [{"text": "Tell me about the king.", "next": "king",
+                                      "requires": ["found_crown"], "forbids": ["angered_hermit"],
+                                      "sets": {"asked_about_king": true}},
+                                     {"text": "Goodbye."}]}}}
+
+and compiled so that nodes and choices are integer ids into flat arrays,
+with all text kept in one UTF-8 blob. A compiled graph can be written to a
+.dlg file, in which case its text stays on disk and is read on demand.
+
+Usage: python -m dungeon_crawler.dialogue compile TREES.json OUTPUT.dlg
+"""
+
+import sys
+import json
+import mmap
+import struct
+import argparse
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+MAGIC = b"DLG1"
+NO_TARGET = -1
+
+class DialogueGraph:
+    """Compiled dialogue trees: CSR node and choice tables plus a text blob"""
+    def __init__(self, trees: Dict[str, int], conditions: List[Tuple[Tuple[str, ...], Tuple[str, ...]]],
+                 effects: List[Tuple[Tuple[str, bool], ...]], node_text: array, node_choices: array,
+                 choice_text: array, choice_target: array, choice_condition: array, choice_effect: array,
+                 text_offsets: array, text_blob):
+        self.trees = trees
+        self.conditions = conditions  # Index 0 is "always available"
+        self.effects = effects  # Index 0 is "no effect"
+        self.node_text = node_text
+        self.node_choices = node_choices  # Choices of node i are node_choices[i]:node_choices[i + 1]
+        self.choice_text = choice_text
+        self.choice_target = choice_target
+        self.choice_condition = choice_condition
+        self.choice_effect = choice_effect
+        self.text_offsets = text_offsets
+        self.text_blob = text_blob  # bytes, or an mmap of a .dlg file
+
+    def __len__(self) -> int:
+        return len(self.node_text)
+
+    def start(self, tree: str) -> Optional[int]:
+        """Return the first node of a tree, or None if there is no such tree"""
+        return self.trees.get(tree)
+
+    def _text(self, text_id: int) -> str:
+        return self.text_blob[self.text_offsets[text_id]:self.text_offsets[text_id + 1]].decode('utf-8')
+
+    def text(self, node: int) -> str:
+        """Return what the NPC says at a node"""
+        return self._text(self.node_text[node])
+
+    def available(self, choice: int, flags: Dict[str, bool]) -> bool:
+        """Check a choice's flag conditions"""
+        condition = self.choice_condition[choice]
+        if not condition:
+            return True
+        required, forbidden = self.conditions[condition]
+        return all(flags.get(flag) for flag in required) and not any(flags.get(flag) for flag in forbidden)
+
+    def choices(self, node: int, flags: Dict[str, bool]) -> List[Tuple[int, str]]:
+        """Return (choice id, text) for the choices at a node the player can pick"""
+        return [(choice, self._text(self.choice_text[choice]))
+                for choice in range(self.node_choices[node], self.node_choices[node + 1])
+                if self.available(choice, flags)]
+
+    def choose(self, choice: int, flags: Dict[str, bool]) -> Optional[int]:
+        """Apply a choice's effects to flags and return the next node, or None if the talk ends"""
+        for flag, value in self.effects[self.choice_effect[choice]]:
+            flags[flag] = value
+        target = self.choice_target[choice]
+        return None if target == NO_TARGET else target
+
+def compile_dialogues(trees: Dict[str, Dict[str, Any]]) -> DialogueGraph:
+    """Compile authored dialogue trees into a DialogueGraph"""
+    texts: Dict[str, int] = {}
+    conditions: Dict[tuple, int] = {((), ()): 0}
+    effects: Dict[tuple, int] = {(): 0}
+    starts: Dict[str, int] = {}
+    node_text, node_choices = array('I'), array('I', [0])
+    choice_text, choice_target = array('I'), array('i')
+    choice_condition, choice_effect = array('I'), array('I')
+
+    def text_id(text: str) -> int:
+        return texts.setdefault(text, len(texts))
+
+    # Number every node first so choices can point forwards
+    node_ids: Dict[Tuple[str, str], int] = {}
+    for tree_name, tree in trees.items():
+        for key in tree['nodes']:
+            node_ids[(tree_name, key)] = len(node_ids)
+        if (tree_name, tree['start']) not in node_ids:
+            raise ValueError(f"Unknown dialogue node: {tree_name}/{tree['start']}")
+        starts[tree_name] = node_ids[(tree_name, tree['start'])]
+
+    for tree_name, tree in trees.items():
+        for key, node in tree['nodes'].items():
+            node_text.append(text_id(node['text']))
+            for choice in node.get('choices', []):
+                target = choice.get('next')
+                if target is not None and (tree_name, target) not in node_ids:
+                    raise ValueError(f"Unknown dialogue node: {tree_name}/{target}")
+                condition = (tuple(choice.get('requires', ())), tuple(choice.get('forbids', ())))
+                effect = tuple(sorted(choice.get('sets', {}).items()))
+                choice_text.append(text_id(choice['text']))
+                choice_target.append(NO_TARGET if target is None else node_ids[(tree_name, target)])
+                choice_condition.append(conditions.setdefault(condition, len(conditions)))
+                choice_effect.append(effects.setdefault(effect, len(effects)))
+            node_choices.append(len(choice_text))
+
+    text_offsets = array('Q', [0])
+    blob = bytearray()
+    for text in texts:
+        blob += text.encode('utf-8')
+        text_offsets.append(len(blob))
+
+    return DialogueGraph(starts, list(conditions), list(effects), node_text, node_choices, choice_text,
+                         choice_target, choice_condition, choice_effect, text_offsets, bytes(blob))
+
+ARRAYS = ('node_text', 'node_choices', 'choice_text', 'choice_target', 'choice_condition', 'choice_effect',
+          'text_offsets')
+
+def write_graph(graph: DialogueGraph, path: str) -> None:
+    """Write a compiled graph to a .dlg file"""
+    meta = json.dumps({
+        "trees": graph.trees,
+        "conditions": graph.conditions,
+        "effects": graph.effects,
+        "arrays": [[name, getattr(graph, name).typecode, len(getattr(graph, name))] for name in ARRAYS]
+    }).encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(MAGIC + struct.pack('<Q', len(meta)) + meta)
+        for name in ARRAYS:
+            f.write(getattr(graph, name).tobytes())
+        f.write(graph.text_blob)
+
+def load_graph(path: str) -> DialogueGraph:
+    """Load a .dlg file, leaving the dialogue text on disk until it is needed"""
+    with open(path, 'rb') as f:
+        if f.read(4) != MAGIC:
+            raise ValueError(f"Not a compiled dialogue file: {path}")
+        meta = json.loads(f.read(struct.unpack('<Q', f.read(8))[0]))
+        tables = {}
+        for name, typecode, length in meta['arrays']:
+            table = array(typecode)
+            table.fromfile(f, length)
+            tables[name] = table
+        text_start = f.tell()
+        blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    conditions = [(tuple(required), tuple(forbidden)) for required, forbidden in meta['conditions']]
+    effects = [tuple((flag, value) for flag, value in effect) for effect in meta['effects']]
+    # Shift offsets so they index into the mapped file directly
+    offsets = tables.pop('text_offsets')
+    tables['text_offsets'] = array('Q', (offset + text_start for offset in offsets))
+    return DialogueGraph(meta['trees'], conditions, effects, text_blob=blob, **tables)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compile NPC dialogue trees")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    compile_parser = subparsers.add_parser('compile', help="compile a JSON file of trees to a .dlg file")
+    compile_parser.add_argument('trees')
+    compile_parser.add_argument('output')
+    args = parser.parse_args(argv)
+
+    with open(args.trees, 'r') as f:
+        graph = compile_dialogues(json.load(f))
+    write_graph(graph, args.output)
+    print(f"Wrote {len(graph)} nodes to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,11 +4,27 @@ import sys
 import time
 import random
 import os
-from dataclasses import dataclass
-from typing import List, Dict, Optional, Any, Set
+import copy
+from collections.abc import MutableMapping
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Any, Set, Iterator, Tuple
 import json
+import queue
+import uuid
+import numpy as np
 from colorama import init, Fore, Back, Style
-from .combat import Enemy, CombatManager
+from .combat import Enemy, EnemyGroup, CombatManager
+from .minimap import Minimap
+from .world_watcher import WorldWatcher, WorldUpdate
+from .session_store import SessionStore, FINAL_OUTCOMES
+from .world import WorldSource, DEFAULT_WORLD
+from .combat_odds import build_odds_table
+from .dialogue import DialogueGraph
+from .hint import Simulation, suggest
+from .event_log import EventLog, MOVE, COMBAT, DEATH, WON, FLED, DIED
+from .roaming import RoamingEnemies, take_roaming_enemies
+from .items import ItemBag, ItemChanges
+from .profiler import CommandProfiler, PROFILE_COMMANDS
 
 # Initialize colorama
 init()
@@ -39,7 +55,15 @@ NAME_COMPONENTS = {
     "suffix": ["wyn", "ric", "thas", "mir", "lan", "dor", "ven", "thor", "gar", "wyn"]
 }
 
-@dataclass
+# Rooms listed by the find command before it summarizes the rest
+FIND_LIMIT = 5
+
+# Policies whose odds debug mode shows during a one-on-one fight
+ODDS_POLICIES = ("attack", "win", "survive")
+
+PROFILE_DIR = os.path.join(os.path.expanduser("~"), ".dungeon_crawler", "profiles")
+
+@dataclass(slots=True)
 class Room:
     """Represents a room in the dungeon"""
     id: str
@@ -47,11 +71,120 @@ class Room:
     description: str
     exits: Dict[str, str]
     dark: bool
-    items: List[str]
+    items: ItemBag
     enemy: Optional[Dict[str, Any]]
     npc: Optional[Dict[str, Any]]
+    index: int = 0  # Position of the room's bit in GameState.visited, and of its id in the session's room_ids
+    region: Optional[str] = None  # Spawn table for random encounters on entry
+    depth: int = 0  # Scales the spawn table towards deeper enemies
+    enemies: Optional[Dict[str, Any]] = None  # A pack fought all at once, see EnemyGroup.from_pack
+
+    @classmethod
+    def from_data(cls, room_id: str, data: Dict[str, Any], index: int) -> 'Room':
+        """Build a room from its rooms.json entry, sharing everything but the item list"""
+        return cls(
+            id=sys.intern(room_id),
+            title=data['title'],
+            description=data['description'],
+            exits=data['exits'],
+            dark=data['dark'],
+            items=ItemBag(data['items']),  # Sessions pick up items independently
+            enemy=data['enemy'],
+            npc=data['npc'],
+            index=index,
+            region=data.get('region'),
+            depth=data.get('depth', 0),
+            enemies=data.get('enemies')
+        )
+
+class RoomTable(MutableMapping):
+    """The rooms of one game state: a base table shared between forks plus this state's own changes
+
+    Room objects may be shared with other forks, so code that changes a
+    room must get it through edit(), which copies it on first write.
+    """
+    __slots__ = ('_base', '_changes', '_owned', '_owns_all')
+
+    def __init__(self, rooms: Optional[Dict[str, Room]] = None):
+        self._base: Dict[str, Room] = rooms if rooms is not None else {}
+        self._changes: Dict[str, Optional[Room]] = {}  # None marks a removed room
+        self._owned: Set[str] = set()  # Rooms copied since the last fork
+        self._owns_all = True  # No fork has been taken yet, so every room is ours
+
+    def __getitem__(self, room_id: str) -> Room:
+        room = self._changes.get(room_id, self)
+        if room is self:
+            return self._base[room_id]
+        if room is None:
+            raise KeyError(room_id)
+        return room
+
+    def __contains__(self, room_id: object) -> bool:
+        room = self._changes.get(room_id, self)
+        return room_id in self._base if room is self else room is not None
+
+    def get(self, room_id: str, default=None):
+        try:
+            return self[room_id]
+        except KeyError:
+            return default
+
+    def __setitem__(self, room_id: str, room: Room) -> None:
+        self._changes[room_id] = room
+        self._owned.add(room_id)
+
+    def __delitem__(self, room_id: str) -> None:
+        if room_id not in self:
+            raise KeyError(room_id)
+        if room_id in self._base:
+            self._changes[room_id] = None
+        else:
+            del self._changes[room_id]
+        self._owned.discard(room_id)
+
+    def __iter__(self) -> Iterator[str]:
+        changes = self._changes
+        for room_id in self._base:
+            if changes.get(room_id, room_id) is not None:
+                yield room_id
+        for room_id, room in changes.items():
+            if room is not None and room_id not in self._base:
+                yield room_id
+
+    def __len__(self) -> int:
+        size = len(self._base)
+        for room_id, room in self._changes.items():
+            if room_id in self._base:
+                size -= room is None
+            else:
+                size += room is not None
+        return size
 
-@dataclass
+    def clear(self) -> None:
+        self._base, self._changes, self._owned = {}, {}, set()
+
+    def edit(self, room_id: str) -> Room:
+        """Return a room this state can change without affecting its forks"""
+        room = self[room_id]
+        if self._owns_all or room_id in self._owned:
+            return room
+        room = copy.copy(room)
+        room.items = room.items.copy()
+        self[room_id] = room
+        return room
+
+    def fork(self) -> 'RoomTable':
+        """Return a table that shares every room with this one until either changes it"""
+        if not self._base:
+            # Rooms loaded into an empty table can become the shared base for free
+            self._base, self._changes = self._changes, {}
+        clone = RoomTable(self._base)
+        clone._changes = dict(self._changes)
+        clone._owns_all = self._owns_all = False
+        self._owned = set()
+        return clone
+
+@dataclass(slots=True)
 class GameState:
     """Tracks the current state of the game"""
     player_name: str
@@ -63,17 +196,81 @@ class GameState:
     steps_taken: int
     enemies_defeated: int
     items_used: int
-    start_time: float
+    start_time: float  # When this sitting began
     debug_mode: bool = False
+    played_before: float = 0.0  # Seconds played in earlier sittings of a resumed session
     rooms: Dict[str, Room] = None
     defeated_enemies: Set[str] = None  # Track which enemies have been defeated
+    visited: bytearray = None  # Bitset of visited rooms, indexed by Room.index (only stable within a session)
+    item_changes: ItemChanges = None  # Items taken from and dropped in rooms
+    # Containers still shared with a fork, copied before their first change
+    shared: Set[str] = field(default_factory=set, repr=False, compare=False)
 
     def __post_init__(self):
+        if not isinstance(self.rooms, RoomTable):
+            self.rooms = RoomTable(self.rooms)
         if self.defeated_enemies is None:
             self.defeated_enemies = set()
+        if self.visited is None:
+            self.visited = bytearray()
+        if self.item_changes is None:
+            self.item_changes = ItemChanges()
+
+    def fork(self) -> 'GameState':
+        """Return a copy whose changes don't affect this state, sharing everything it can"""
+        clone = copy.copy(self)
+        clone.inventory = list(self.inventory)
+        clone.flags = dict(self.flags)
+        clone.rooms = self.rooms.fork()
+        self.share()
+        clone.shared = set(self.shared)
+        return clone
+
+    def share(self) -> None:
+        """Mark the containers shared, so they are copied before their next change"""
+        self.shared = {'defeated_enemies', 'visited', 'item_changes'}
+
+    def edit_item_changes(self) -> ItemChanges:
+        """Return the item changes, copied first if a fork still shares them"""
+        if 'item_changes' in self.shared:
+            self.item_changes = self.item_changes.copy()
+            self.shared.discard('item_changes')
+        return self.item_changes
+
+    def mark_defeated(self, key: str) -> None:
+        """Remember that an enemy has been defeated"""
+        if 'defeated_enemies' in self.shared:
+            self.defeated_enemies = set(self.defeated_enemies)
+            self.shared.discard('defeated_enemies')
+        self.defeated_enemies.add(key)
+
+    def mark_visited(self, index: int) -> bool:
+        """Set a room's visited bit and return True if it was not set before"""
+        if self.has_visited(index):
+            return False
+        if 'visited' in self.shared:
+            self.visited = bytearray(self.visited)
+            self.shared.discard('visited')
+        byte, bit = divmod(index, 8)
+        if byte >= len(self.visited):
+            self.visited.extend(bytes(byte + 1 - len(self.visited)))
+        self.visited[byte] |= 1 << bit
+        return True
+
+    def time_played(self) -> float:
+        """Return the seconds played so far, not counting time away between sittings"""
+        return self.played_before + time.time() - self.start_time
+
+    def has_visited(self, index: int) -> bool:
+        """Check whether a room's visited bit is set"""
+        byte, bit = divmod(index, 8)
+        return byte < len(self.visited) and bool(self.visited[byte] & (1 << bit))
 
 class DungeonCrawler:
-    def __init__(self):
+    def __init__(self, world: Optional[WorldSource] = None, watcher: Optional[WorldWatcher] = None,
+                 store: Optional[SessionStore] = None, session_id: Optional[str] = None,
+                 events: Optional[EventLog] = None, roamers: Optional[RoamingEnemies] = None,
+                 seed: Optional[int] = None, profile_dir: str = PROFILE_DIR):
         # Initialize with default values
         self.game_state = GameState(
             player_name="",
@@ -91,29 +288,50 @@ class DungeonCrawler:
             defeated_enemies=set()
         )
         self.running: bool = True
+        self.world = world or DEFAULT_WORLD
+        self.store = store
+        self.events = events
+        self.rng = random.Random(seed)  # Drives this session's random encounters
+        self.session_id = session_id or uuid.uuid4().hex
+        self.pending_updates: queue.SimpleQueue = queue.SimpleQueue()
+        self.dialogue: Optional[DialogueGraph] = None  # Graph of the conversation in progress
+        self.dialogue_node: Optional[int] = None
+        self.dialogue_choices: List[int] = []
         self.load_rooms()
         self.load_enemies()
         self.combat_manager = CombatManager(
             player_health=self.game_state.health,
             player_class=self.game_state.player_class
         )
+        self.minimap = Minimap(self.game_state)
+        # A shared roamers instance is ticked by whoever shares it; otherwise this session runs its own
+        self.owns_roamers = roamers is None
+        placed = take_roaming_enemies(self.game_state.rooms)
+        if roamers is None:
+            roamers = RoamingEnemies(self.game_state.rooms)
+            roamers.spawn_from(placed)
+        self.roamers = roamers
+        self.roamers.place_player(self.session_id, self.game_state.current_room)
+        self.roaming_foe: Optional[int] = None  # Id of the wandering monster being fought
+        self.spawned_foe: Optional[str] = None  # Type of the random encounter being fought
+        self.foe_type: Optional[str] = None  # Type of the enemy in a one-on-one fight, however it started
+        self.profile_dir = profile_dir
+        self.profiler: Optional[CommandProfiler] = None
+        self.outcome: Optional[str] = None  # How the run ended: died, cleared or quit
+        if self.game_state.current_room in self.game_state.rooms:
+            self.minimap.discover(self.game_state.current_room)
+        if watcher is not None:
+            if watcher.source is not self.world:
+                raise ValueError("The watcher must watch the world this session plays in")
+            watcher.register(self)
 
     def load_rooms(self):
-        """Load room data from JSON file"""
+        """Load room data from the world source"""
         try:
-            with open(os.path.join(os.path.dirname(__file__), 'data', 'rooms.json'), 'r') as f:
-                room_data = json.load(f)
-                for room_id, data in room_data.items():
-                    self.game_state.rooms[room_id] = Room(
-                        id=room_id,
-                        title=data['title'],
-                        description=data['description'],
-                        exits=data['exits'],
-                        dark=data['dark'],
-                        items=data['items'],
-                        enemy=data['enemy'],
-                        npc=data['npc']
-                    )
+            for index, (room_id, data) in enumerate(self.world.rooms().items()):
+                self.game_state.rooms[room_id] = Room.from_data(room_id, data, index)
+            self.room_ids = self.world.room_ids()  # Room id by Room.index, shared until a reload adds rooms
+            self.item_index = self.world.item_index()  # Shared with every session in this world
         except FileNotFoundError:
             print(Fore.RED + "Error: rooms.json not found!" + Style.RESET_ALL)
             sys.exit(1)
@@ -122,16 +340,157 @@ class DungeonCrawler:
             sys.exit(1)
 
     def load_enemies(self):
-        """Load enemy data from JSON file"""
+        """Load enemy data and spawn tables from the world source"""
         try:
-            with open(os.path.join(os.path.dirname(__file__), 'data', 'enemies.json'), 'r') as f:
-                self.enemies = json.load(f)
+            self.enemies = self.world.enemies()
+            self.spawns = self.world.spawn_tables()
         except FileNotFoundError:
             print(Fore.RED + "Error: enemies.json not found!" + Style.RESET_ALL)
             sys.exit(1)
         except json.JSONDecodeError:
             print(Fore.RED + "Error: Invalid JSON in enemies.json!" + Style.RESET_ALL)
             sys.exit(1)
+        except ValueError as e:
+            print(Fore.RED + f"Error: Invalid spawns.json: {e}" + Style.RESET_ALL)
+            sys.exit(1)
+
+    def resume(self, snapshot: Dict[str, Any]):
+        """Continue a session from a snapshot returned by SessionStore.load_snapshot"""
+        state = self.game_state
+        for key in ("player_name", "player_class", "health", "steps_taken", "enemies_defeated",
+                    "items_used", "inventory", "flags", "defeated_enemies", "item_changes"):
+            setattr(state, key, snapshot[key])
+        # The clock restarts now; time away from the game doesn't count
+        state.played_before = snapshot["played"]
+        state.start_time = time.time()
+        rooms = state.rooms
+        if snapshot["current_room"] in rooms:
+            state.current_room = snapshot["current_room"]
+
+        # Take out what this player already beat, and redo their takes and drops
+        for room_id, room in list(rooms.items()):
+            if room.enemy and f"{room_id}_{room.enemy['type']}" in state.defeated_enemies:
+                rooms.edit(room_id).enemy = None
+            if room.enemies and f"{room_id}_pack" in state.defeated_enemies:
+                rooms.edit(room_id).enemies = None
+        for item, changes in state.item_changes.to_dict().items():
+            for room_id, change in changes.items():
+                if room_id in rooms:
+                    rooms.edit(room_id).items.apply_change(item, change)
+        if self.owns_roamers:
+            for roamer in list(self.roamers.roamers.values()):
+                if f"{roamer.home}_{roamer.enemy['type']}" in state.defeated_enemies:
+                    self.roamers.remove(roamer.id)
+        self.roamers.place_player(self.session_id, state.current_room)
+        for item in state.inventory:
+            self.item_index.add_carried(self.session_id, item)
+
+        # Lay the map out again from the rooms visited so far. Saved by id: rooms.json
+        # may have changed since, and with it every room's index
+        state.visited = bytearray()
+        self.minimap = Minimap(state)
+        for room_id in snapshot["visited"]:
+            if room_id in rooms:
+                self.minimap.discover(room_id)
+        self.minimap.discover(state.current_room)
+
+        self.combat_manager = CombatManager(player_health=state.health, player_class=state.player_class)
+        print(Fore.GREEN + f"\nWelcome back, {state.player_name} the {state.player_class.capitalize()}!")
+        print(f"You have {state.health} health and {len(state.inventory)} items." + Style.RESET_ALL)
+
+    def dungeon_cleared(self) -> bool:
+        """Check whether no room enemy, pack or wandering monster is left"""
+        if self.roamers.roamers:
+            return False
+        return not any(room.enemy or room.enemies for room in self.game_state.rooms.values())
+
+    def save_progress(self, outcome: Optional[str] = None):
+        """Queue a snapshot of this session, and the run if the outcome ends it for good
+
+        A quit session can be resumed, so its run is recorded when it finally ends.
+        """
+        if self.store is None:
+            return
+        self.store.save_snapshot(self.session_id, self.game_state, self.room_ids)
+        if outcome in FINAL_OUTCOMES:
+            self.store.record_run(self.session_id, self.game_state, outcome)
+
+    def log_event(self, kind: int, **fields) -> None:
+        """Append an event for the player's current room to the event log, if there is one"""
+        if self.events is None:
+            return
+        self.events.record(kind, self.game_state.current_room, self.game_state.player_class, **fields)
+
+    def apply_pending_updates(self):
+        """Apply any world updates delivered by the watcher since the last command"""
+        while True:
+            try:
+                update = self.pending_updates.get_nowait()
+            except queue.Empty:
+                return
+            self.apply_world_update(update)
+
+    def apply_world_update(self, update: WorldUpdate):
+        """Swap reloaded rooms and enemies into this session, keeping its progress"""
+        rooms = self.game_state.rooms
+        self.item_index = self.world.item_index()
+        new_ids = []
+        for room_id, data in update.rooms.items():
+            old_room = rooms.get(room_id)
+            if old_room is not None:
+                index = old_room.index
+            else:
+                index = len(self.room_ids) + len(new_ids)
+                new_ids.append(room_id)
+            room = Room.from_data(room_id, data, index)
+            # Keep enemies this player already defeated out of the reloaded room
+            if room.enemy and f"{room_id}_{room.enemy['type']}" in self.game_state.defeated_enemies:
+                room.enemy = None
+            if room.enemies and f"{room_id}_pack" in self.game_state.defeated_enemies:
+                room.enemies = None
+            if room.enemy and room.enemy.get('roams'):
+                # Wandering monsters live in self.roamers, not in rooms; a new room brings its own
+                if old_room is None and self.owns_roamers:
+                    self.roamers.add(room.enemy, room_id)
+                room.enemy = None
+            # Keep what this session took from and dropped in the room, on top of its new items.
+            # A room new to the session (or back after being removed) starts as the world has it
+            if old_room is None:
+                self.game_state.edit_item_changes().forget_room(room_id)
+            for item, change in self.game_state.item_changes.in_room(room_id).items():
+                room.items.apply_change(item, change)
+            rooms[room_id] = room
+            self.game_state.edit_item_changes().set_room(room_id, self.item_index.starting_items(room_id), room.items)
+            for item in room.items.counts():
+                self.item_index.add_name(item)
+
+        if new_ids:
+            self.room_ids += tuple(new_ids)  # A new tuple; snapshots still being written keep the old one
+
+        for room_id in update.removed_rooms:
+            if rooms.pop(room_id, None) is not None:
+                # Nothing lies in a room this session can no longer reach
+                start = self.item_index.starting_items(room_id)
+                self.game_state.edit_item_changes().set_room(room_id, start, ItemBag())
+            self.minimap.forget(room_id)
+
+        if update.enemies is not None:
+            self.enemies = update.enemies
+        if update.enemies is not None or update.spawns is not None:
+            try:
+                self.spawns = self.world.spawn_tables()  # Compiled once per change, for every session
+            except ValueError as e:
+                print(Fore.RED + f"Error: {e}" + Style.RESET_ALL)
+
+        # Move the player somewhere safe if their room was removed
+        if self.game_state.current_room not in rooms and rooms:
+            self.game_state.current_room = "entry" if "entry" in rooms else next(iter(rooms))
+            print(Fore.YELLOW + "\nThe dungeon shifts around you..." + Style.RESET_ALL)
+
+        if update.rooms or update.removed_rooms:
+            self.roamers.invalidate()
+            self.minimap.invalidate()
+            self.minimap.discover(self.game_state.current_room)
 
     def create_enemy(self, enemy_type: str) -> Enemy:
         """Create an enemy instance from the enemy data"""
@@ -152,9 +511,22 @@ class DungeonCrawler:
             player_health=self.game_state.health,
             player_class=self.game_state.player_class
         )
+        self.foe_type = enemy_type
+        if self.game_state.debug_mode:
+            self.prepare_combat_odds()
         
         return enemy
 
+    def create_group(self, pack: Dict[str, Any]) -> EnemyGroup:
+        """Create the enemies of a room's pack, rolling their attacks from this session's random stream"""
+        group = EnemyGroup.from_pack(pack, self.enemies, np.random.default_rng(self.rng.getrandbits(64)))
+        self.foe_type = None
+        self.combat_manager = CombatManager(
+            player_health=self.game_state.health,
+            player_class=self.game_state.player_class
+        )
+        return group
+
     def display_title(self):
         """Display the game's title screen with ASCII art"""
         print(Fore.YELLOW + Style.BRIGHT + """
@@ -217,6 +589,8 @@ class DungeonCrawler:
         
         # Set starting inventory
         self.game_state.inventory = ["Torch", "Rusty Dagger"]
+        for item in self.game_state.inventory:
+            self.item_index.add_carried(self.session_id, item)
         
         # Display welcome message
         print(Fore.GREEN + f"\nWelcome, {self.game_state.player_name} the {self.game_state.player_class.capitalize()}!")
@@ -254,12 +628,42 @@ class DungeonCrawler:
         
         print(f"Enemies Defeated: {self.game_state.enemies_defeated}")
         print(f"Items Used: {self.game_state.items_used}")
-        print(f"Time Elapsed: {int(time.time() - self.game_state.start_time)}s")
+        print(f"Time Elapsed: {int(self.game_state.time_played())}s")
         print("Flags:", "None" if not self.game_state.flags else "")
         for flag, value in self.game_state.flags.items():
             print(f"  {flag}: {value}")
+        if self.combat_manager.in_combat:
+            self.display_combat_odds()
         print("=================" + Style.RESET_ALL)
 
+    def prepare_combat_odds(self) -> List[Tuple[str, Any]]:
+        """Start building the odds tables for the current one-on-one fight; return their futures by policy"""
+        if self.foe_type not in self.enemies:
+            return []
+        # The fight can't take the player above the health it started with (or the heal cap),
+        # and game_state.health only catches up when it ends, so the tables fit the whole fight
+        enemy = self.enemies[self.foe_type]
+        return [(policy, build_odds_table(self.game_state.player_class, enemy, policy, self.game_state.health))
+                for policy in ODDS_POLICIES]
+
+    def display_combat_odds(self):
+        """Display the exact odds of the current fight under each policy"""
+        combat = self.combat_manager
+        if combat.enemy is None:
+            return  # Odds tables cover one-on-one fights only
+        tables = self.prepare_combat_odds()
+        if not tables:
+            return
+        print("Combat Odds (win / die / flee):")
+        state = (combat.player_health, combat.enemy.health, combat.mana, combat.shield_rounds)
+        for policy, future in tables:
+            if not future.done():
+                print(f"  {policy}: computing...")
+                continue
+            table = future.result()
+            win, die, flee = table.lookup(*state)
+            print(f"  {policy}: {win:.1%} / {die:.1%} / {flee:.1%} (next: {table.recommend(*state)})")
+
     def display_room(self):
         """Display the current room's information"""
         room = self.game_state.rooms[self.game_state.current_room]
@@ -289,17 +693,193 @@ class DungeonCrawler:
             if room.enemy:
                 print(Fore.RED + f"\n{room.enemy['name']} is here!")
                 print(room.enemy['description'])
+            if room.enemies:
+                print(Fore.RED + f"\n{room.enemies['name']} is here!")
+                if room.enemies.get('description'):
+                    print(room.enemies['description'])
         
         # Always show exits
-        print(Fore.CYAN + "\nExits:")
+        print(Fore.CYAN + "\nExits:" + Style.RESET_ALL)
         for direction, target in room.exits.items():
-            print(f"- {direction.capitalize()}: {self.game_state.rooms[target].title}")
+            if target in self.game_state.rooms:
+                print(f"- {direction.capitalize()}: {self.game_state.rooms[target].title}")
+
+    def start_dialogue(self):
+        """Start talking to the NPC in the current room"""
+        room = self.game_state.rooms[self.game_state.current_room]
+        if not room.npc:
+            print(Fore.RED + "There is no one here to talk to." + Style.RESET_ALL)
+            return
+        tree = room.npc.get('dialogue')
+        if isinstance(tree, dict):
+            tree = room.id  # Inline trees are compiled under their room's id
+        graph = self.world.dialogues()
+        node = graph.start(tree) if tree else None
+        if node is None:
+            print(Fore.BLUE + f"{room.npc['name']} has nothing to say." + Style.RESET_ALL)
+            return
+        self.dialogue = graph
+        self.show_dialogue_node(node)
+
+    def show_dialogue_node(self, node: int):
+        """Display what the NPC says and the choices the player has"""
+        room = self.game_state.rooms[self.game_state.current_room]
+        name = room.npc['name'] if room.npc else "Someone"
+        print(Fore.BLUE + f"\n{name}: {self.dialogue.text(node)}" + Style.RESET_ALL)
+        choices = self.dialogue.choices(node, self.game_state.flags)
+        if not choices:
+            self.end_dialogue()
+            return
+        self.dialogue_node = node
+        self.dialogue_choices = [choice for choice, _ in choices]
+        for number, (_, text) in enumerate(choices, 1):
+            print(Fore.BLUE + f"{number}) {text}" + Style.RESET_ALL)
+
+    def end_dialogue(self):
+        """Leave the current conversation"""
+        self.dialogue = None
+        self.dialogue_node = None
+        self.dialogue_choices = []
+
+    def handle_dialogue_command(self, command: str) -> None:
+        """Handle a choice while talking to an NPC"""
+        if command in ['q', ':q']:
+            self.running = False
+        elif command == ':d':
+            self.game_state.debug_mode = not self.game_state.debug_mode
+            if self.game_state.debug_mode:
+                self.display_debug_info()
+            print(f"Debug mode: {'on' if self.game_state.debug_mode else 'off'}")
+        elif command in ['bye', 'leave']:
+            self.end_dialogue()
+            print(Fore.BLUE + "You end the conversation." + Style.RESET_ALL)
+        elif command.isdigit() and 1 <= int(command) <= len(self.dialogue_choices):
+            node = self.dialogue.choose(self.dialogue_choices[int(command) - 1], self.game_state.flags)
+            if node is None:
+                self.end_dialogue()
+            else:
+                self.show_dialogue_node(node)
+        else:
+            print(Fore.RED + f"Choose 1-{len(self.dialogue_choices)}, or bye to leave." + Style.RESET_ALL)
+
+    def show_hint(self) -> None:
+        """Search possible futures and print the most promising next command"""
+        if self.game_state.current_room not in self.game_state.rooms:
+            return
+        sim = Simulation(self.game_state.fork(), self.combat_manager.fork(), self.enemies)
+        hint = suggest(sim)
+        if hint is None:
+            print(Fore.YELLOW + "\nNo hint: there is nothing you can do here." + Style.RESET_ALL)
+            return
+        print(Fore.YELLOW + f"\nHint: {hint.action}" + Style.RESET_ALL, end='')
+        if hint.playouts:
+            print(Fore.YELLOW + f" (outlook {hint.value:.2f} over {hint.playouts} playouts)" + Style.RESET_ALL)
+        else:
+            print()
+
+    def take_item(self, query: str) -> None:
+        """Pick up an item lying in the current room"""
+        room_id = self.game_state.current_room
+        room = self.game_state.rooms[room_id]
+        if room.dark and "Torch" not in self.game_state.inventory:
+            print(Fore.RED + "It's too dark to find anything here." + Style.RESET_ALL)
+            return
+        item = self.item_index.name(query)
+        if item is None or not room.items.count(item):
+            print(Fore.RED + f"There is no {query} here." + Style.RESET_ALL)
+            return
+        self.game_state.rooms.edit(room_id).items.remove(item)
+        self.game_state.edit_item_changes().add(room_id, item, -1)
+        self.game_state.inventory.append(item)
+        self.item_index.add_carried(self.session_id, item)
+        print(Fore.GREEN + f"You take the {item}." + Style.RESET_ALL)
+
+    def drop_item(self, query: str) -> None:
+        """Leave an item from the inventory in the current room"""
+        item = self.item_index.name(query)
+        if item is None or item not in self.game_state.inventory:
+            print(Fore.RED + f"You don't have a {query}." + Style.RESET_ALL)
+            return
+        room_id = self.game_state.current_room
+        self.game_state.inventory.remove(item)
+        self.item_index.remove_carried(self.session_id, item)
+        self.game_state.rooms.edit(room_id).items.add(item)
+        self.game_state.edit_item_changes().add(room_id, item, 1)
+        print(Fore.GREEN + f"You drop the {item}." + Style.RESET_ALL)
+
+    def find_item(self, query: str) -> None:
+        """List where an item can be found"""
+        item = self.item_index.name(query)
+        changes = self.game_state.item_changes.for_item(item) if item else {}
+        rooms = self.item_index.room_count(item, changes) if item else 0
+        holders = self.item_index.carried_by(item) if item else {}
+        carried = holders.get(self.session_id, 0)
+        others = len(holders) - (carried > 0)
+        if not rooms and not holders:
+            print(Fore.YELLOW + f"No {query} anywhere in the dungeon." + Style.RESET_ALL)
+            return
+        print(Fore.CYAN + f"\n{item}:")
+        if carried:
+            print(f"- You carry {carried}")
+        if others:
+            print(f"- {others} other {'adventurer carries' if others == 1 else 'adventurers carry'} one")
+        for room_id, count in self.item_index.first_rooms(item, FIND_LIMIT, changes):
+            print(f"- {count} in {self.game_state.rooms[room_id].title}")
+        if rooms > FIND_LIMIT:
+            print(f"- ...and {rooms - FIND_LIMIT} more rooms")
+        print(Style.RESET_ALL, end='')
+
+    def start_profile(self, commands: int = PROFILE_COMMANDS) -> None:
+        """Sample the next commands, then write where the time went to the profile directory"""
+        if self.profiler is not None:
+            print(Fore.RED + "A profile is already being captured; use :prof stop to end it." + Style.RESET_ALL)
+            return
+        self.profiler = CommandProfiler(commands)
+        # Shadow handle_command on this instance only while capturing, so it costs nothing otherwise
+        self.handle_command = self.profiler.wrap(self.handle_command, self.stop_profile)
+        self.profiler.start()
+        print(Fore.YELLOW + f"Profiling the next {commands} commands..." + Style.RESET_ALL)
+
+    def stop_profile(self) -> None:
+        """End the capture in progress and write it out"""
+        profiler = self.profiler
+        if profiler is None:
+            print(Fore.RED + "No profile is being captured." + Style.RESET_ALL)
+            return
+        profiler.stop()
+        self.profiler = None
+        del self.handle_command
+        name = f"{self.session_id[:8]}-{time.strftime('%Y%m%d-%H%M%S')}"
+        try:
+            collapsed, summary = profiler.write(self.profile_dir, name)
+        except OSError as e:
+            print(Fore.RED + f"Error: could not write profile: {e}" + Style.RESET_ALL)
+            return
+        print(Fore.YELLOW + f"Profiled {profiler.commands} commands ({sum(profiler.samples.values())} samples):"
+              + Style.RESET_ALL)
+        print(f"- {collapsed}")
+        print(f"- {summary}")
+
+    def handle_profile_command(self, command: str) -> None:
+        """Handle :prof start [N] and :prof stop"""
+        args = command.split()[1:]
+        if args[:1] == ['start'] and len(args) <= 2:
+            if len(args) == 1:
+                self.start_profile()
+            elif args[1].isdigit() and int(args[1]) > 0:
+                self.start_profile(int(args[1]))
+            else:
+                print(Fore.RED + "Usage: :prof start [number of commands]" + Style.RESET_ALL)
+        elif args == ['stop']:
+            self.stop_profile()
+        else:
+            print(Fore.RED + "Usage: :prof start [number of commands] or :prof stop" + Style.RESET_ALL)
 
     def move_player(self, direction: str) -> bool:
         """Attempt to move the player in the given direction"""
         current_room = self.game_state.rooms[self.game_state.current_room]
         
-        if direction not in current_room.exits:
+        if current_room.exits.get(direction) not in self.game_state.rooms:
             print(Fore.RED + f"You can't go {direction} from here!" + Style.RESET_ALL)
             return False
         
@@ -308,17 +888,50 @@ class DungeonCrawler:
         
         # Check if the target room has a defeated enemy
         if target_room.enemy and f"{target_room_id}_{target_room.enemy['type']}" in self.game_state.defeated_enemies:
-            target_room.enemy = None
+            self.game_state.rooms.edit(target_room_id).enemy = None
+        if target_room.enemies and f"{target_room_id}_pack" in self.game_state.defeated_enemies:
+            self.game_state.rooms.edit(target_room_id).enemies = None
         
         self.game_state.current_room = target_room_id
         self.game_state.steps_taken += 1
+        self.minimap.discover(target_room_id)
+        self.roamers.place_player(self.session_id, target_room_id)
+        if self.owns_roamers:
+            self.roamers.tick()
+        self.log_event(MOVE, health=self.game_state.health)
         return True
 
+    def check_spawn(self, room: Room) -> None:
+        """Roll the room's spawn table and start a fight if it produces an enemy"""
+        enemy_type = self.spawns.roll(room.region, room.depth, self.rng)
+        if enemy_type is None or enemy_type not in self.enemies:
+            return
+        enemy = self.create_enemy(enemy_type)
+        self.spawned_foe = enemy_type
+        self.combat_manager.start_combat(enemy)
+
+    def check_roamers(self) -> None:
+        """Start a fight with a wandering monster in the player's room, if there is one"""
+        roamers = self.roamers.in_room(self.game_state.current_room)
+        if not roamers:
+            return
+        print(Fore.RED + f"\n{roamers[0].enemy['name']} wanders in!" + Style.RESET_ALL)
+        enemy = self.create_enemy(roamers[0].enemy['type'])
+        self.roaming_foe = roamers[0].id
+        self.combat_manager.start_combat(enemy)
+
     def handle_command(self, command: str) -> None:
         """Process user commands"""
+        self.apply_pending_updates()
+        if command == ':prof' or command.startswith(':prof '):
+            self.handle_profile_command(command)
+            return
         if self.combat_manager.in_combat:
             self.handle_combat_command(command)
             return
+        if self.dialogue_node is not None:
+            self.handle_dialogue_command(command)
+            return
         
         if command in ['q', ':q']:
             self.running = False
@@ -327,6 +940,19 @@ class DungeonCrawler:
             if self.game_state.debug_mode:
                 self.display_debug_info()
             print(f"Debug mode: {'on' if self.game_state.debug_mode else 'off'}")
+        elif command == 'talk':
+            self.start_dialogue()
+        elif command == 'hint':
+            self.show_hint()
+        elif command.startswith('take '):
+            self.take_item(command[5:])
+        elif command.startswith('drop '):
+            self.drop_item(command[5:])
+        elif command.startswith('find '):
+            self.find_item(command[5:])
+        elif command == 'map':
+            print(Fore.CYAN + "\nMap (@ = you, # = visited, ? = unexplored):" + Style.RESET_ALL)
+            print(self.minimap.render(self.game_state.current_room))
         elif command in ['n', 's', 'e', 'w']:
             direction_map = {
                 'n': 'north',
@@ -341,8 +967,15 @@ class DungeonCrawler:
                 if current_room.enemy:
                     enemy = self.create_enemy(current_room.enemy['type'])
                     self.combat_manager.start_combat(enemy)
+                elif current_room.enemies:
+                    group = self.create_group(current_room.enemies)
+                    self.combat_manager.start_group(group)
+                else:
+                    self.check_roamers()
+                if not self.combat_manager.in_combat and current_room.region is not None:
+                    self.check_spawn(current_room)
         else:
-            print(Fore.RED + "Invalid command. Use n, s, e, w for movement, :d for debug mode, or q to quit." + Style.RESET_ALL)
+            print(Fore.RED + "Invalid command. Use n, s, e, w for movement, talk to speak to NPCs, take/drop/find ITEM for items, map to view the map, hint for a suggestion, :d for debug mode, or q to quit." + Style.RESET_ALL)
 
     def handle_combat_command(self, command: str) -> None:
         """Handle combat-specific commands"""
@@ -360,29 +993,93 @@ class DungeonCrawler:
                 self.display_debug_info()
             print(f"Debug mode: {'on' if self.game_state.debug_mode else 'off'}")
             return
+        elif command == 'hint':
+            self.show_hint()
+            return
         
         # Process combat action
+        enemy, group = self.combat_manager.enemy, self.combat_manager.group
+        room = self.game_state.rooms[self.game_state.current_room]
+        if self.roaming_foe is not None and self.roamers.roamers.get(self.roaming_foe) is None:
+            # Another player sharing these roamers slew it first
+            print(Fore.YELLOW + f"\n{enemy.name} is gone; someone else got to it first." + Style.RESET_ALL)
+            self.combat_manager.end_combat()
+            self.roaming_foe = None
+            return
+        if group is not None:
+            enemy_type = ""  # Worked out per type once the fight ends
+        elif self.roaming_foe is not None:
+            enemy_type = self.foe_type
+        elif self.spawned_foe is not None:
+            enemy_type = self.spawned_foe
+        else:
+            enemy_type = room.enemy['type'] if room.enemy else ""
         ended, message = self.combat_manager.process_round(command)
         print(message)
         
         if ended:
             if self.combat_manager.player_health <= 0:
-                self.game_over()
+                outcome = DIED
+            else:
+                if group is not None:
+                    outcome = FLED if group.alive_count() else WON
+                else:
+                    outcome = WON if enemy is not None and enemy.health <= 0 else FLED
+            if group is not None:
+                # One event per enemy type in the pack, so analytics count packs toward each type;
+                # a death is blamed on the type with the most foes still standing
+                alive = group.alive_by_type()
+                for member_type, standing in alive.items():
+                    self.log_event(COMBAT, enemy=member_type, outcome=outcome if outcome == DIED or standing else WON,
+                                   rounds=self.combat_manager.rounds, health=self.combat_manager.player_health)
+                enemy_type = max(alive, key=alive.get)
+            else:
+                self.log_event(COMBAT, enemy=enemy_type, outcome=outcome, rounds=self.combat_manager.rounds,
+                               health=self.combat_manager.player_health)
+            if outcome == DIED:
+                self.game_state.health = 0
+                self.game_over(enemy_type)
             else:
                 self.game_state.health = self.combat_manager.player_health
                 # Store enemy type before ending combat
                 current_room = self.game_state.rooms[self.game_state.current_room]
-                if current_room.enemy:
+                if group is not None:
+                    # A pack the player escaped is waiting at full strength next time
+                    if outcome == WON:
+                        self.game_state.enemies_defeated += group.size
+                        self.game_state.mark_defeated(f"{self.game_state.current_room}_pack")
+                        self.game_state.rooms.edit(self.game_state.current_room).enemies = None
+                        print(Fore.GREEN + f"\nEnemies defeated: {self.game_state.enemies_defeated}" + Style.RESET_ALL)
+                        self.display_debug_info()
+                elif self.roaming_foe is not None:
+                    # A wandering monster the player escaped keeps wandering
+                    if outcome == WON:
+                        roamer = self.roamers.remove(self.roaming_foe)
+                        if roamer is not None:
+                            self.game_state.mark_defeated(f"{roamer.home}_{roamer.enemy['type']}")
+                        self.game_state.enemies_defeated += 1
+                        print(Fore.GREEN + f"\nEnemies defeated: {self.game_state.enemies_defeated}" + Style.RESET_ALL)
+                        self.display_debug_info()
+                    self.roaming_foe = None
+                elif self.spawned_foe is not None:
+                    # Random encounters leave nothing behind in the room
+                    if outcome == WON:
+                        self.game_state.enemies_defeated += 1
+                        print(Fore.GREEN + f"\nEnemies defeated: {self.game_state.enemies_defeated}" + Style.RESET_ALL)
+                        self.display_debug_info()
+                    self.spawned_foe = None
+                elif current_room.enemy:
                     enemy_type = current_room.enemy['type']
                     # Increment counter and add to defeated set
                     self.game_state.enemies_defeated += 1
-                    self.game_state.defeated_enemies.add(f"{self.game_state.current_room}_{enemy_type}")
-                    current_room.enemy = None
+                    self.game_state.mark_defeated(f"{self.game_state.current_room}_{enemy_type}")
+                    self.game_state.rooms.edit(self.game_state.current_room).enemy = None
                     print(Fore.GREEN + f"\nEnemies defeated: {self.game_state.enemies_defeated}" + Style.RESET_ALL)
                     self.display_debug_info()  # Show updated stats
 
-    def game_over(self):
+    def game_over(self, killer: str = ""):
         """Handle game over state"""
+        self.log_event(DEATH, enemy=killer)
         print(Fore.RED + r"""
 __     ______  _    _   _      ____   _____ ______ 
 \ \   / / __ \| |  | | | |    / __ \ / ____|  ____|
@@ -403,18 +1100,38 @@ __     ______  _    _   _      ____   _____ ______
             
             if self.combat_manager.in_combat:
                 print(Fore.CYAN + "\nEnter your action: " + Style.RESET_ALL, end='')
+            elif self.dialogue_node is not None:
+                print(Fore.CYAN + "\nChoose an option: " + Style.RESET_ALL, end='')
             else:
-                print(Fore.CYAN + "\nEnter command (n/s/e/w for movement, :d for debug, q to quit): " + Style.RESET_ALL, end='')
+                print(Fore.CYAN + "\nEnter command (n/s/e/w for movement, talk, take/drop/find, map, hint, :d for debug, q to quit): " + Style.RESET_ALL, end='')
             
             command = input().strip().lower()
             self.handle_command(command)
+            self.save_progress()
+
+        if self.profiler is not None:
+            self.stop_profile()
+        self.roamers.remove_player(self.session_id)
+        for item in self.game_state.inventory:
+            self.item_index.remove_carried(self.session_id, item)
+        if self.game_state.health <= 0:
+            self.outcome = "died"
+        elif self.dungeon_cleared():
+            self.outcome = "cleared"
+        else:
+            self.outcome = "quit"
+        self.save_progress(self.outcome)
 
     def run(self):
         """Start the game"""
         try:
             self.display_title()
             print(Fore.WHITE + "Welcome to the dungeon!" + Style.RESET_ALL)
-            self.initialize_player()
+            snapshot = self.store.load_snapshot(self.session_id) if self.store is not None else None
+            if snapshot is not None and snapshot["health"] > 0:
+                self.resume(snapshot)
+            else:
+                self.initialize_player()
             self.main_loop()
         except KeyboardInterrupt:
             print("\nGame terminated by user")
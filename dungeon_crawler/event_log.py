@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Append-only binary log of gameplay events.
+
+Every event is one fixed-size record after a one-record header. Rooms,
+classes and enemies are stored as 64-bit hashes of their ids, so any
+number of sessions can append to the same file without agreeing on
+numbering. Each session also appends a "<hex id> <json name>" line to the
+log's .names file the first time it logs a name, so ids can be read back
+even for names that are no longer in the world, and two names sharing an
+id are caught instead of silently merged.
+"""
+
+import os
+import json
+import time
+import struct
+import hashlib
+import threading
+from typing import Dict, Iterator, Set, Tuple
+
+# time, room, player_class, enemy, rounds, health, kind, outcome
+RECORD = struct.Struct('<IQQQHHBB6x')
+
+# First record-sized block of every log; bump the version when RECORD changes
+MAGIC = b"DCEVENTS2"
+HEADER = MAGIC.ljust(RECORD.size, b'\0')
+
+# Event kinds
+MOVE = 1  # Entered a room
+COMBAT = 2  # A fight ended
+DEATH = 3  # The player died
+
+# Combat outcomes
+WON, FLED, DIED = 1, 2, 3
+
+_hashes: Dict[str, int] = {}
+
+def name_hash(name: str) -> int:
+    """Return the 64-bit id a name is logged as"""
+    value = _hashes.get(name)
+    if value is None:
+        digest = hashlib.blake2b(name.encode('utf-8'), digest_size=8).digest()
+        value = _hashes[name] = int.from_bytes(digest, 'little')
+    return value
+
+def names_path(path: str) -> str:
+    """Return the path of the name table kept next to a log"""
+    return path + '.names'
+
+def check_header(path: str, header: bytes) -> None:
+    """Raise ValueError unless a log starts with this version's header (an empty one is being created)"""
+    if header and header != HEADER:
+        raise ValueError(f"{path} is not an event log of this version; move it aside to start a new one")
+
+class EventLog:
+    """Buffers event records and appends them to a log file, always in whole records"""
+    def __init__(self, path: str, buffer_records: int = 256):
+        self.path = path
+        self.buffer_size = buffer_records * RECORD.size
+        self._buffer = bytearray()
+        self._names = bytearray()  # Name table lines not written yet
+        self._named: Set[str] = set()  # Names this log has added to the table
+        self._lock = threading.Lock()
+        try:
+            self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_EXCL, 0o644)
+            os.write(self._fd, HEADER)
+        except FileExistsError:
+            with open(path, 'rb') as f:
+                check_header(path, f.read(RECORD.size))
+            self._fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+        self._names_fd = os.open(names_path(path), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def _id(self, name: str) -> int:
+        if name not in self._named:
+            self._named.add(name)
+            self._names += f"{name_hash(name):016x} {json.dumps(name)}\n".encode('utf-8')
+        return name_hash(name)
+
+    def record(self, kind: int, room: str, player_class: str, enemy: str = "",
+               outcome: int = 0, rounds: int = 0, health: int = 0) -> None:
+        """Queue one event, writing the buffer out once it is full"""
+        with self._lock:
+            self._buffer += RECORD.pack(int(time.time()), self._id(room), self._id(player_class), self._id(enemy),
+                                        min(rounds, 0xFFFF), max(0, min(health, 0xFFFF)), kind, outcome)
+            if len(self._buffer) >= self.buffer_size:
+                self._write()
+
+    def _write(self) -> None:
+        # Names first, so a reader never finds an id the table doesn't have yet. One
+        # write() per batch, so appends from other sessions can't land mid-record or mid-line
+        if self._names:
+            os.write(self._names_fd, self._names)
+            self._names.clear()
+        if self._buffer:
+            os.write(self._fd, self._buffer)
+            self._buffer.clear()
+
+    def flush(self) -> None:
+        """Write out everything recorded so far"""
+        with self._lock:
+            self._write()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fd is not None:
+                self._write()
+                os.close(self._fd)
+                os.close(self._names_fd)
+                self._fd = None
+
+def read_names(path: str) -> Dict[int, str]:
+    """Return id -> name from a log's name table, raising ValueError if two names share an id"""
+    names: Dict[int, str] = {}
+    try:
+        f = open(names_path(path), 'rb')
+    except FileNotFoundError:
+        return names
+    with f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                break  # Still being written
+            key, name = line.decode('utf-8').split(' ', 1)
+            key, name = int(key, 16), json.loads(name)
+            if names.setdefault(key, name) != name:
+                raise ValueError(f"Event log names {names[key]!r} and {name!r} share the id {key:016x}")
+    return names
+
+def read_events(path: str, offset: int = 0, chunk_records: int = 65536) -> Iterator[Tuple[int, ...]]:
+    """Yield the records of a log from a byte offset, stopping before a trailing partial record"""
+    with open(path, 'rb') as f:
+        check_header(path, f.read(RECORD.size))
+        f.seek(max(offset, RECORD.size))
+        while True:
+            data = f.read(chunk_records * RECORD.size)
+            whole = len(data) - len(data) % RECORD.size
+            yield from RECORD.iter_unpack(data[:whole])
+            if whole < chunk_records * RECORD.size:
+                return
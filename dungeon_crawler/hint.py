@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Suggest the next action by Monte Carlo tree search over forked game states.
+
+Each playout forks the session, which shares every room with the real game
+until the playout changes one, so thousands of futures fit in the budget.
+"""
+
+import math
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .combat import Enemy, EnemyGroup, CombatManager
+
+HINT_BUDGET = 0.05  # Seconds of searching per hint
+TREE_DEPTH = 3  # Actions deep the search tree may grow
+ROLLOUT_DEPTH = 8  # Random actions played after leaving the tree
+EXPLORATION = 1.4  # UCB1 constant
+DIRECTIONS = {'n': 'north', 's': 'south', 'e': 'east', 'w': 'west'}
+SPELLS = (("cast fireball", 3), ("cast shield", 2), ("cast heal", 4))
+
+@dataclass
+class Hint:
+    """A recommended action and how well playouts starting with it went"""
+    action: str
+    value: float  # Mean playout score, 0 means death
+    playouts: int
+
+class Simulation:
+    """A silent copy of a session that can be played forward without touching the real game"""
+    __slots__ = ('state', 'combat', 'enemies', 'start_health', 'dead', 'kills')
+
+    def __init__(self, state, combat: CombatManager, enemies: Dict[str, Dict[str, Any]]):
+        self.state = state
+        self.combat = combat
+        self.enemies = enemies
+        self.start_health = max(1, combat.player_health if combat.in_combat else state.health)
+        self.dead = False
+        self.kills = 0  # Enemies beaten rather than escaped from
+
+    def fork(self) -> 'Simulation':
+        clone = Simulation.__new__(Simulation)
+        clone.state = self.state.fork()
+        clone.combat = self.combat.fork()
+        clone.enemies = self.enemies
+        clone.start_health = self.start_health
+        clone.dead = self.dead
+        clone.kills = self.kills
+        return clone
+
+    def actions(self) -> List[str]:
+        """Return the commands the player could enter now"""
+        if self.dead:
+            return []
+        if self.combat.in_combat:
+            actions = ["attack", "flee"]
+            if self.combat.player_class == "wizard":
+                actions += [spell for spell, cost in SPELLS if self.combat.mana >= cost]
+            return actions
+        rooms = self.state.rooms
+        exits = rooms[self.state.current_room].exits
+        return [key for key, direction in DIRECTIONS.items() if exits.get(direction) in rooms]
+
+    def rollout_actions(self) -> List[str]:
+        """Return the actions a playout picks from, which only walk into a fight if there's no way round it"""
+        actions = self.actions()
+        if self.combat.in_combat:
+            return actions
+        rooms, exits = self.state.rooms, self.state.rooms[self.state.current_room].exits
+        quiet = []
+        for action in actions:
+            room_id = exits[DIRECTIONS[action]]
+            enemy, pack = rooms[room_id].enemy, rooms[room_id].enemies
+            if enemy and f"{room_id}_{enemy['type']}" not in self.state.defeated_enemies:
+                continue
+            if pack and f"{room_id}_pack" not in self.state.defeated_enemies:
+                continue
+            quiet.append(action)
+        return quiet or actions
+
+    def step(self, action: str) -> None:
+        """Play one command, following the same rules as DungeonCrawler"""
+        state = self.state
+        if self.combat.in_combat:
+            enemy, group = self.combat.enemy, self.combat.group
+            ended, _ = self.combat.process_round(action)
+            if not ended:
+                return
+            if self.combat.player_health <= 0:
+                state.health = 0
+                self.dead = True
+                return
+            state.health = self.combat.player_health
+            room = state.rooms[state.current_room]
+            if group is not None:
+                if not group.alive_count():
+                    self.kills += group.size
+                    state.enemies_defeated += group.size
+                    state.mark_defeated(f"{state.current_room}_pack")
+                    state.rooms.edit(state.current_room).enemies = None
+                return
+            self.kills += enemy.health <= 0
+            if room.enemy:
+                state.enemies_defeated += 1
+                state.mark_defeated(f"{state.current_room}_{room.enemy['type']}")
+                state.rooms.edit(state.current_room).enemy = None
+            return
+
+        room_id = state.rooms[state.current_room].exits[DIRECTIONS[action]]
+        room = state.rooms[room_id]
+        if room.enemy and f"{room_id}_{room.enemy['type']}" in state.defeated_enemies:
+            room = state.rooms.edit(room_id)
+            room.enemy = None
+        if room.enemies and f"{room_id}_pack" in state.defeated_enemies:
+            room = state.rooms.edit(room_id)
+            room.enemies = None
+        state.current_room = room_id
+        state.steps_taken += 1
+        state.mark_visited(room.index)
+        if room.enemy and room.enemy['type'] in self.enemies:
+            data = self.enemies[room.enemy['type']]
+            self.combat = CombatManager(state.health, state.player_class)
+            self.combat.enemy = Enemy(data['name'], data['health'], tuple(data['damage_range']),
+                                      data['description'], data.get('hit_chance', 0.3))
+            self.combat.in_combat = True
+        elif room.enemies:
+            self.combat = CombatManager(state.health, state.player_class)
+            self.combat.group = EnemyGroup.from_pack(room.enemies, self.enemies,
+                                                     np.random.default_rng(random.getrandbits(64)))
+            self.combat.in_combat = True
+
+    def score(self, start: 'Simulation') -> float:
+        """Rate how this future went compared to where the search started"""
+        if self.dead:
+            return 0.0
+        health = self.combat.player_health if self.combat.in_combat else self.state.health
+        score = 0.5 + 0.5 * min(1.0, health / self.start_health)
+        return score + 0.1 * (self.kills - start.kills)
+
+class _Node:
+    """Statistics for one sequence of actions; outcomes are re-sampled on every playout"""
+    __slots__ = ('children', 'visits', 'total')
+
+    def __init__(self):
+        self.children: Dict[str, '_Node'] = {}
+        self.visits = 0
+        self.total = 0.0
+
+    def select(self, actions: List[str]) -> str:
+        """Pick an untried action, or the legal child with the best UCB1 score"""
+        for action in actions:
+            if action not in self.children:
+                return action
+        log_visits = math.log(self.visits)
+        best, best_score = actions[0], -1.0
+        for action in actions:
+            child = self.children[action]
+            score = child.total / child.visits + EXPLORATION * math.sqrt(log_visits / child.visits)
+            if score > best_score:
+                best, best_score = action, score
+        return best
+
+def suggest(root: Simulation, budget: float = HINT_BUDGET, rng: Optional[random.Random] = None) -> Optional[Hint]:
+    """Search from a simulation for up to budget seconds and return the best first action"""
+    rng = rng or random.Random()
+    actions = root.actions()
+    if not actions:
+        return None
+    if len(actions) == 1:
+        return Hint(actions[0], 0.0, 0)
+
+    tree = _Node()
+    deadline = time.perf_counter() + budget
+    while tree.visits == 0 or time.perf_counter() < deadline:
+        sim = root.fork()
+        node, path = tree, [tree]
+        # Walk down the tree while every legal action has been tried
+        while len(path) <= TREE_DEPTH:
+            actions = sim.actions()
+            if not actions:
+                break
+            action = node.select(actions)
+            sim.step(action)
+            if action not in node.children:
+                node.children[action] = _Node()
+                path.append(node.children[action])
+                break
+            node = node.children[action]
+            path.append(node)
+
+        for _ in range(ROLLOUT_DEPTH):
+            actions = sim.rollout_actions()
+            if not actions:
+                break
+            sim.step(rng.choice(actions))
+
+        score = sim.score(root)
+        for node in path:
+            node.visits += 1
+            node.total += score
+
+    action, child = max(tree.children.items(), key=lambda item: item[1].visits)
+    return Hint(action, child.total / child.visits, tree.visits)
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+
+import threading
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+NO_CHANGES: Mapping[str, int] = MappingProxyType({})
+
+class ItemBag:
+    """The items in a room: a multiset with constant-time add and remove, iterated in arrival order"""
+    __slots__ = ('_counts', '_size')
+
+    def __init__(self, items: Iterable[str] = ()):
+        self._counts: Dict[str, int] = {}
+        self._size = 0
+        for item in items:
+            self.add(item)
+
+    def add(self, item: str, count: int = 1) -> None:
+        self._counts[item] = self._counts.get(item, 0) + count
+        self._size += count
+
+    def remove(self, item: str, count: int = 1) -> bool:
+        """Take count of an item out, returning False (and taking nothing) if there aren't that many"""
+        held = self._counts.get(item, 0)
+        if held < count:
+            return False
+        if held == count:
+            del self._counts[item]
+        else:
+            self._counts[item] = held - count
+        self._size -= count
+        return True
+
+    def count(self, item: str) -> int:
+        return self._counts.get(item, 0)
+
+    def counts(self) -> Mapping[str, int]:
+        """Return a read-only view of item name -> count"""
+        return MappingProxyType(self._counts)
+
+    def apply_change(self, item: str, change: int) -> None:
+        """Add change of an item, or take away up to -change of it"""
+        if change > 0:
+            self.add(item, change)
+        elif change < 0 and item in self:
+            self.remove(item, min(-change, self.count(item)))
+
+    def clear(self) -> None:
+        self._counts.clear()
+        self._size = 0
+
+    def copy(self) -> 'ItemBag':
+        bag = ItemBag()
+        bag._counts = dict(self._counts)
+        bag._size = self._size
+        return bag
+
+    def __contains__(self, item: object) -> bool:
+        return item in self._counts
+
+    def __iter__(self) -> Iterator[str]:
+        for item, count in self._counts.items():
+            for _ in range(count):
+                yield item
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __eq__(self, other: object) -> bool:
+        # Bags are unordered, so a list compares equal if it holds the same items in any order
+        if isinstance(other, ItemBag):
+            return self._counts == other._counts
+        if isinstance(other, (list, tuple)):
+            return len(other) == self._size and self._counts == ItemBag(other)._counts
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ItemBag({list(self)!r})"
+
+class ItemChanges:
+    """One session's takes and drops: how many of each item its rooms gained or lost since the world placed them"""
+    __slots__ = ('_items',)
+
+    def __init__(self, items: Optional[Dict[str, Dict[str, int]]] = None):
+        self._items: Dict[str, Dict[str, int]] = items or {}  # Item -> room id -> change
+
+    def add(self, room_id: str, item: str, count: int) -> None:
+        """Record that a room gained count of an item, or lost some if count is negative"""
+        rooms = self._items.setdefault(item, {})
+        change = rooms.get(room_id, 0) + count
+        if change:
+            rooms[room_id] = change
+            return
+        rooms.pop(room_id, None)
+        if not rooms:
+            del self._items[item]
+
+    def for_item(self, item: str) -> Mapping[str, int]:
+        """Return room id -> change for an item"""
+        return self._items.get(item, NO_CHANGES)
+
+    def in_room(self, room_id: str) -> Dict[str, int]:
+        """Return item -> change for a room"""
+        return {item: rooms[room_id] for item, rooms in self._items.items() if room_id in rooms}
+
+    def forget_room(self, room_id: str) -> None:
+        for item, change in self.in_room(room_id).items():
+            self.add(room_id, item, -change)
+
+    def set_room(self, room_id: str, start: ItemBag, items: ItemBag) -> None:
+        """Record a room's contents as its differences from what the world started it with"""
+        self.forget_room(room_id)
+        for item in set(start.counts()) | set(items.counts()):
+            self.add(room_id, item, items.count(item) - start.count(item))
+
+    def copy(self) -> 'ItemChanges':
+        return ItemChanges({item: dict(rooms) for item, rooms in self._items.items()})
+
+    def to_dict(self) -> Dict[str, Dict[str, int]]:
+        return {item: dict(rooms) for item, rooms in self._items.items()}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+class ItemIndex:
+    """Where every item is: which rooms the world placed it in and which sessions' inventories hold it
+
+    One index serves every session in a world (see WorldSource.item_index).
+    Sessions take and drop items in their own copies of the rooms, so room
+    lookups take the session's ItemChanges to apply on top of the world's
+    placement. Lookups are by name in any letter case.
+    """
+    __slots__ = ('_rooms', '_sessions', '_names', '_placement', '_lock')
+
+    def __init__(self):
+        self._rooms: Dict[str, Dict[str, int]] = {}  # Item -> room id -> count
+        self._sessions: Dict[str, Dict[str, int]] = {}  # Item -> session id -> count
+        self._names: Dict[str, str] = {}  # Lowercase name -> item name
+        self._placement: Mapping[str, Dict[str, Any]] = {}  # The rooms.json table _rooms was built from
+        self._lock = threading.Lock()  # Sessions on other threads update what they carry
+
+    def build_world_rooms(self, rooms: Mapping[str, Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+        """Build the room side of the index for a rooms.json table without making it current"""
+        table: Dict[str, Dict[str, int]] = {}
+        for room_id, room in rooms.items():
+            for item in room['items']:
+                self._names.setdefault(item.lower(), item)
+                holders = table.setdefault(item, {})
+                holders[room_id] = holders.get(room_id, 0) + 1
+        return table
+
+    def set_world_rooms(self, rooms: Mapping[str, Dict[str, Any]],
+                        table: Optional[Dict[str, Dict[str, int]]] = None) -> None:
+        """Replace the room side of the index with the items a rooms.json table places
+
+        A table already built with build_world_rooms can be passed to skip building it here.
+        """
+        if table is None:
+            table = self.build_world_rooms(rooms)
+        # Readers see either the old table or the new one, never a half-built one
+        self._rooms, self._placement = table, rooms
+
+    def starting_items(self, room_id: str) -> ItemBag:
+        """Return what the world placed in a room"""
+        room = self._placement.get(room_id)
+        return ItemBag(room['items'] if room is not None else ())
+
+    def name(self, query: str) -> Optional[str]:
+        """Return the item name a query refers to, or None if no such item has been seen"""
+        return self._names.get(query.strip().lower())
+
+    def add_name(self, item: str) -> None:
+        """Make an item findable by name, e.g. one a reloaded room brought in"""
+        self._names.setdefault(item.lower(), item)
+
+    def _add(self, table: Dict[str, Dict[str, int]], item: str, holder: str, count: int) -> None:
+        self._names.setdefault(item.lower(), item)
+        holders = table.get(item)
+        if holders is None:
+            holders = table[item] = {}
+        holders[holder] = holders.get(holder, 0) + count
+
+    def _remove(self, table: Dict[str, Dict[str, int]], item: str, holder: str, count: int) -> None:
+        holders = table[item]
+        left = holders[holder] - count
+        if left > 0:
+            holders[holder] = left
+            return
+        del holders[holder]
+        if not holders:
+            del table[item]
+
+    def add_carried(self, session_id: str, item: str, count: int = 1) -> None:
+        with self._lock:
+            self._add(self._sessions, item, session_id, count)
+
+    def remove_carried(self, session_id: str, item: str, count: int = 1) -> None:
+        with self._lock:
+            self._remove(self._sessions, item, session_id, count)
+
+    def room_count(self, item: str, changes: Mapping[str, int] = NO_CHANGES) -> int:
+        """Return how many rooms hold an item, looking only at the rooms a session changed"""
+        rooms = self._rooms.get(item, {})
+        count = len(rooms)
+        for room_id, change in changes.items():
+            placed = rooms.get(room_id, 0)
+            count += (placed + change > 0) - (placed > 0)
+        return count
+
+    def carried_by(self, item: str) -> Mapping[str, int]:
+        """Return a read-only view of session id -> count for an item"""
+        return MappingProxyType(self._sessions.get(item, {}))
+
+    def first_rooms(self, item: str, limit: int, changes: Mapping[str, int] = NO_CHANGES) -> List[Tuple[str, int]]:
+        """Return up to limit (room id, count) pairs for an item, without looking at the rest"""
+        found: List[Tuple[str, int]] = []
+        if limit <= 0:
+            return found
+        rooms = self._rooms.get(item, {})
+        for room_id, count in rooms.items():
+            count += changes.get(room_id, 0)
+            if count > 0:
+                found.append((room_id, count))
+                if len(found) == limit:
+                    return found
+        for room_id, change in changes.items():
+            if change > 0 and room_id not in rooms:
+                found.append((room_id, change))
+                if len(found) == limit:
+                    break
+        return found
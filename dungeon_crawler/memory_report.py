@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Print how many bytes rooms, enemies and sessions take for a given world file.
+
+Usage: python -m dungeon_crawler.memory_report [rooms.json] [enemies.json]
+"""
+
+import os
+import sys
+import time
+import argparse
+from typing import Any, Dict, Optional, Set
+
+from .dungeon_crawler import GameState, Room
+from .combat import Enemy, CombatManager
+from .world import DATA_DIR, FileWorldSource
+
+def deep_sizeof(obj: Any, seen: Optional[Set[int]] = None) -> int:
+    """Return the size of an object and everything it references that is not in seen"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen or isinstance(obj, type):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += deep_sizeof(key, seen) + deep_sizeof(value, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += deep_sizeof(item, seen)
+    elif not isinstance(obj, (str, bytes, bytearray, int, float, bool)) and obj is not None:
+        if hasattr(obj, '__dict__'):
+            size += deep_sizeof(obj.__dict__, seen)
+        for cls in type(obj).__mro__:
+            for slot in getattr(cls, '__slots__', ()):
+                if hasattr(obj, slot):
+                    size += deep_sizeof(getattr(obj, slot), seen)
+    return size
+
+def build_session(room_data: Dict[str, Any], player_class: str = "warrior") -> GameState:
+    """Build the per-session state a player carries for this world"""
+    rooms = {room_id: Room.from_data(room_id, data, index)
+             for index, (room_id, data) in enumerate(room_data.items())}
+    state = GameState(
+        player_name="Aelwyn",
+        player_class=player_class,
+        health=12,
+        inventory=["Torch", "Rusty Dagger"],
+        current_room=next(iter(rooms), "entry"),
+        flags={},
+        steps_taken=0,
+        enemies_defeated=0,
+        items_used=0,
+        start_time=time.time(),
+        rooms=rooms
+    )
+    state.mark_visited(0)
+    return state
+
+def build_enemy(data: Dict[str, Any]) -> Enemy:
+    return Enemy(
+        name=data['name'],
+        health=data['health'],
+        damage_range=tuple(data['damage_range']),
+        description=data['description'],
+        hit_chance=data.get('hit_chance', 0.3)
+    )
+
+def report(rooms_path: str, enemies_path: str) -> Dict[str, float]:
+    """Measure the world in the given files and return bytes per object"""
+    source = FileWorldSource(rooms_path, enemies_path)
+    room_data = source.rooms()
+    enemy_data = source.enemies()
+
+    # The parsed world is shared by every session, so count it once up
+    # front and report only what each further session adds
+    shared: Set[int] = set()
+    world_bytes = deep_sizeof(room_data, shared)
+
+    session = build_session(room_data)
+    session_bytes = deep_sizeof((session, CombatManager(session.health, session.player_class)), set(shared))
+    room_bytes = deep_sizeof(session.rooms, set(shared))
+
+    enemies = [build_enemy(data) for data in enemy_data.values()]
+    enemy_bytes = deep_sizeof(enemies, set(shared)) - sys.getsizeof(enemies)
+
+    return {
+        "rooms": len(room_data),
+        "enemy_types": len(enemy_data),
+        "world_bytes": world_bytes,
+        "bytes_per_room": room_bytes / max(1, len(room_data)),
+        "bytes_per_enemy": enemy_bytes / max(1, len(enemies)),
+        "bytes_per_session": session_bytes
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Report memory use per room, enemy and session")
+    parser.add_argument('rooms', nargs='?', default=os.path.join(DATA_DIR, 'rooms.json'))
+    parser.add_argument('enemies', nargs='?', default=os.path.join(DATA_DIR, 'enemies.json'))
+    args = parser.parse_args(argv)
+
+    results = report(args.rooms, args.enemies)
+    print(f"Rooms:             {results['rooms']}")
+    print(f"Enemy types:       {results['enemy_types']}")
+    print(f"Shared world:      {results['world_bytes']} bytes")
+    print(f"Bytes per room:    {results['bytes_per_room']:.1f}")
+    print(f"Bytes per enemy:   {results['bytes_per_enemy']:.1f}")
+    print(f"Bytes per session: {results['bytes_per_session']}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+
+from typing import Dict, Optional, Tuple
+
+# Grid offsets for the compass directions a room can use in its exits
+DIRECTION_OFFSETS = {
+    "north": (0, -1),
+    "south": (0, 1),
+    "east": (1, 0),
+    "west": (-1, 0)
+}
+
+# How many cells around the player the map shows in each direction
+MAP_RADIUS = 5
+
+# How far to search for a free cell when a room's natural spot is taken
+PLACEMENT_SEARCH_LIMIT = 3
+
+class Minimap:
+    """Incrementally laid out ASCII map of the rooms a player has discovered"""
+    def __init__(self, game_state):
+        self.game_state = game_state
+        self.coords: Dict[str, Tuple[int, int]] = {}
+        self.cells: Dict[Tuple[int, int], str] = {}
+        self.version = 0
+        self._cache_key: Optional[Tuple[int, str]] = None
+        self._cache: str = ""
+
+    def discover(self, room_id: str) -> bool:
+        """Mark a room as visited and lay it out; return True if it was new"""
+        room = self.game_state.rooms[room_id]
+        if not self.game_state.mark_visited(room.index):
+            return False
+
+        if room_id not in self.coords:
+            self._place(room_id, (0, 0) if not self.coords else None)
+
+        # Reserve cells for the neighbours we can now see through the exits. A room
+        # left off the map (no free cell nearby) has no position to reserve around
+        cell = self.coords.get(room_id)
+        if cell is not None:
+            x, y = cell
+            for direction, target in room.exits.items():
+                offset = DIRECTION_OFFSETS.get(direction)
+                if offset is None or target in self.coords or target not in self.game_state.rooms:
+                    continue
+                self._place(target, (x + offset[0], y + offset[1]))
+
+        self.version += 1
+        return True
+
+    def forget(self, room_id: str) -> None:
+        """Drop a room that no longer exists from the layout"""
+        cell = self.coords.pop(room_id, None)
+        if cell is not None:
+            del self.cells[cell]
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """Force the next render to redraw, e.g. after exits changed"""
+        self.version += 1
+
+    def _place(self, room_id: str, preferred: Optional[Tuple[int, int]]) -> None:
+        """Give a room coordinates, falling back to a nearby free cell"""
+        if preferred is None:
+            preferred = self._anchor_for(room_id)
+        cell = self._free_cell(preferred)
+        if cell is None:
+            return
+        self.coords[room_id] = cell
+        self.cells[cell] = room_id
+
+    def _anchor_for(self, room_id: str) -> Tuple[int, int]:
+        """Pick a spot next to an already placed neighbour of the room"""
+        room = self.game_state.rooms[room_id]
+        for direction, target in room.exits.items():
+            offset = DIRECTION_OFFSETS.get(direction)
+            if offset is not None and target in self.coords:
+                tx, ty = self.coords[target]
+                return (tx - offset[0], ty - offset[1])
+        return (0, 0)
+
+    def _free_cell(self, start: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+        """Find the closest unused cell to start within the search limit"""
+        if start not in self.cells:
+            return start
+        sx, sy = start
+        for distance in range(1, PLACEMENT_SEARCH_LIMIT + 1):
+            for dx in range(-distance, distance + 1):
+                for dy in (-distance, distance) if abs(dx) != distance else range(-distance, distance + 1):
+                    cell = (sx + dx, sy + dy)
+                    if cell not in self.cells:
+                        return cell
+        return None
+
+    def _symbol(self, room_id: Optional[str], current_room: str) -> str:
+        """Return the map symbol for the room in a cell"""
+        if room_id is None:
+            return " "
+        if room_id == current_room:
+            return "@"
+        if self.game_state.has_visited(self.game_state.rooms[room_id].index):
+            return "#"
+        return "?"
+
+    def _connected(self, room_id: Optional[str], direction: str, other_id: Optional[str]) -> bool:
+        """Check whether two placed rooms share an exit in the given direction"""
+        if room_id is None or other_id is None:
+            return False
+        return self.game_state.rooms[room_id].exits.get(direction) == other_id
+
+    def render(self, current_room: str, radius: int = MAP_RADIUS) -> str:
+        """Render the explored area around the current room as ASCII art"""
+        key = (self.version, current_room)
+        if key == self._cache_key:
+            return self._cache
+
+        cx, cy = self.coords.get(current_room, (0, 0))
+        lines = []
+        for y in range(cy - radius, cy + radius + 1):
+            row = []
+            links = []
+            for x in range(cx - radius, cx + radius + 1):
+                room_id = self.cells.get((x, y))
+                east_id = self.cells.get((x + 1, y))
+                south_id = self.cells.get((x, y + 1))
+                row.append(f"[{self._symbol(room_id, current_room)}]" if room_id else "   ")
+                if x < cx + radius:
+                    east = self._connected(room_id, "east", east_id) or self._connected(east_id, "west", room_id)
+                    row.append("-" if east else " ")
+                south = self._connected(room_id, "south", south_id) or self._connected(south_id, "north", room_id)
+                links.append(" | " if south else "   ")
+                if x < cx + radius:
+                    links.append(" ")
+            lines.append("".join(row).rstrip())
+            if y < cy + radius:
+                lines.append("".join(links).rstrip())
+
+        # Drop the empty rows above and below the explored area
+        while lines and not lines[0]:
+            lines.pop(0)
+        while lines and not lines[-1]:
+            lines.pop()
+
+        # Drop the empty columns to the left of the explored area
+        indent = min((len(line) - len(line.lstrip()) for line in lines if line), default=0)
+        self._cache = "\n".join(line[indent:] for line in lines)
+        self._cache_key = key
+        return self._cache
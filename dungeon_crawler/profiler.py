@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Sample where a live session spends its time, on demand.
+
+While a capture runs, a background thread looks at the game thread's stack
+SAMPLE_INTERVAL apart and counts the stacks it finds inside a command. The
+capture is written as collapsed stacks, one "caller;callee count" line per
+stack, for flamegraph.pl, speedscope and the like, plus a summary of the
+functions most samples landed in. Nothing is installed when no capture is
+running.
+"""
+
+import os
+import sys
+import time
+import threading
+from collections import Counter
+from typing import Callable, Dict, Optional, Tuple
+
+SAMPLE_INTERVAL = 0.01  # Seconds between samples, 100 a second
+PROFILE_COMMANDS = 100  # Commands captured by :prof start without a count
+TOP_FUNCTIONS = 20  # Functions listed in the summary
+
+def frame_label(code) -> str:
+    """Name a stack frame, such as combat.py:CombatManager.process_round"""
+    return f"{os.path.basename(code.co_filename)}:{code.co_qualname}"
+
+class CommandProfiler:
+    """Samples the thread that runs commands while the next few of them run"""
+    def __init__(self, commands: int = PROFILE_COMMANDS, interval: float = SAMPLE_INTERVAL):
+        self.limit = commands
+        self.interval = interval
+        self.commands = 0  # Commands finished since the capture started
+        self.samples: Counter = Counter()  # Stack, outermost frame first -> samples
+        self.started = 0.0
+        self.elapsed = 0.0
+        self.running = False
+        self._thread_id = threading.get_ident()
+        self._entry = None  # Code of the wrapper a command runs under; stacks are cut there
+        self._busy = False
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def wrap(self, handle: Callable[[str], None], done: Callable[[], None]) -> Callable[[str], None]:
+        """Return a stand-in for handle that marks commands for sampling and calls done after the last"""
+        def profiled_command(command: str) -> None:
+            self._busy = True
+            try:
+                handle(command)
+            finally:
+                self._busy = False
+                self.commands += 1
+                if self.running and self.commands >= self.limit:
+                    done()
+        self._entry = profiled_command.__code__
+        return profiled_command
+
+    def start(self) -> None:
+        """Start sampling the calling thread"""
+        self._thread_id = threading.get_ident()
+        self.running = True
+        self.started = time.perf_counter()
+        self._sampler = threading.Thread(target=self._sample, name="profiler", daemon=True)
+        self._sampler.start()
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the sampler to finish"""
+        if not self.running:
+            return
+        self.running = False
+        self.elapsed = time.perf_counter() - self.started
+        self._stop.set()
+        self._sampler.join()
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            if not self._busy:
+                continue
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None and frame.f_code is not self._entry:
+                stack.append(frame_label(frame.f_code))
+                frame = frame.f_back
+            if frame is not None and stack:  # Otherwise the command finished under us
+                self.samples[tuple(reversed(stack))] += 1
+
+    def top_functions(self, limit: int = TOP_FUNCTIONS) -> Dict[str, Tuple[int, int]]:
+        """Return function -> (self samples, total samples) for the functions with the most total"""
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in self.samples.items():
+            own[stack[-1]] += count
+            for label in set(stack):  # Recursion counts once
+                total[label] += count
+        return {label: (own[label], count) for label, count in total.most_common(limit)}
+
+    def write(self, directory: str, name: str) -> Tuple[str, str]:
+        """Write the collapsed stacks and the summary, returning both paths"""
+        os.makedirs(directory, exist_ok=True)
+        collapsed = os.path.join(directory, f"{name}.collapsed")
+        summary = os.path.join(directory, f"{name}.txt")
+        with open(collapsed, 'w') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{';'.join(stack)} {count}\n")
+
+        sampled = sum(self.samples.values())
+        with open(summary, 'w') as f:
+            f.write(f"{self.commands} commands over {self.elapsed:.1f}s, "
+                    f"{sampled} samples every {self.interval * 1000:g}ms\n\n")
+            f.write(f"{'self':>6} {'total':>6}  function\n")
+            for label, (own, total) in self.top_functions().items():
+                f.write(f"{own:>6} {total:>6}  {label}\n")
+        return collapsed, summary
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Wandering monsters that move along room exits as players take turns.
+
+Only monsters within ACTIVE_RADIUS exits of a player are simulated each
+turn. A monster left behind remembers the turn it was last updated, and
+when a player comes near again it first catches up on the moves it missed,
+so the cost of a turn depends on how many players there are, not on how
+big the world is.
+"""
+
+import random
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Hashable, Iterable, List, Mapping, Optional, Set, Tuple
+
+ACTIVE_RADIUS = 2  # Exits away from a player within which monsters move
+MOVE_CHANCE = 0.5  # Chance an active monster takes an exit each turn
+CATCH_UP_LIMIT = 20  # Missed turns replayed on waking; after this many the position is as good as random
+
+@dataclass(slots=True)
+class Roamer:
+    """A wandering monster"""
+    id: int
+    enemy: Dict[str, Any]  # Its rooms.json enemy entry: type, name and description
+    room: str
+    turn: int  # Turn the monster has been simulated up to
+    home: str  # Room it was placed in; "<home>_<type>" marks it defeated, like a room enemy
+
+def take_roaming_enemies(rooms) -> List[Tuple[str, Dict[str, Any]]]:
+    """Take the roaming enemies written into rooms out of them, returning (room id, enemy) for each
+
+    Every session does this to its own rooms, since wandering monsters live
+    in a RoamingEnemies instance, whether the session owns it or shares it.
+    """
+    placed = []
+    for room_id, room in list(rooms.items()):
+        if room.enemy and room.enemy.get('roams'):
+            placed.append((room_id, room.enemy))
+            rooms.edit(room_id).enemy = None
+    return placed
+
+class RoamingEnemies:
+    """Positions of every wandering monster, updated only near players"""
+    def __init__(self, rooms: Mapping[str, Any], seed: Optional[int] = None):
+        self.rooms = rooms  # Room id -> anything with an exits dict
+        self.turn = 0
+        self.roamers: Dict[int, Roamer] = {}
+        self.by_room: Dict[str, Set[int]] = {}
+        self.players: Dict[Hashable, str] = {}
+        self.dirty: Set[str] = set()  # Rooms whose monsters changed on the last turn
+        self.next_id = 0
+        self.rng = random.Random(seed)
+        self._nearby: Dict[str, FrozenSet[str]] = {}
+
+    def spawn_from(self, placed: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        """Turn (room id, enemy) pairs from take_roaming_enemies into wandering monsters"""
+        for room_id, enemy in placed:
+            self.add(enemy, room_id)
+
+    def add(self, enemy: Dict[str, Any], room_id: str) -> Roamer:
+        roamer = Roamer(self.next_id, enemy, room_id, self.turn, room_id)
+        self.next_id += 1
+        self.roamers[roamer.id] = roamer
+        self.by_room.setdefault(room_id, set()).add(roamer.id)
+        self.dirty.add(room_id)
+        return roamer
+
+    def remove(self, roamer_id: int) -> Optional[Roamer]:
+        """Take a monster out of the world, e.g. once it is slain; return None if it was already gone"""
+        roamer = self.roamers.pop(roamer_id, None)
+        if roamer is None:
+            return None
+        self._leave(roamer.id, roamer.room)
+        self.dirty.add(roamer.room)
+        return roamer
+
+    def place_player(self, player: Hashable, room_id: str) -> None:
+        self.players[player] = room_id
+
+    def remove_player(self, player: Hashable) -> None:
+        self.players.pop(player, None)
+
+    def invalidate(self) -> None:
+        """Forget cached neighbourhoods, e.g. after exits changed"""
+        self._nearby.clear()
+
+    def nearby(self, room_id: str) -> FrozenSet[str]:
+        """Return the rooms within ACTIVE_RADIUS exits of a room"""
+        rooms = self._nearby.get(room_id)
+        if rooms is None:
+            found = {room_id}
+            frontier = deque([(room_id, 0)])
+            while frontier:
+                current, distance = frontier.popleft()
+                room = self.rooms.get(current)
+                if room is None or distance == ACTIVE_RADIUS:
+                    continue
+                for target in room.exits.values():
+                    if target not in found and target in self.rooms:
+                        found.add(target)
+                        frontier.append((target, distance + 1))
+            rooms = self._nearby[room_id] = frozenset(found)
+        return rooms
+
+    def active_rooms(self) -> Set[str]:
+        active: Set[str] = set()
+        for room_id in self.players.values():
+            active |= self.nearby(room_id)
+        return active
+
+    def tick(self) -> Set[str]:
+        """Advance one turn and return the rooms whose monsters changed"""
+        self.turn += 1
+        self.dirty = set()
+        active = [roamer_id for room_id in self.active_rooms() for roamer_id in self.by_room.get(room_id, ())]
+        for roamer_id in active:
+            self._advance(self.roamers[roamer_id])
+        return self.dirty
+
+    def in_room(self, room_id: str) -> List[Roamer]:
+        """Return the monsters in a room, bringing any that were dormant up to date first"""
+        for roamer_id in list(self.by_room.get(room_id, ())):
+            self._advance(self.roamers[roamer_id])
+        return [self.roamers[roamer_id] for roamer_id in self.by_room.get(room_id, ())]
+
+    def _advance(self, roamer: Roamer) -> None:
+        """Play the turns a monster hasn't been simulated for yet"""
+        missed = self.turn - roamer.turn
+        if missed <= 0:
+            return
+        start = room_id = roamer.room
+        for _ in range(min(missed, CATCH_UP_LIMIT)):
+            if self.rng.random() >= MOVE_CHANCE:
+                continue
+            room = self.rooms.get(room_id)
+            exits = [target for target in room.exits.values() if target in self.rooms] if room else None
+            if exits:
+                room_id = self.rng.choice(exits)
+        roamer.turn = self.turn
+        if room_id != start:
+            self._leave(roamer.id, start)
+            self.by_room.setdefault(room_id, set()).add(roamer.id)
+            roamer.room = room_id
+            self.dirty.add(start)
+            self.dirty.add(room_id)
+
+    def _leave(self, roamer_id: int, room_id: str) -> None:
+        occupants = self.by_room[room_id]
+        occupants.discard(roamer_id)
+        if not occupants:
+            del self.by_room[room_id]
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+
+import json
+import queue
+import sqlite3
+import threading
+import time
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence
+from colorama import Fore, Style
+from .items import ItemChanges
+
+# Leaderboard metrics and the order that ranks a run higher
+LEADERBOARD_METRICS = {
+    "steps_taken": "DESC",
+    "enemies_defeated": "DESC",
+    "items_used": "DESC",
+    "duration": "ASC"
+}
+
+# Metrics that only rank runs with a given outcome; a run quit after one step is not a fast run
+RANKED_OUTCOMES = {"duration": "cleared"}
+
+# Outcomes that end a session for good; its snapshot is deleted so it can't be resumed
+FINAL_OUTCOMES = ("died", "cleared")
+
+FLUSH_POLL = 0.1  # Seconds between checks that the writer is still alive while flushing
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    player_name TEXT NOT NULL,
+    player_class TEXT NOT NULL,
+    health INTEGER NOT NULL,
+    current_room TEXT NOT NULL,
+    steps_taken INTEGER NOT NULL,
+    enemies_defeated INTEGER NOT NULL,
+    items_used INTEGER NOT NULL,
+    played REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    state TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    player_name TEXT NOT NULL,
+    player_class TEXT NOT NULL,
+    steps_taken INTEGER NOT NULL,
+    enemies_defeated INTEGER NOT NULL,
+    items_used INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    outcome TEXT NOT NULL,
+    finished_at REAL NOT NULL
+);
+""" + "".join(
+    f"CREATE INDEX IF NOT EXISTS runs_{metric} ON runs ({metric});\n"
+    f"CREATE INDEX IF NOT EXISTS runs_class_{metric} ON runs (player_class, {metric});\n"
+    for metric in LEADERBOARD_METRICS if metric not in RANKED_OUTCOMES
+) + "".join(
+    f"CREATE INDEX IF NOT EXISTS runs_outcome_{metric} ON runs (outcome, {metric});\n"
+    f"CREATE INDEX IF NOT EXISTS runs_class_outcome_{metric} ON runs (player_class, outcome, {metric});\n"
+    for metric in RANKED_OUTCOMES
+)
+
+UPSERT_SESSION = """
+INSERT INTO sessions (session_id, player_name, player_class, health, current_room, steps_taken,
+                      enemies_defeated, items_used, played, updated_at, state)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (session_id) DO UPDATE SET
+    player_name = excluded.player_name, player_class = excluded.player_class,
+    health = excluded.health, current_room = excluded.current_room,
+    steps_taken = excluded.steps_taken, enemies_defeated = excluded.enemies_defeated,
+    items_used = excluded.items_used, played = excluded.played,
+    updated_at = excluded.updated_at, state = excluded.state
+"""
+
+INSERT_RUN = """
+INSERT INTO runs (session_id, player_name, player_class, steps_taken, enemies_defeated,
+                  items_used, duration, outcome, finished_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+DELETE_SESSION = "DELETE FROM sessions WHERE session_id = ?"
+
+def visited_ids(visited: bytearray, room_ids: Sequence[str]) -> List[str]:
+    """Return the ids of the rooms set in a visited bitset, given the room id for each bit"""
+    bits = np.unpackbits(np.frombuffer(visited, dtype=np.uint8), bitorder='little')
+    return [room_ids[index] for index in np.flatnonzero(bits)]
+
+def snapshot_row(snapshot: tuple, visited_cache: Optional[Dict[str, tuple]] = None) -> tuple:
+    """Serialize a snapshot queued by save_snapshot into a sessions row
+
+    visited_cache keeps each session's last visited bitset with its room ids,
+    so an unchanged bitset isn't converted again.
+    """
+    *columns, inventory, flags, defeated_enemies, item_changes, visited, room_ids = snapshot
+    cached = visited_cache.get(columns[0]) if visited_cache is not None else None
+    if cached is None or cached[0] is not visited or cached[1] is not room_ids:
+        # A queued bitset is never changed afterwards, so the same object means the same rooms
+        cached = (visited, room_ids, visited_ids(visited, room_ids))
+        if visited_cache is not None:
+            visited_cache[columns[0]] = cached
+    return (*columns, json.dumps({
+        "inventory": inventory,
+        "flags": flags,
+        "defeated_enemies": sorted(defeated_enemies),
+        "item_changes": item_changes.to_dict(),
+        # By id: a room's bit moves when rooms.json changes between runs
+        "visited": cached[2]
+    }))
+
+class SessionStore:
+    """SQLite store for session snapshots and finished runs, written by one background thread"""
+    def __init__(self, path: str, batch_size: int = 1000):
+        self.path = path
+        self.batch_size = batch_size
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._local = threading.local()
+
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        conn.close()
+
+        self._writer = threading.Thread(target=self._write_loop, name="session-store-writer", daemon=True)
+        self._writer.start()
+
+    def save_snapshot(self, session_id: str, state, room_ids: Sequence[str]) -> None:
+        """Queue the current state of a session; only the latest queued snapshot is written
+
+        room_ids gives the room id for each bit of state.visited, and must not
+        change once passed. The session keeps playing while the snapshot waits
+        in the queue, so its larger containers are marked shared (see
+        GameState.share) and copied by the session before it next changes
+        them. Serializing happens in the writer.
+        """
+        state.share()
+        self._queue.put(("snapshot", (
+            session_id, state.player_name, state.player_class, state.health, state.current_room,
+            state.steps_taken, state.enemies_defeated, state.items_used, state.time_played(), time.time(),
+            list(state.inventory), dict(state.flags), state.defeated_enemies, state.item_changes, state.visited,
+            room_ids
+        )))
+
+    def record_run(self, session_id: str, state, outcome: str) -> None:
+        """Queue a finished run for the leaderboards"""
+        now = time.time()
+        self._queue.put(("run", (
+            session_id, state.player_name, state.player_class, state.steps_taken,
+            state.enemies_defeated, state.items_used, state.time_played(), outcome, now
+        )))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued so far has been committed
+
+        Returns False if that didn't happen within timeout seconds, or the
+        writer thread is gone.
+        """
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not done.wait(FLUSH_POLL):
+            if not self._writer.is_alive():
+                return False
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+        return True
+
+    def close(self) -> None:
+        """Commit pending writes and stop the writer thread"""
+        if self._writer.is_alive():
+            self._queue.put(("stop", None))
+            self._writer.join()
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _write_loop(self) -> None:
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        visited_cache: Dict[str, tuple] = {}
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            snapshots: Dict[str, tuple] = {}
+            runs = []
+            ended = []
+            waiters = []
+            for kind, payload in batch:
+                if kind == "snapshot":
+                    snapshots[payload[0]] = payload
+                elif kind == "run":
+                    runs.append(payload)
+                    if payload[7] in FINAL_OUTCOMES:
+                        ended.append((payload[0],))
+                elif kind == "flush":
+                    waiters.append(payload)
+                else:
+                    running = False
+
+            # Anything going wrong here is reported and the batch dropped; the
+            # writer keeps going so flush() and close() don't wait forever
+            try:
+                rows = [snapshot_row(snapshot, visited_cache) for snapshot in snapshots.values()]
+                with conn:
+                    if rows:
+                        conn.executemany(UPSERT_SESSION, rows)
+                    if runs:
+                        conn.executemany(INSERT_RUN, runs)
+                    if ended:
+                        conn.executemany(DELETE_SESSION, ended)
+            except Exception as e:
+                print(Fore.RED + f"Error: could not save sessions: {e}" + Style.RESET_ALL)
+            for session_id, in ended:
+                visited_cache.pop(session_id, None)
+            for done in waiters:
+                done.set()
+        conn.close()
+
+    def _reader(self) -> sqlite3.Connection:
+        """Return this thread's read connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def load_snapshot(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return the last committed snapshot of a session, or None"""
+        row = self._reader().execute(
+            "SELECT * FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        snapshot = dict(row)
+        snapshot.update(json.loads(snapshot.pop("state")))
+        snapshot["defeated_enemies"] = set(snapshot["defeated_enemies"])
+        snapshot["item_changes"] = ItemChanges(snapshot.get("item_changes"))
+        return snapshot
+
+    def top(self, metric: str, limit: int = 10, player_class: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return the best finished runs by a metric, optionally for one class
+
+        Metrics in RANKED_OUTCOMES only rank runs that ended that way.
+        """
+        if metric not in LEADERBOARD_METRICS:
+            raise ValueError(f"Unknown leaderboard metric: {metric}")
+        order = LEADERBOARD_METRICS[metric]
+        conditions, params = [], []
+        if player_class is not None:
+            conditions.append("player_class = ?")
+            params.append(player_class)
+        if metric in RANKED_OUTCOMES:
+            conditions.append("outcome = ?")
+            params.append(RANKED_OUTCOMES[metric])
+        query = f"SELECT player_name, player_class, {metric}, outcome, finished_at FROM runs"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += f" ORDER BY {metric} {order} LIMIT ?"
+        return [dict(row) for row in self._reader().execute(query, (*params, limit))]
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Weighted random encounters from per-region spawn tables.
+
+Tables are authored as JSON:
+
+    {"crypt": {"chance": 0.3,
+               "entries": [{"type": "skeleton", "weight": 10},
+                           {"type": "boss", "weight": 1, "rarity": "legendary", "depth_scale": 0.5}]}}
+
+An entry's weight at a given depth is weight * RARITY[rarity] *
+(1 + depth_scale * depth), never below zero. Each (region, depth) pair is
+compiled once into an alias table, after which deciding whether a room
+spawns an enemy, and which one, takes a single random draw.
+"""
+
+import random
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+RARITY = {
+    "common": 1.0,
+    "uncommon": 0.4,
+    "rare": 0.1,
+    "legendary": 0.02
+}
+
+MAX_DEPTH = 100  # Deeper rooms use the tables for this depth
+
+class AliasSampler:
+    """Draws from a fixed discrete distribution in constant time (Vose's alias method)"""
+    __slots__ = ('outcomes', 'prob', 'alias', 'size')
+
+    def __init__(self, outcomes: Sequence[Any], weights: Sequence[float]):
+        if len(outcomes) != len(weights) or not outcomes:
+            raise ValueError("Need one weight per outcome and at least one outcome")
+        total = float(sum(weights))
+        if total <= 0 or min(weights) < 0:
+            raise ValueError("Weights must be non-negative and not all zero")
+
+        size = len(weights)
+        scaled = [weight * size / total for weight in weights]
+        prob = [1.0] * size
+        alias = list(range(size))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            prob[less] = scaled[less]
+            alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Whatever is left is 1.0 up to rounding error
+
+        self.outcomes = list(outcomes)
+        self.prob = prob
+        self.alias = [self.outcomes[i] for i in alias]
+        self.size = size
+
+    def sample(self, rng: random.Random) -> Any:
+        """Draw one outcome using a single random number"""
+        u = rng.random() * self.size
+        i = int(u)
+        return self.outcomes[i] if u - i < self.prob[i] else self.alias[i]
+
+    def sample_many(self, rng: random.Random, count: int) -> List[Any]:
+        """Draw count outcomes, for world generation and bots"""
+        draw, size, prob, outcomes, alias = rng.random, self.size, self.prob, self.outcomes, self.alias
+        samples = []
+        append = samples.append
+        for _ in range(count):
+            u = draw() * size
+            i = int(u)
+            append(outcomes[i] if u - i < prob[i] else alias[i])
+        return samples
+
+class SpawnTables:
+    """Compiled spawn tables for every region of a world"""
+    def __init__(self, tables: Dict[str, Dict[str, Any]], enemies: Dict[str, Dict[str, Any]]):
+        for region, table in tables.items():
+            if not isinstance(table, dict):
+                raise ValueError(f"Spawn table {region} must be an object")
+            chance = table.get('chance', 1.0)
+            if isinstance(chance, bool) or not isinstance(chance, (int, float)) or not 0 <= chance <= 1:
+                raise ValueError(f"Spawn table {region} needs a chance between 0 and 1, not {chance!r}")
+            if not isinstance(table.get('entries'), list):
+                raise ValueError(f"Spawn table {region} needs a list of entries")
+            for entry in table['entries']:
+                if not isinstance(entry, dict) or 'type' not in entry:
+                    raise ValueError(f"Entry without an enemy type in spawn table {region}")
+                if entry['type'] not in enemies:
+                    raise ValueError(f"Unknown enemy type in spawn table {region}: {entry['type']}")
+                if entry.get('rarity', 'common') not in RARITY:
+                    raise ValueError(f"Unknown rarity in spawn table {region}: {entry['rarity']}")
+        self.tables = tables
+        self._samplers: Dict[Tuple[str, int], AliasSampler] = {}
+
+    def weights(self, region: str, depth: int) -> Dict[Optional[str], float]:
+        """Return the chance of each enemy type, and of no encounter under None, at a depth"""
+        table = self.tables[region]
+        weights: Dict[Optional[str], float] = {}
+        for entry in table['entries']:
+            weight = (entry.get('weight', 1) * RARITY[entry.get('rarity', 'common')]
+                      * max(0.0, 1 + entry.get('depth_scale', 0.0) * depth))
+            weights[entry['type']] = weights.get(entry['type'], 0.0) + weight
+        total = sum(weights.values())
+        chance = table.get('chance', 1.0) if total > 0 else 0.0
+        odds = {enemy_type: chance * weight / total for enemy_type, weight in weights.items() if weight > 0}
+        odds[None] = 1.0 - chance
+        return odds
+
+    def sampler(self, region: str, depth: int = 0) -> Optional[AliasSampler]:
+        """Return the compiled sampler for a region at a depth, or None if the region has no table"""
+        sampler = self._samplers.get((region, depth))
+        if sampler is not None or region not in self.tables:
+            return sampler
+        key = (region, max(0, min(depth, MAX_DEPTH)))
+        sampler = self._samplers.get(key)
+        if sampler is None:
+            odds = self.weights(*key)
+            sampler = self._samplers[key] = AliasSampler(list(odds), list(odds.values()))
+        self._samplers[(region, depth)] = sampler
+        return sampler
+
+    def roll(self, region: str, depth: int, rng: random.Random) -> Optional[str]:
+        """Return the enemy type a room spawns on entry, or None for no encounter"""
+        sampler = self._samplers.get((region, depth)) or self.sampler(region, depth)
+        if sampler is None:
+            return None
+        return sampler.sample(rng)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+import unittest
+import sys
+import os
+import tempfile
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dungeon_crawler.event_log import EventLog, MOVE, COMBAT, DEATH, WON, FLED, DIED, name_hash
+
+try:
+    import numpy as np
+    from dungeon_crawler import analytics
+except ImportError:
+    np = None
+
+NAMES = {name_hash(name): name for name in ("entry", "lair", "vault", "warrior", "wizard", "goblin", "troll", "")}
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestEventAnalytics(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log_path = os.path.join(self.tmp.name, 'events.log')
+        self.state_path = os.path.join(self.tmp.name, 'analytics.npz')
+        self.events = EventLog(self.log_path)
+
+    def tearDown(self):
+        self.events.close()
+        self.tmp.cleanup()
+
+    def write(self, *events):
+        for event in events:
+            self.events.record(*event[:4], **event[4] if len(event) > 4 else {})
+        self.events.flush()
+
+    def run_once(self):
+        totals = analytics.EventAnalytics.load(self.state_path)
+        count = totals.ingest(self.log_path)
+        totals.save(self.state_path)
+        return totals, count
+
+    def test_counts_rooms_deaths_and_fights(self):
+        self.write((MOVE, "lair", "warrior"), (MOVE, "lair", "wizard"), (MOVE, "vault", "wizard"),
+                   (COMBAT, "lair", "warrior", "goblin", {"outcome": WON, "rounds": 2}),
+                   (COMBAT, "lair", "wizard", "goblin", {"outcome": DIED, "rounds": 4}),
+                   (DEATH, "lair", "wizard", "goblin"))
+        totals, count = self.run_once()
+        self.assertEqual(count, 6)
+        self.assertEqual(totals.top_rooms(totals.room_visits, NAMES), [("lair", 2), ("vault", 1)])
+        self.assertEqual(totals.top_rooms(totals.room_deaths, NAMES), [("lair", 1)])
+
+        goblin = totals.fight_summary(NAMES)[0]
+        self.assertEqual((goblin["enemy"], goblin["fights"], goblin["mean_rounds"]), ("goblin", 2, 3.0))
+        self.assertEqual((goblin["won"], goblin["died"]), (0.5, 0.5))
+
+        classes = [NAMES[key] for key in totals.classes.keys]
+        enemies = [NAMES[key] for key in totals.enemies.keys]
+        self.assertEqual(totals.kills[enemies.index("goblin"), classes.index("wizard")], 1)
+        self.assertEqual(totals.kills.sum(), 1)
+
+    def test_second_run_reads_only_new_records(self):
+        self.write((MOVE, "entry", "warrior"), (MOVE, "lair", "warrior"))
+        self.run_once()
+        self.write((MOVE, "lair", "warrior"), (COMBAT, "lair", "warrior", "troll", {"outcome": FLED, "rounds": 1}))
+        totals, count = self.run_once()
+        self.assertEqual(count, 2)
+        self.assertEqual(dict(totals.top_rooms(totals.room_visits, NAMES)), {"lair": 2, "entry": 1})
+        self.assertEqual(totals.fight_summary(NAMES)[0]["fled"], 1.0)
+
+        _, count = self.run_once()
+        self.assertEqual(count, 0)
+
+    def test_memory_does_not_grow_with_log(self):
+        self.write(*[(MOVE, room, "warrior") for room in ("entry", "lair", "vault")] * 1000)
+        totals, _ = self.run_once()
+        self.assertEqual(totals.room_visits.shape, (3,))
+        self.assertEqual(totals.room_visits.sum(), 3000)
+
+    def test_names_from_log_table(self):
+        self.write((MOVE, "crypt", "warrior"))
+        totals, _ = self.run_once()
+        names = analytics.log_names([self.log_path], {name_hash(""): "(none)"})
+        self.assertEqual(totals.top_rooms(totals.room_visits, names), [("crypt", 1)])
+        with self.assertRaises(ValueError):
+            analytics.log_names([self.log_path], {name_hash("crypt"): "tomb"})
+
+    def test_state_from_other_version_starts_over(self):
+        self.write((MOVE, "entry", "warrior"))
+        self.run_once()
+        with open(self.state_path, 'wb') as f:
+            np.savez(f, offsets=np.array("{}"))  # Written before states were versioned
+        totals = analytics.EventAnalytics.load(self.state_path)
+        self.assertEqual((len(totals.rooms), totals.offsets), (0, {}))
+        self.assertEqual(totals.ingest(self.log_path), 1)
+
+    def test_long_fights_share_last_bin(self):
+        self.write((COMBAT, "lair", "warrior", "troll", {"outcome": WON, "rounds": 500}))
+        totals, _ = self.run_once()
+        self.assertEqual(totals.fight_rounds[0, analytics.MAX_ROUNDS], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+
+import unittest
+from unittest.mock import patch
+import sys
+import os
+from concurrent.futures import Future
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dungeon_crawler.combat_odds import CombatOdds, odds_table, build_odds_table
+from dungeon_crawler.dungeon_crawler import DungeonCrawler
+from dungeon_crawler.world import DictWorldSource
+
+DEADLY = {"health": 1, "damage_range": [50, 50], "hit_chance": 1.0}
+HARMLESS = {"health": 1, "damage_range": [1, 1], "hit_chance": 0.0}
+BOSS = {"health": 50, "damage_range": [5, 10], "hit_chance": 0.5}
+
+class TestCombatOdds(unittest.TestCase):
+    def test_one_swing_against_deadly_enemy(self):
+        win, die, flee = CombatOdds("warrior", DEADLY, "attack").lookup(10, 1)
+        self.assertAlmostEqual(win, 0.6)
+        self.assertAlmostEqual(die, 0.4)
+        self.assertEqual(flee, 0.0)
+
+    def test_harmless_enemy_always_loses(self):
+        win, die, flee = CombatOdds("scoundrel", HARMLESS, "attack").lookup(1, 1)
+        self.assertAlmostEqual(win, 1.0)
+
+    def test_flee_policy(self):
+        win, die, flee = CombatOdds("scoundrel", DEADLY, "flee").lookup(10, 1)
+        self.assertAlmostEqual(flee, 0.7)
+        self.assertAlmostEqual(die, 0.3)
+
+    def test_probabilities_sum_to_one(self):
+        table = CombatOdds("wizard", BOSS, "survive")
+        for state in [(20, 50, 10, 0), (3, 17, 4, 2), (1, 1, 0, 3)]:
+            self.assertAlmostEqual(sum(table.lookup(*state)), 1.0)
+
+    def test_best_policy_beats_fixed_policy(self):
+        best = CombatOdds("wizard", BOSS, "win").lookup(12, 50, 10, 0)[0]
+        attack = CombatOdds("wizard", BOSS, "attack").lookup(12, 50, 10, 0)[0]
+        self.assertGreater(best, attack)
+
+    def test_fireball_finishes_weak_enemy(self):
+        table = CombatOdds("wizard", BOSS, "win")
+        self.assertEqual(table.recommend(5, 8, 10, 0), "cast fireball")
+        self.assertEqual(table.lookup(5, 8, 10, 0), (1.0, 0.0, 0.0))
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            CombatOdds("warrior", BOSS, "pray")
+
+    def test_fixed_policies_have_no_mana_axis(self):
+        table = CombatOdds("wizard", BOSS, "attack")
+        self.assertEqual(table.max_mana, 0)
+        self.assertEqual(table.lookup(12, 50, 10, 0), table.lookup(12, 50, 0, 0))
+
+    def test_tables_are_memoized(self):
+        self.assertIs(odds_table("warrior", BOSS), odds_table("warrior", dict(BOSS)))
+        self.assertIsNot(odds_table("warrior", BOSS), odds_table("warrior", BOSS, "attack"))
+
+    def test_built_in_background(self):
+        future = build_odds_table("scoundrel", BOSS, "survive")
+        self.assertIs(build_odds_table("scoundrel", BOSS, "survive"), future)
+        self.assertIs(future.result(), odds_table("scoundrel", BOSS, "survive"))
+        with self.assertRaises(ValueError):
+            build_odds_table("warrior", BOSS, "pray")
+
+class TestDebugOdds(unittest.TestCase):
+    def setUp(self):
+        rooms = {"entry": {"title": "Entry Hall", "description": "A crumbling stone hall", "exits": {},
+                           "dark": False, "items": [], "enemy": None, "npc": None}}
+        enemies = {"goblin": dict(HARMLESS, name="Goblin", description="A goblin", health=5)}
+        self.game = DungeonCrawler(world=DictWorldSource(rooms, enemies))
+        self.game.game_state.player_class, self.game.game_state.health = "warrior", 10
+
+    def printed(self, mock_print) -> str:
+        return "\n".join(str(call.args[0]) for call in mock_print.call_args_list if call.args)
+
+    @patch('builtins.print')
+    def test_odds_for_any_one_on_one_foe(self, mock_print):
+        # A random encounter in a room without an enemy of its own
+        self.game.game_state.debug_mode = True
+        enemy = self.game.create_enemy("goblin")
+        self.game.spawned_foe = "goblin"
+        self.game.combat_manager.start_combat(enemy)
+        for _, future in self.game.prepare_combat_odds():
+            future.result()
+        self.game.display_combat_odds()
+        self.assertIn("win: 100.0% / 0.0% / 0.0%", self.printed(mock_print))
+
+    @patch('builtins.print')
+    def test_odds_still_building(self, mock_print):
+        enemy = self.game.create_enemy("goblin")
+        self.game.combat_manager.start_combat(enemy)
+        with patch('dungeon_crawler.dungeon_crawler.build_odds_table', return_value=Future()):
+            self.game.handle_command(':d')
+        self.assertIn("attack: computing...", self.printed(mock_print))
+
+if __name__ == '__main__':
+    unittest.main()
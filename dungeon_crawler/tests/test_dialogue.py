@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import tempfile
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dungeon_crawler.dungeon_crawler import DungeonCrawler
+from dungeon_crawler.dialogue import compile_dialogues, write_graph, load_graph
+from dungeon_crawler.world import DictWorldSource
+
+HERMIT = {
+    "start": "greet",
+    "nodes": {
+        "greet": {"text": "Well met, traveller.", "choices": [
+            {"text": "Tell me about the king.", "next": "king", "requires": ["found_crown"]},
+            {"text": "Any advice?", "next": "advice", "sets": {"asked_hermit": True}},
+            {"text": "Goodbye."}
+        ]},
+        "king": {"text": "He sleeps below.", "choices": [{"text": "Goodbye."}]},
+        "advice": {"text": "Carry a torch.", "choices": []}
+    }
+}
+
+ROOMS = {
+    "entry": {"title": "Entry Hall", "description": "A crumbling stone hall", "exits": {},
+              "dark": False, "items": [], "enemy": None,
+              "npc": {"name": "Hermit", "description": "An old man", "dialogue": HERMIT}}
+}
+
+class TestDialogueGraph(unittest.TestCase):
+    def setUp(self):
+        self.graph = compile_dialogues({"hermit": HERMIT})
+
+    def test_compiled_ids(self):
+        self.assertEqual(len(self.graph), 3)
+        start = self.graph.start("hermit")
+        self.assertEqual(self.graph.text(start), "Well met, traveller.")
+        self.assertIsNone(self.graph.start("missing"))
+
+    def test_flag_conditions(self):
+        start = self.graph.start("hermit")
+        self.assertEqual([text for _, text in self.graph.choices(start, {})], ["Any advice?", "Goodbye."])
+        texts = [text for _, text in self.graph.choices(start, {"found_crown": True})]
+        self.assertEqual(texts[0], "Tell me about the king.")
+
+    def test_choose_applies_effects(self):
+        flags = {}
+        advice = self.graph.choices(self.graph.start("hermit"), flags)[0][0]
+        node = self.graph.choose(advice, flags)
+        self.assertEqual(self.graph.text(node), "Carry a torch.")
+        self.assertEqual(flags, {"asked_hermit": True})
+        goodbye = self.graph.choices(self.graph.start("hermit"), flags)[-1][0]
+        self.assertIsNone(self.graph.choose(goodbye, flags))
+
+    def test_repeated_text_stored_once(self):
+        self.assertEqual(self.graph.text_blob.count(b"Goodbye."), 1)
+
+    def test_unknown_target(self):
+        with self.assertRaises(ValueError):
+            compile_dialogues({"bad": {"start": "a", "nodes": {"a": {"text": "", "choices": [
+                {"text": "?", "next": "nowhere"}]}}}})
+
+    def test_file_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'hermit.dlg')
+            write_graph(self.graph, path)
+            loaded = load_graph(path)
+            start = loaded.start("hermit")
+            self.assertEqual(loaded.text(start), "Well met, traveller.")
+            self.assertEqual(loaded.choices(start, {"found_crown": True}),
+                             self.graph.choices(start, {"found_crown": True}))
+            loaded.text_blob.close()
+
+class TestTalkCommand(unittest.TestCase):
+    def setUp(self):
+        self.game = DungeonCrawler(world=DictWorldSource(ROOMS))
+
+    def test_conversation(self):
+        with patch('builtins.print') as mock_print:
+            self.game.handle_command('talk')
+            mock_print.assert_any_call('\x1b[34m\nHermit: Well met, traveller.\x1b[0m')
+            mock_print.assert_any_call('\x1b[34m1) Any advice?\x1b[0m')
+            self.game.handle_command('1')
+            mock_print.assert_any_call('\x1b[34m\nHermit: Carry a torch.\x1b[0m')
+        self.assertTrue(self.game.game_state.flags["asked_hermit"])
+        self.assertIsNone(self.game.dialogue_node)
+
+    def test_leave_conversation(self):
+        with patch('builtins.print'):
+            self.game.handle_command('talk')
+            self.game.handle_command('bye')
+            self.game.handle_command('n')
+        self.assertIsNone(self.game.dialogue_node)
+
+if __name__ == '__main__':
+    unittest.main()
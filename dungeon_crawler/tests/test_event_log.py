@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import tempfile
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dungeon_crawler.dungeon_crawler import DungeonCrawler
+from dungeon_crawler.combat import Enemy
+from dungeon_crawler.event_log import (EventLog, RECORD, MOVE, COMBAT, DEATH, WON, FLED, DIED, name_hash,
+                                       names_path, read_events, read_names)
+from dungeon_crawler.world import DictWorldSource
+
+ROOMS = {
+    "entry": {"title": "Entry Hall", "description": "A crumbling stone hall", "exits": {"north": "lair"},
+              "dark": False, "items": [], "enemy": None, "npc": None},
+    "lair": {"title": "Lair", "description": "Bones everywhere", "exits": {"south": "entry"},
+             "dark": False, "items": [], "enemy": {"type": "goblin", "name": "Goblin", "description": "Grr"}, "npc": None}
+}
+ENEMIES = {"goblin": {"name": "Goblin", "health": 5, "damage_range": [1, 4], "description": "Grr"},
+           "orc": {"name": "Orc", "health": 20, "damage_range": [3, 6], "description": "Ugh"}}
+
+class TestEventLog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'events.log')
+        self.events = EventLog(self.path, buffer_records=4)
+
+    def tearDown(self):
+        self.events.close()
+        self.tmp.cleanup()
+
+    def test_writes_whole_records_in_batches(self):
+        for _ in range(5):
+            self.events.record(MOVE, "entry", "warrior")
+        self.assertEqual(os.path.getsize(self.path), 5 * RECORD.size)  # Header and one batch
+        self.events.flush()
+        self.assertEqual(os.path.getsize(self.path), 6 * RECORD.size)
+
+    def test_name_table(self):
+        self.events.record(COMBAT, "lair", "wizard", "goblin", WON)
+        self.events.record(MOVE, "lair", "wizard")
+        self.events.flush()
+        self.assertEqual(read_names(self.path), {name_hash(name): name for name in ("lair", "wizard", "goblin", "")})
+        with open(names_path(self.path), 'a') as f:
+            f.write(f"{name_hash('lair'):016x} \"crypt\"\n")
+        with self.assertRaises(ValueError):
+            read_names(self.path)
+
+    def test_refuses_old_log(self):
+        old = os.path.join(self.tmp.name, 'old.log')
+        with open(old, 'wb') as f:
+            f.write(b'\x01' * RECORD.size * 2)
+        with self.assertRaises(ValueError):
+            EventLog(old)
+        with self.assertRaises(ValueError):
+            list(read_events(old))
+
+    def test_read_skips_partial_record(self):
+        self.events.record(COMBAT, "lair", "wizard", "goblin", WON, rounds=3, health=7)
+        self.events.flush()
+        with open(self.path, 'ab') as f:
+            f.write(b'\x00' * 5)
+        records = list(read_events(self.path))
+        self.assertEqual(len(records), 1)
+        _, room, player_class, enemy, rounds, health, kind, outcome = records[0]
+        self.assertEqual((room, player_class, enemy), (name_hash("lair"), name_hash("wizard"), name_hash("goblin")))
+        self.assertEqual((rounds, health, kind, outcome), (3, 7, COMBAT, WON))
+
+    def test_sessions_share_a_log(self):
+        other = EventLog(self.path)
+        self.events.record(MOVE, "entry", "warrior")
+        other.record(MOVE, "lair", "wizard")
+        other.close()
+        self.events.flush()
+        self.assertEqual([record[1] for record in read_events(self.path)], [name_hash("lair"), name_hash("entry")])
+
+    @patch('builtins.print')
+    def test_game_logs_moves_fights_and_deaths(self, mock_print):
+        game = DungeonCrawler(world=DictWorldSource(ROOMS, ENEMIES), events=self.events)
+        game.game_state.player_class = "warrior"
+        game.game_state.health = 10
+        game.handle_command('n')
+        self.assertTrue(game.combat_manager.in_combat)
+
+        with patch('random.random', return_value=0.0), patch('random.randint', return_value=6):
+            game.handle_command('attack')
+        self.events.flush()
+        kinds = [(record[6], record[7], record[4]) for record in read_events(self.path)]
+        self.assertEqual(kinds, [(MOVE, 0, 0), (COMBAT, WON, 1)])
+
+        game.combat_manager.enemy = Enemy("Goblin", 50, (20, 20), "Grr", hit_chance=1.0)
+        game.combat_manager.in_combat = True
+        game.combat_manager.player_health = 1
+        game.game_state.rooms.edit("lair").enemy = {"type": "goblin", "name": "Goblin", "description": "Grr"}
+        with patch('random.random', return_value=0.99):
+            game.handle_command('attack')
+        self.events.flush()
+        last = list(read_events(self.path))[-2:]
+        self.assertEqual([(record[6], record[7]) for record in last], [(COMBAT, DIED), (DEATH, 0)])
+        self.assertEqual(last[1][3], name_hash("goblin"))
+
+    @patch('builtins.print')
+    def test_pack_fights_log_each_type(self, mock_print):
+        pack = {"name": "Warband", "members": [{"type": "goblin", "count": 2}, {"type": "orc"}]}
+        rooms = dict(ROOMS, lair=dict(ROOMS["lair"], enemy=None, enemies=pack))
+        game = DungeonCrawler(world=DictWorldSource(rooms, ENEMIES), events=self.events, seed=1)
+        game.game_state.player_class = "warrior"
+        game.handle_command('n')
+        game.combat_manager.group.health[:] = [0, 0, 20]  # The goblins are down, the orc is not
+        with patch('random.random', return_value=0.1):
+            game.handle_command('flee')
+        self.events.flush()
+        fights = [(record[3], record[7]) for record in read_events(self.path) if record[6] == COMBAT]
+        self.assertEqual(fights, [(name_hash("goblin"), WON), (name_hash("orc"), FLED)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+import numpy as np
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dungeon_crawler.combat import EnemyGroup, CombatManager, FIREBALL_TARGETS
+from dungeon_crawler.dungeon_crawler import DungeonCrawler
+from dungeon_crawler.world import DictWorldSource
+from dungeon_crawler.hint import Simulation
+
+ENEMIES = {
+    "goblin": {"name": "Goblin", "health": 10, "damage_range": [1, 4],
+               "description": "A goblin", "hit_chance": 0.3},
+    "orc": {"name": "Orc", "health": 20, "damage_range": [3, 6],
+            "description": "An orc", "hit_chance": 0.4}
+}
+
+PACK = {"name": "Goblin Warband", "description": "Goblins led by an orc",
+        "members": [{"type": "goblin", "count": 3}, {"type": "orc"}]}
+
+ROOMS = {
+    "entry": {"title": "Entry Hall", "description": "A crumbling stone hall", "exits": {"north": "camp"},
+              "dark": False, "items": [], "enemy": None, "npc": None},
+    "camp": {"title": "Goblin Camp", "description": "Smoke and bones", "exits": {"south": "entry"},
+             "dark": False, "items": [], "enemy": None, "npc": None, "enemies": PACK}
+}
+
+def make_group(pack=PACK, seed=0) -> EnemyGroup:
+    return EnemyGroup.from_pack(pack, ENEMIES, np.random.default_rng(seed))
+
+class TestEnemyGroup(unittest.TestCase):
+    def test_from_pack_builds_columns(self):
+        group = make_group()
+        self.assertEqual(group.size, 4)
+        self.assertEqual(group.health.tolist(), [10, 10, 10, 20])
+        self.assertEqual(group.damage_high.tolist(), [4, 4, 4, 6])
+        self.assertEqual(group.label(3), "Orc 4")
+
+    def test_unknown_type(self):
+        with self.assertRaises(ValueError):
+            make_group({"name": "Ghosts", "members": [{"type": "ghost"}]})
+
+    def test_bad_count(self):
+        for count in (0, -2, 1.5):
+            with self.assertRaisesRegex(ValueError, "Goblin Camp"):
+                make_group({"name": "Goblin Camp", "members": [{"type": "goblin", "count": count}]})
+
+    def test_damage_and_next_alive(self):
+        group = make_group()
+        self.assertEqual(group.take_damage([0, 1], 10), [0, 1])
+        self.assertEqual(group.take_damage([0, 2], 4), [])
+        self.assertEqual(group.alive_count(), 2)
+        self.assertEqual(group.next_alive(3, 3), [3, 2])
+
+    def test_attack_only_counts_living_foes(self):
+        group = make_group()
+        group.hit_chance[:] = 1.0
+        group.health[:3] = 0
+        hits, damage = group.attack(shielded=False)
+        self.assertEqual(hits, 1)
+        self.assertTrue(3 <= damage <= 6)
+        _, damage = group.attack(shielded=True)
+        self.assertTrue(1 <= damage <= 3)
+
+    def test_copy_is_independent(self):
+        group = make_group()
+        clone = group.copy()
+        clone.take_damage([0], 10)
+        self.assertEqual(group.health[0], 10)
+
+class TestGroupRounds(unittest.TestCase):
+    def setUp(self):
+        self.combat = CombatManager(player_health=20, player_class="wizard")
+        self.group = make_group()
+        self.group.hit_chance[:] = 0.0
+        with patch('builtins.print'):
+            self.combat.start_group(self.group)
+
+    def test_targeting(self):
+        ended, message = self.combat.process_round("target 4")
+        self.assertFalse(ended)
+        self.assertEqual(self.combat.target, 3)
+        self.assertEqual(self.combat.rounds, 0)
+        self.combat.process_round("target 9")
+        self.assertEqual(self.combat.target, 3)
+
+    @patch('random.randint', return_value=10)
+    @patch('random.random', return_value=0.1)
+    def test_attack_hits_target_and_moves_on(self, mock_random, mock_randint):
+        ended, message = self.combat.process_round("attack")
+        self.assertFalse(ended)
+        self.assertEqual(self.group.health.tolist(), [0, 10, 10, 20])
+        self.assertEqual(self.combat.target, 1)
+        self.assertIn("Goblin Warband missed", message)
+
+    @patch('random.randint', return_value=10)
+    def test_fireball_hits_several(self, mock_randint):
+        self.combat.process_round("target 3")
+        self.combat.process_round("cast fireball")
+        self.assertEqual(self.group.health.tolist(), [0, 10, 0, 10])
+        self.assertEqual(FIREBALL_TARGETS, 3)
+
+    @patch('random.randint', return_value=20)
+    def test_clearing_the_pack_wins(self, mock_randint):
+        self.group.health[:] = [0, 0, 5, 5]
+        ended, message = self.combat.process_round("cast fireball")
+        self.assertTrue(ended)
+        self.assertFalse(self.combat.in_combat)
+        self.assertIn("You defeated Goblin Warband!", message)
+
+    def test_batched_attacks_and_shield(self):
+        self.group.hit_chance[:] = 1.0
+        self.combat.player_health = 1000
+        self.combat.shield_active, self.combat.shield_rounds = True, 2
+        with patch('random.random', return_value=0.9):
+            ended, message = self.combat.process_round("attack")
+        self.assertFalse(ended)
+        self.assertIn("4 enemies hit you", message)
+        self.assertEqual(self.combat.shield_rounds, 1)
+        self.assertTrue(991 <= self.combat.player_health <= 999)  # Halved: 0-2 per goblin, 1-3 for the orc
+
+class TestPackRooms(unittest.TestCase):
+    def setUp(self):
+        self.game = DungeonCrawler(world=DictWorldSource(ROOMS, ENEMIES), seed=1)
+        self.game.game_state.player_class = "wizard"
+
+    @patch('builtins.print')
+    def test_entering_starts_group_fight(self, mock_print):
+        self.game.handle_command('n')
+        combat = self.game.combat_manager
+        self.assertTrue(combat.in_combat)
+        self.assertEqual(combat.group.size, 4)
+        self.assertIsNone(combat.enemy)
+
+    @patch('builtins.print')
+    def test_winning_clears_the_pack(self, mock_print):
+        self.game.handle_command('n')
+        self.game.combat_manager.group.health[:] = [0, 0, 0, 1]
+        with patch('random.random', return_value=0.1), patch('random.randint', return_value=5):
+            self.game.handle_command('attack')
+        self.assertFalse(self.game.combat_manager.in_combat)
+        self.assertEqual(self.game.game_state.enemies_defeated, 4)
+        self.assertIn("camp_pack", self.game.game_state.defeated_enemies)
+        self.assertIsNone(self.game.game_state.rooms["camp"].enemies)
+
+    @patch('builtins.print')
+    def test_fled_pack_is_waiting(self, mock_print):
+        self.game.handle_command('n')
+        with patch('random.random', return_value=0.1):
+            self.game.handle_command('flee')
+        self.assertFalse(self.game.combat_manager.in_combat)
+        self.assertEqual(self.game.game_state.rooms["camp"].enemies, PACK)
+
+    @patch('builtins.print')
+    def test_simulation_forks_group_fights(self, mock_print):
+        self.game.handle_command('n')
+        sim = Simulation(self.game.game_state.fork(), self.game.combat_manager.fork(), self.game.enemies)
+        sim.combat.group.health[:] = 0
+        sim.combat.group.health[0] = 1
+        with patch('random.random', return_value=0.1), patch('random.randint', return_value=5):
+            sim.step("attack")
+        self.assertEqual(sim.kills, 4)
+        self.assertEqual(self.game.combat_manager.group.alive_count(), 4)
+        self.assertIsNotNone(self.game.game_state.rooms["camp"].enemies)
+
+if __name__ == '__main__':
+    unittest.main()
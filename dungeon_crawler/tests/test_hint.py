@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import time
+import random
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dungeon_crawler.dungeon_crawler import DungeonCrawler
+from dungeon_crawler.combat import Enemy
+from dungeon_crawler.hint import Simulation, suggest, HINT_BUDGET
+from dungeon_crawler.world import DictWorldSource
+
+ROOMS = {
+    "entry": {"title": "Entry Hall", "description": "A crumbling stone hall", "exits": {"north": "lair", "east": "vault"},
+              "dark": False, "items": ["Health Potion"], "enemy": None, "npc": None},
+    "lair": {"title": "Lair", "description": "Bones everywhere", "exits": {"south": "entry"},
+             "dark": False, "items": [], "enemy": {"type": "troll"}, "npc": None},
+    "vault": {"title": "Vault", "description": "Empty shelves", "exits": {"west": "entry"},
+              "dark": False, "items": ["Gold"], "enemy": None, "npc": None}
+}
+ENEMIES = {"troll": {"name": "Troll", "health": 40, "damage_range": [6, 10], "description": "Huge", "hit_chance": 0.9}}
+
+class TestForking(unittest.TestCase):
+    def setUp(self):
+        self.game = DungeonCrawler(world=DictWorldSource(ROOMS, ENEMIES))
+        self.game.game_state.player_class = "warrior"
+        self.game.game_state.health = 12
+
+    def test_fork_shares_rooms_until_changed(self):
+        state = self.game.game_state
+        fork = state.fork()
+        self.assertIs(fork.rooms["lair"], state.rooms["lair"])
+
+        fork.rooms.edit("lair").enemy = None
+        fork.rooms.edit("vault").items.add("Torch")
+        self.assertEqual(state.rooms["lair"].enemy, {"type": "troll"})
+        self.assertEqual(state.rooms["vault"].items, ["Gold"])
+        self.assertIs(fork.rooms["entry"], state.rooms["entry"])
+
+        # The original copies too, so it can't change rooms the fork still shares
+        state.rooms.edit("entry").items.clear()
+        self.assertEqual(fork.rooms["entry"].items, ["Health Potion"])
+
+    def test_fork_copies_progress_on_write(self):
+        state = self.game.game_state
+        fork = state.fork()
+        fork.mark_defeated("lair_troll")
+        fork.mark_visited(state.rooms["vault"].index)
+        fork.flags["met_hermit"] = True
+        self.assertNotIn("lair_troll", state.defeated_enemies)
+        self.assertFalse(state.has_visited(state.rooms["vault"].index))
+        self.assertEqual(state.flags, {})
+
+    def test_fork_of_fork(self):
+        first = self.game.game_state.fork()
+        first.rooms.edit("vault").items.clear()
+        second = first.fork()
+        self.assertEqual(second.rooms["vault"].items, [])
+        second.rooms.edit("vault").items.add("Gem")
+        self.assertEqual(first.rooms["vault"].items, [])
+        self.assertEqual(self.game.game_state.rooms["vault"].items, ["Gold"])
+        self.assertEqual(sorted(second.rooms), ["entry", "lair", "vault"])
+
+    def test_combat_fork_is_independent(self):
+        combat = self.game.combat_manager
+        combat.enemy, combat.in_combat = Enemy("Troll", 40, (6, 10), "Huge"), True
+        fork = combat.fork()
+        fork.enemy.take_damage(10)
+        fork.mana = 0
+        self.assertEqual(combat.enemy.health, 40)
+        self.assertEqual(combat.mana, 10)
+
+class TestHint(unittest.TestCase):
+    def setUp(self):
+        self.game = DungeonCrawler(world=DictWorldSource(ROOMS, ENEMIES))
+        self.game.game_state.player_class = "warrior"
+        self.game.game_state.health = 12
+        self.game.combat_manager.player_class = "warrior"
+
+    def simulation(self):
+        return Simulation(self.game.game_state.fork(), self.game.combat_manager.fork(), self.game.enemies)
+
+    def test_avoids_deadly_room(self):
+        hint = suggest(self.simulation(), rng=random.Random(1))
+        self.assertEqual(hint.action, "e")
+        self.assertGreater(hint.playouts, 100)
+
+    def test_flees_hopeless_fight(self):
+        self.game.combat_manager.enemy = self.game.create_enemy("troll")
+        self.game.combat_manager.in_combat = True
+        self.game.combat_manager.player_health = 12
+        hint = suggest(self.simulation(), rng=random.Random(1))
+        self.assertEqual(hint.action, "flee")
+
+    def test_stays_within_budget(self):
+        start = time.perf_counter()
+        suggest(self.simulation())
+        self.assertLess(time.perf_counter() - start, HINT_BUDGET * 3)
+
+    def test_search_leaves_game_untouched(self):
+        suggest(self.simulation(), rng=random.Random(2))
+        state = self.game.game_state
+        self.assertEqual(state.current_room, "entry")
+        self.assertEqual(state.rooms["lair"].enemy, {"type": "troll"})
+        self.assertEqual(state.defeated_enemies, set())
+        self.assertEqual(state.steps_taken, 0)
+
+    @patch('builtins.print')
+    def test_hint_command(self, mock_print):
+        self.game.handle_command('hint')
+        printed = " ".join(str(call.args[0]) for call in list(mock_print.call_args_list) if call.args)
+        self.assertIn("Hint: e", printed)
+
+if __name__ == '__main__':
+    unittest.main()
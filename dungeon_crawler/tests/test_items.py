@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dungeon_crawler.dungeon_crawler import DungeonCrawler
+from dungeon_crawler.items import ItemBag, ItemChanges, ItemIndex
+from dungeon_crawler.world_watcher import WorldUpdate
+from dungeon_crawler.world import DictWorldSource
+
+ROOMS = {
+    "entry": {"title": "Entry Hall", "description": "A crumbling stone hall", "exits": {"north": "vault"},
+              "dark": False, "items": ["Health Potion", "Gold", "Gold"], "enemy": None, "npc": None},
+    "vault": {"title": "Vault", "description": "Empty shelves", "exits": {"south": "entry"},
+              "dark": True, "items": ["Health Potion"], "enemy": None, "npc": None}
+}
+
+class TestItemBag(unittest.TestCase):
+    def test_counts_and_removal(self):
+        bag = ItemBag(["Gold", "Torch", "Gold"])
+        self.assertEqual(len(bag), 3)
+        self.assertEqual(bag.count("Gold"), 2)
+        self.assertTrue(bag.remove("Gold"))
+        self.assertFalse(bag.remove("Torch", 2))
+        self.assertEqual(bag, ["Torch", "Gold"])
+        self.assertTrue(bag.remove("Torch"))
+        self.assertNotIn("Torch", bag)
+        self.assertEqual(list(bag), ["Gold"])
+
+    def test_copy_is_independent(self):
+        bag = ItemBag(["Gold"])
+        copy = bag.copy()
+        copy.add("Gem")
+        self.assertEqual(bag, ["Gold"])
+
+class TestItemIndex(unittest.TestCase):
+    def test_rooms_and_sessions(self):
+        index = ItemIndex()
+        index.set_world_rooms({"entry": {"items": ["Gold", "Gold"]}, "vault": {"items": ["Gold"]}})
+        index.add_carried("s1", "Gold")
+        self.assertEqual(index.name("  GOLD "), "Gold")
+        self.assertEqual(index.room_count("Gold"), 2)
+        self.assertEqual(index.first_rooms("Gold", 5), [("entry", 2), ("vault", 1)])
+        self.assertEqual(index.first_rooms("Gold", 1), [("entry", 2)])
+        self.assertEqual(dict(index.carried_by("Gold")), {"s1": 1})
+
+        index.set_world_rooms({"entry": {"items": []}})
+        index.remove_carried("s1", "Gold")
+        self.assertEqual(index.room_count("Gold"), 0)
+        self.assertEqual(index.first_rooms("Gold", 5), [])
+        self.assertEqual(dict(index.carried_by("Gold")), {})
+
+    def test_session_changes_layer_over_placement(self):
+        index = ItemIndex()
+        index.set_world_rooms(ROOMS)
+        changes = ItemChanges()
+        changes.add("entry", "Health Potion", -1)
+        changes.add("vault", "Gold", 1)
+        self.assertEqual(index.first_rooms("Health Potion", 5, changes.for_item("Health Potion")), [("vault", 1)])
+        self.assertEqual(index.room_count("Health Potion", changes.for_item("Health Potion")), 1)
+        self.assertEqual(index.room_count("Gold", changes.for_item("Gold")), 2)
+        self.assertEqual(index.first_rooms("Gold", 5, changes.for_item("Gold")), [("entry", 2), ("vault", 1)])
+
+        changes.set_room("entry", index.starting_items("entry"), ItemBag(["Gold"]))
+        self.assertEqual(changes.in_room("entry"), {"Gold": -1, "Health Potion": -1})
+        changes.add("entry", "Gold", 1)
+        changes.add("entry", "Health Potion", 1)
+        self.assertEqual(changes.in_room("entry"), {})
+
+class TestItemCommands(unittest.TestCase):
+    def setUp(self):
+        self.world = DictWorldSource(ROOMS)
+        self.game = DungeonCrawler(world=self.world)
+        self.game.game_state.inventory = ["Torch"]
+        self.game.item_index.add_carried(self.game.session_id, "Torch")
+
+    def rooms_holding(self, item: str, game=None):
+        game = game or self.game
+        changes = game.game_state.item_changes.for_item(item)
+        rooms = dict(game.item_index.first_rooms(item, len(game.game_state.rooms), changes))
+        self.assertEqual(game.item_index.room_count(item, changes), len(rooms))
+        return rooms
+
+    def printed(self, mock_print) -> str:
+        return " ".join(str(call.args[0]) for call in list(mock_print.call_args_list) if call.args)
+
+    @patch('builtins.print')
+    def test_take_and_drop_keep_index_in_step(self, mock_print):
+        index, session = self.game.item_index, self.game.session_id
+        self.game.handle_command('take gold')
+        self.assertEqual(self.game.game_state.inventory, ["Torch", "Gold"])
+        self.assertEqual(self.game.game_state.rooms["entry"].items.count("Gold"), 1)
+        self.assertEqual(self.rooms_holding("Gold"), {"entry": 1})
+        self.assertEqual(dict(index.carried_by("Gold")), {session: 1})
+
+        self.game.handle_command('n')
+        self.game.handle_command('drop gold')
+        self.assertEqual(self.rooms_holding("Gold"), {"entry": 1, "vault": 1})
+        self.assertEqual(dict(index.carried_by("Gold")), {})
+        self.assertIn("Gold", self.game.game_state.rooms["vault"].items)
+
+    @patch('builtins.print')
+    def test_cannot_take_what_is_not_here(self, mock_print):
+        self.game.handle_command('take crown')
+        self.game.handle_command('drop gold')
+        self.assertEqual(self.game.game_state.inventory, ["Torch"])
+        self.assertIn("There is no crown here.", self.printed(mock_print))
+
+    @patch('builtins.print')
+    def test_dark_room_needs_torch(self, mock_print):
+        self.game.game_state.inventory = []
+        self.game.handle_command('n')
+        self.game.handle_command('take health potion')
+        self.assertEqual(self.game.game_state.inventory, [])
+        self.assertIn("too dark", self.printed(mock_print))
+
+    @patch('builtins.print')
+    def test_find(self, mock_print):
+        self.game.handle_command('find health potion')
+        printed = self.printed(mock_print)
+        self.assertIn("Entry Hall", printed)
+        self.assertIn("Vault", printed)
+
+        self.game.handle_command('find crown')
+        self.assertIn("No crown anywhere", self.printed(mock_print))
+
+    @patch('builtins.print')
+    def test_sessions_share_the_index(self, mock_print):
+        other = DungeonCrawler(world=self.world)
+        self.assertIs(other.item_index, self.game.item_index)
+        other.handle_command('take gold')
+        self.assertEqual(dict(self.game.item_index.carried_by("Gold")), {other.session_id: 1})
+        # The other session's rooms are its own
+        self.assertEqual(self.rooms_holding("Gold"), {"entry": 2})
+        self.assertEqual(self.rooms_holding("Gold", other), {"entry": 1})
+
+        self.game.handle_command('find gold')
+        self.assertIn("1 other adventurer carries one", self.printed(mock_print))
+
+    @patch('builtins.print')
+    def test_reloaded_rooms_are_reindexed(self, mock_print):
+        vault = dict(ROOMS["vault"], items=["Gem"])
+        self.game.apply_world_update(WorldUpdate(rooms={"vault": vault}, removed_rooms=[]))
+        self.assertEqual(self.rooms_holding("Health Potion"), {"entry": 1})
+        self.assertEqual(self.rooms_holding("Gem"), {"vault": 1})
+        self.assertEqual(self.game.item_index.name("gem"), "Gem")
+
+        self.game.apply_world_update(WorldUpdate(removed_rooms=["vault"]))
+        self.assertEqual(self.rooms_holding("Gem"), {})
+        self.assertEqual(self.rooms_holding("Health Potion"), {"entry": 1})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+import unittest
+import sys
+import os
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dungeon_crawler.dungeon_crawler import Room
+from dungeon_crawler.world import intern_strings
+from dungeon_crawler.combat import CombatManager
+from dungeon_crawler.memory_report import deep_sizeof, build_session
+
+ROOM_DATA = {
+    "title": "Cold Cell",
+    "description": "A damp stone cell",
+    "exits": {"north": "hall"},
+    "dark": False,
+    "items": ["Health Potion"],
+    "enemy": None,
+    "npc": None
+}
+
+class TestCompactObjects(unittest.TestCase):
+    def test_hot_objects_are_slotted(self):
+        room = Room.from_data("cell", ROOM_DATA, 0)
+        self.assertFalse(hasattr(room, '__dict__'))
+        self.assertFalse(hasattr(CombatManager(10, "warrior"), '__dict__'))
+        self.assertFalse(hasattr(build_session({"cell": ROOM_DATA}), '__dict__'))
+
+    def test_world_text_is_interned(self):
+        # Build the strings at runtime so the compiler can't share them for us
+        first = Room.from_data("cell", intern_strings({**ROOM_DATA, "title": "".join(["Cold ", "Cell"])}), 0)
+        second = Room.from_data("cell2", intern_strings({**ROOM_DATA, "title": "".join(["Cold", " Cell"])}), 1)
+        self.assertIs(first.title, second.title)
+        self.assertIs(next(iter(first.items)), next(iter(second.items)))
+
+    def test_rooms_keep_their_own_items(self):
+        first = Room.from_data("cell", ROOM_DATA, 0)
+        second = Room.from_data("cell", ROOM_DATA, 0)
+        first.items.remove("Health Potion")
+        self.assertEqual(second.items, ["Health Potion"])
+        self.assertEqual(ROOM_DATA["items"], ["Health Potion"])
+
+    def test_deep_sizeof_skips_seen_objects(self):
+        shared = "x" * 100
+        first, second = [shared], [shared]
+        seen = set()
+        self.assertGreater(deep_sizeof(first, seen), sys.getsizeof(shared))
+        self.assertEqual(deep_sizeof(second, seen), sys.getsizeof(second))
+
+if __name__ == '__main__':
+    unittest.main()
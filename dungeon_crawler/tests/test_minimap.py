@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+import unittest
+import sys
+import os
+import time
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dungeon_crawler.dungeon_crawler import GameState, Room
+from dungeon_crawler.minimap import Minimap, PLACEMENT_SEARCH_LIMIT
+
+def make_room(room_id: str, index: int, exits: dict) -> Room:
+    return Room(
+        id=room_id,
+        title=room_id.title(),
+        description="",
+        exits=exits,
+        dark=False,
+        items=[],
+        enemy=None,
+        npc=None,
+        index=index
+    )
+
+class TestVisitedBitset(unittest.TestCase):
+    def setUp(self):
+        self.state = GameState(
+            player_name="",
+            player_class="",
+            health=10,
+            inventory=[],
+            current_room="entry",
+            flags={},
+            steps_taken=0,
+            enemies_defeated=0,
+            items_used=0,
+            start_time=time.time()
+        )
+
+    def test_mark_visited(self):
+        self.assertFalse(self.state.has_visited(3))
+        self.assertTrue(self.state.mark_visited(3))
+        self.assertFalse(self.state.mark_visited(3))
+        self.assertTrue(self.state.has_visited(3))
+        self.assertFalse(self.state.has_visited(2))
+
+    def test_bitset_grows_compactly(self):
+        self.state.mark_visited(79999)
+        self.assertTrue(self.state.has_visited(79999))
+        self.assertEqual(len(self.state.visited), 10000)
+
+class TestMinimap(unittest.TestCase):
+    def setUp(self):
+        rooms = {
+            "entry": make_room("entry", 0, {"north": "corridor"}),
+            "corridor": make_room("corridor", 1, {"south": "entry", "east": "lair"}),
+            "lair": make_room("lair", 2, {"west": "corridor"})
+        }
+        self.state = GameState(
+            player_name="",
+            player_class="",
+            health=10,
+            inventory=[],
+            current_room="entry",
+            flags={},
+            steps_taken=0,
+            enemies_defeated=0,
+            items_used=0,
+            start_time=time.time(),
+            rooms=rooms
+        )
+        self.minimap = Minimap(self.state)
+        self.minimap.discover("entry")
+
+    def test_layout_follows_exits(self):
+        self.assertEqual(self.minimap.coords["entry"], (0, 0))
+        self.assertEqual(self.minimap.coords["corridor"], (0, -1))
+        self.assertNotIn("lair", self.minimap.coords)
+
+        self.minimap.discover("corridor")
+        self.assertEqual(self.minimap.coords["lair"], (1, -1))
+
+    def test_unplaced_room_reserves_no_neighbours(self):
+        # Crowd every cell the search around (0, 0) could reach
+        for x in range(-PLACEMENT_SEARCH_LIMIT, PLACEMENT_SEARCH_LIMIT + 1):
+            for y in range(-PLACEMENT_SEARCH_LIMIT, PLACEMENT_SEARCH_LIMIT + 1):
+                self.minimap.cells.setdefault((x, y), "entry")
+        self.state.rooms["cell"] = make_room("cell", 3, {"north": "lair"})
+        self.assertTrue(self.minimap.discover("cell"))
+        self.assertNotIn("cell", self.minimap.coords)
+        self.assertNotIn("lair", self.minimap.coords)
+
+    def test_render(self):
+        self.assertEqual(self.minimap.render("entry"), "[?]\n |\n[@]")
+
+        self.minimap.discover("corridor")
+        self.assertEqual(self.minimap.render("corridor"), "[@]-[?]\n |\n[#]")
+
+    def test_render_is_cached_until_discovery(self):
+        first = self.minimap.render("entry")
+        self.assertIs(self.minimap.render("entry"), first)
+        self.assertFalse(self.minimap.discover("entry"))
+        self.assertIs(self.minimap.render("entry"), first)
+
+        self.assertTrue(self.minimap.discover("corridor"))
+        self.assertIsNot(self.minimap.render("entry"), first)
+
+if __name__ == '__main__':
+    unittest.main()
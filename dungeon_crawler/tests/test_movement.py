@@ -1,16 +1,16 @@
 import unittest
 import os
 import sys
-from unittest.mock import patch, MagicMock
-import json
+from unittest.mock import patch
 
 # Add the parent directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from dungeon_crawler import DungeonCrawler, Room, GameState
+from dungeon_crawler import DungeonCrawler
+from dungeon_crawler.world import DictWorldSource
 
 class TestMovementSystem(unittest.TestCase):
     def setUp(self):
-        # Create a test rooms.json file
+        # Build an in-memory test world
         self.test_rooms = {
             "entry": {
                 "title": "Entry Hall",
@@ -32,19 +32,8 @@ class TestMovementSystem(unittest.TestCase):
             }
         }
         
-        # Create a temporary data directory if it doesn't exist
-        os.makedirs(os.path.join(os.path.dirname(__file__), '..', 'data'), exist_ok=True)
-        
-        # Write the test rooms to a file
-        with open(os.path.join(os.path.dirname(__file__), '..', 'data', 'rooms.json'), 'w') as f:
-            json.dump(self.test_rooms, f)
-        
         # Initialize the game
-        self.game = DungeonCrawler()
-
-    def tearDown(self):
-        # Clean up the test file
-        os.remove(os.path.join(os.path.dirname(__file__), '..', 'data', 'rooms.json'))
+        self.game = DungeonCrawler(world=DictWorldSource(self.test_rooms))
 
     def test_room_loading(self):
         """Test that rooms are loaded correctly"""
@@ -98,7 +87,7 @@ class TestMovementSystem(unittest.TestCase):
             
             # Debug: print all calls to print
             print("\nActual print calls:")
-            for call in mock_print.call_args_list:
+            for call in list(mock_print.call_args_list):
                 args, kwargs = call
                 print(f"print({args}, kwargs={kwargs})")
             
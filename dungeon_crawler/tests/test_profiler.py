@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import time
+import tempfile
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dungeon_crawler.dungeon_crawler import DungeonCrawler
+from dungeon_crawler.profiler import CommandProfiler
+from dungeon_crawler.world import DictWorldSource
+
+ROOMS = {
+    "entry": {"title": "Entry Hall", "description": "A crumbling stone hall", "exits": {"north": "vault"},
+              "dark": False, "items": [], "enemy": None, "npc": None},
+    "vault": {"title": "Vault", "description": "Empty shelves", "exits": {"south": "entry"},
+              "dark": False, "items": [], "enemy": None, "npc": None}
+}
+
+def slow_command(command: str) -> None:
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        pass
+
+class TestCommandProfiler(unittest.TestCase):
+    def test_samples_only_inside_commands(self):
+        done = []
+        profiler = CommandProfiler(commands=2, interval=0.001)
+        handle = profiler.wrap(slow_command, lambda: done.append(profiler.stop()))
+        profiler.start()
+        handle("n")
+        time.sleep(0.02)  # Idle between commands is not sampled
+        handle("s")
+        self.assertEqual(len(done), 1)
+        self.assertFalse(profiler.running)
+        self.assertTrue(profiler.samples)
+        for stack in profiler.samples:
+            self.assertEqual(stack[0], "test_profiler.py:slow_command")
+
+        with tempfile.TemporaryDirectory() as directory:
+            collapsed, summary = profiler.write(directory, "capture")
+            with open(collapsed) as f:
+                stack, count = f.readline().rsplit(" ", 1)
+            self.assertTrue(stack.startswith("test_profiler.py:slow_command"))
+            self.assertGreater(int(count), 0)
+            with open(summary) as f:
+                self.assertIn("2 commands", f.read())
+
+class TestProfileCommands(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.game = DungeonCrawler(world=DictWorldSource(ROOMS), profile_dir=self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    @patch('builtins.print')
+    def test_capture_next_commands(self, mock_print):
+        self.assertNotIn('handle_command', vars(self.game))
+        self.game.handle_command(':prof start 2')
+        self.assertIn('handle_command', vars(self.game))
+        self.game.handle_command('n')
+        self.game.handle_command('s')
+        self.assertIsNone(self.game.profiler)
+        self.assertNotIn('handle_command', vars(self.game))
+        self.assertEqual(self.game.game_state.current_room, "entry")
+        self.assertEqual(sorted(name.rsplit(".", 1)[1] for name in os.listdir(self.directory.name)),
+                         ["collapsed", "txt"])
+
+    @patch('builtins.print')
+    def test_stop_early_and_usage(self, mock_print):
+        self.game.handle_command(':prof stop')
+        self.game.handle_command(':prof start many')
+        self.assertIsNone(self.game.profiler)
+        self.game.handle_command(':prof start')
+        self.game.handle_command(':prof stop')
+        self.assertIsNone(self.game.profiler)
+        self.assertNotIn('handle_command', vars(self.game))
+        self.assertEqual(len(os.listdir(self.directory.name)), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dungeon_crawler.dungeon_crawler import DungeonCrawler
+from dungeon_crawler.roaming import RoamingEnemies, CATCH_UP_LIMIT
+from dungeon_crawler.benchmarks.roaming import grid_world
+from dungeon_crawler.world import DictWorldSource
+
+GOBLIN = {"type": "goblin", "name": "Goblin", "description": "Grr", "roams": True}
+ROOMS = {
+    "entry": {"title": "Entry Hall", "description": "A crumbling stone hall", "exits": {"north": "hall"},
+              "dark": False, "items": [], "enemy": None, "npc": None},
+    "hall": {"title": "Hall", "description": "Echoing", "exits": {"south": "entry"},
+             "dark": False, "items": [], "enemy": GOBLIN, "npc": None}
+}
+ENEMIES = {"goblin": {"name": "Goblin", "health": 5, "damage_range": [1, 4], "description": "Grr"}}
+
+class TestRoamingEnemies(unittest.TestCase):
+    def setUp(self):
+        self.rooms = grid_world(20)
+        self.roaming = RoamingEnemies(self.rooms, seed=1)
+
+    def test_only_monsters_near_players_move(self):
+        near = self.roaming.add(GOBLIN, "1,0")
+        far = self.roaming.add(GOBLIN, "15,15")
+        self.roaming.place_player("p1", "0,0")
+        for _ in range(10):
+            self.roaming.tick()
+        self.assertEqual(far.turn, 0)
+        self.assertEqual(far.room, "15,15")
+        self.assertEqual(near.turn, 10)
+
+    def test_dormant_monster_catches_up(self):
+        roamer = self.roaming.add(GOBLIN, "15,15")
+        self.roaming.place_player("p1", "0,0")
+        for _ in range(100):
+            self.roaming.tick()
+        self.roaming.place_player("p1", "15,14")
+        with patch.object(self.roaming.rng, 'random', wraps=self.roaming.rng.random) as rolls:
+            self.roaming.tick()
+        self.assertEqual(roamer.turn, 101)
+        self.assertEqual(rolls.call_count, CATCH_UP_LIMIT)
+
+    def test_moves_follow_exits_and_mark_rooms_dirty(self):
+        roamer = self.roaming.add(GOBLIN, "5,5")
+        self.roaming.place_player("p1", "5,5")
+        for _ in range(50):
+            before = roamer.room
+            dirty = self.roaming.tick()
+            if roamer.room != before:
+                self.assertIn(roamer.room, self.rooms[before].exits.values())
+                self.assertEqual(dirty, {before, roamer.room})
+        self.assertEqual(sum(len(ids) for ids in self.roaming.by_room.values()), 1)
+
+    def test_remove(self):
+        roamer = self.roaming.add(GOBLIN, "3,3")
+        self.assertIs(self.roaming.remove(roamer.id), roamer)
+        self.assertEqual(self.roaming.in_room("3,3"), [])
+        self.assertEqual(self.roaming.by_room, {})
+        self.assertIsNone(self.roaming.remove(roamer.id))
+
+class TestRoamingEncounters(unittest.TestCase):
+    @patch('builtins.print')
+    def setUp(self, mock_print):
+        self.game = DungeonCrawler(world=DictWorldSource(ROOMS, ENEMIES))
+        self.game.game_state.player_class = "warrior"
+        self.game.game_state.health = 10
+
+    def test_roaming_enemies_leave_their_rooms(self):
+        self.assertIsNone(self.game.game_state.rooms["hall"].enemy)
+        self.assertEqual(len(self.game.roamers.roamers), 1)
+
+    @patch('builtins.print')
+    def test_encounter_uses_combat_path(self, mock_print):
+        with patch('dungeon_crawler.roaming.MOVE_CHANCE', 0.0), \
+             patch.object(self.game, 'create_enemy', wraps=self.game.create_enemy) as create_enemy:
+            self.game.handle_command('n')
+        create_enemy.assert_called_once_with("goblin")
+        self.assertTrue(self.game.combat_manager.in_combat)
+
+        with patch('random.random', return_value=0.0), patch('random.randint', return_value=6):
+            self.game.handle_command('attack')
+        self.assertFalse(self.game.combat_manager.in_combat)
+        self.assertEqual(self.game.roamers.roamers, {})
+        self.assertEqual(self.game.game_state.enemies_defeated, 1)
+
+    @patch('builtins.print')
+    def test_fled_monster_keeps_wandering(self, mock_print):
+        with patch('dungeon_crawler.roaming.MOVE_CHANCE', 0.0):
+            self.game.handle_command('n')
+        with patch('random.random', return_value=0.0):
+            self.game.handle_command('flee')
+        self.assertFalse(self.game.combat_manager.in_combat)
+        self.assertEqual(len(self.game.roamers.roamers), 1)
+        self.assertIsNone(self.game.roaming_foe)
+
+    @patch('builtins.print')
+    def test_session_sharing_roamers(self, mock_print):
+        other = DungeonCrawler(world=DictWorldSource(ROOMS, ENEMIES), roamers=self.game.roamers)
+        other.game_state.player_class, other.game_state.health = "warrior", 10
+        self.assertIsNone(other.game_state.rooms["hall"].enemy)
+        self.assertEqual(len(self.game.roamers.roamers), 1)
+        with patch('dungeon_crawler.roaming.MOVE_CHANCE', 0.0):
+            other.handle_command('n')
+        self.assertIsNotNone(other.roaming_foe)
+        with patch('random.random', return_value=0.0), patch('random.randint', return_value=6):
+            other.handle_command('attack')
+        self.assertEqual(self.game.roamers.roamers, {})
+        self.assertTrue(other.dungeon_cleared())
+
+    @patch('builtins.print')
+    def test_foe_slain_by_another_session(self, mock_print):
+        other = DungeonCrawler(world=DictWorldSource(ROOMS, ENEMIES), roamers=self.game.roamers)
+        with patch('dungeon_crawler.roaming.MOVE_CHANCE', 0.0):
+            self.game.handle_command('n')
+        other.roamers.remove(self.game.roaming_foe)
+        self.game.handle_command('attack')
+        self.assertFalse(self.game.combat_manager.in_combat)
+        self.assertIsNone(self.game.roaming_foe)
+        self.assertEqual(self.game.game_state.enemies_defeated, 0)
+        self.assertIn("someone else got to it first", mock_print.call_args[0][0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import time
+import tempfile
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dungeon_crawler.dungeon_crawler import DungeonCrawler, GameState
+from dungeon_crawler.session_store import SessionStore
+from dungeon_crawler.world import DictWorldSource
+
+ROOMS = {
+    "entry": {"title": "Entry Hall", "description": "A crumbling stone hall", "exits": {"north": "lair"},
+              "dark": False, "items": ["Rope"], "enemy": None, "npc": None},
+    "lair": {"title": "Lair", "description": "Bones everywhere", "exits": {"south": "entry"},
+             "dark": False, "items": [], "enemy": {"type": "goblin", "name": "Goblin", "description": "Grr"},
+             "npc": None}
+}
+ENEMIES = {"goblin": {"name": "Goblin", "health": 10, "damage_range": [1, 4], "description": "A goblin"}}
+ROOM_IDS = ("entry", "lair", "vault")  # Room id by visited bit
+
+def make_state(name: str, player_class: str, steps: int, defeated: int = 0) -> GameState:
+    state = GameState(
+        player_name=name,
+        player_class=player_class,
+        health=10,
+        inventory=["Torch"],
+        current_room="entry",
+        flags={"met_hermit": True},
+        steps_taken=steps,
+        enemies_defeated=defeated,
+        items_used=0,
+        start_time=time.time()
+    )
+    state.mark_visited(2)
+    return state
+
+class TestSessionStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = SessionStore(os.path.join(self.tmp.name, 'sessions.db'))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_wal_mode(self):
+        mode = self.store._reader().execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+
+    def test_latest_snapshot_wins(self):
+        state = make_state("Aelwyn", "warrior", 1)
+        self.store.save_snapshot("s1", state, ROOM_IDS)
+        state.steps_taken = 2
+        state.mark_defeated("lair_goblin")
+        state.edit_item_changes().add("entry", "Rope", -1)
+        self.store.save_snapshot("s1", state, ROOM_IDS)
+        state.mark_defeated("cave_orc")  # After the snapshot was queued
+        state.inventory.append("Rope")
+        self.assertTrue(self.store.flush())
+
+        snapshot = self.store.load_snapshot("s1")
+        self.assertEqual(snapshot["steps_taken"], 2)
+        self.assertEqual(snapshot["inventory"], ["Torch"])
+        self.assertEqual(snapshot["flags"], {"met_hermit": True})
+        self.assertEqual(snapshot["defeated_enemies"], {"lair_goblin"})
+        self.assertEqual(snapshot["visited"], ["vault"])
+        self.assertEqual(snapshot["item_changes"].to_dict(), {"Rope": {"entry": -1}})
+        self.assertIsNone(self.store.load_snapshot("missing"))
+
+    def test_writer_survives_bad_snapshot(self):
+        state = make_state("Aelwyn", "warrior", 1)
+        state.flags["charm"] = object()  # Can't be serialized
+        with patch('builtins.print') as mock_print:
+            self.store.save_snapshot("s1", state, ROOM_IDS)
+            self.assertTrue(self.store.flush(timeout=5))
+        self.assertIn("could not save sessions", mock_print.call_args[0][0])
+        del state.flags["charm"]
+        self.store.save_snapshot("s1", state, ROOM_IDS)
+        self.assertTrue(self.store.flush(timeout=5))
+        self.assertIsNotNone(self.store.load_snapshot("s1"))
+
+    def test_final_outcome_ends_session(self):
+        state = make_state("Aelwyn", "warrior", 1)
+        for session_id, outcome in (("s1", "quit"), ("s2", "died")):
+            self.store.save_snapshot(session_id, state, ROOM_IDS)
+            self.store.record_run(session_id, state, outcome)
+        self.store.flush()
+        self.assertIsNotNone(self.store.load_snapshot("s1"))
+        self.assertIsNone(self.store.load_snapshot("s2"))
+
+    def test_leaderboard(self):
+        for i, (name, player_class) in enumerate([("A", "warrior"), ("B", "wizard"), ("C", "warrior")]):
+            self.store.record_run(name, make_state(name, player_class, steps=i * 10, defeated=3 - i), "died")
+        self.store.flush()
+
+        self.assertEqual([run["player_name"] for run in self.store.top("steps_taken")], ["C", "B", "A"])
+        self.assertEqual([run["player_name"] for run in self.store.top("enemies_defeated", limit=2)], ["A", "B"])
+        warriors = self.store.top("steps_taken", player_class="warrior")
+        self.assertEqual([run["player_name"] for run in warriors], ["C", "A"])
+        with self.assertRaises(ValueError):
+            self.store.top("health")
+
+    def test_duration_ranks_cleared_runs_only(self):
+        for name, outcome in (("Quitter", "quit"), ("Fallen", "died"), ("Hero", "cleared")):
+            self.store.record_run(name, make_state(name, "warrior", steps=1), outcome)
+        self.store.flush()
+        self.assertEqual([run["player_name"] for run in self.store.top("duration")], ["Hero"])
+        self.assertEqual([run["player_name"] for run in self.store.top("duration", player_class="wizard")], [])
+
+    def test_leaderboard_uses_index(self):
+        plan = self.store._reader().execute(
+            "EXPLAIN QUERY PLAN SELECT player_name FROM runs WHERE player_class = ? "
+            "ORDER BY steps_taken DESC LIMIT 10", ("wizard",)
+        ).fetchall()
+        self.assertIn("runs_class_steps_taken", " ".join(str(tuple(row)) for row in plan))
+        plan = self.store._reader().execute(
+            "EXPLAIN QUERY PLAN SELECT player_name FROM runs WHERE outcome = ? "
+            "ORDER BY duration ASC LIMIT 10", ("cleared",)
+        ).fetchall()
+        self.assertIn("runs_outcome_duration", " ".join(str(tuple(row)) for row in plan))
+
+class TestResume(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = SessionStore(os.path.join(self.tmp.name, 'sessions.db'))
+        self.world = DictWorldSource(ROOMS, ENEMIES)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    @patch('builtins.print')
+    def test_resume_picks_up_where_left(self, mock_print):
+        game = DungeonCrawler(world=self.world, store=self.store, session_id="s1")
+        game.game_state.player_name, game.game_state.player_class = "Aelwyn", "warrior"
+        game.handle_command('take rope')
+        game.game_state.enemies_defeated = 1
+        game.game_state.mark_defeated("lair_goblin")
+        game.game_state.rooms.edit("lair").enemy = None
+        game.handle_command('n')
+        game.save_progress()
+        self.store.flush()
+
+        resumed = DungeonCrawler(world=self.world, store=self.store, session_id="s1")
+        resumed.resume(self.store.load_snapshot("s1"))
+        state = resumed.game_state
+        self.assertEqual((state.player_name, state.current_room, state.enemies_defeated), ("Aelwyn", "lair", 1))
+        self.assertIn("Rope", state.inventory)
+        self.assertNotIn("Rope", state.rooms["entry"].items)
+        self.assertIsNone(state.rooms["lair"].enemy)
+        self.assertTrue(state.has_visited(state.rooms["entry"].index))
+        self.assertEqual(resumed.combat_manager.player_class, "warrior")
+        self.assertEqual(resumed.item_index.room_count("Rope", state.item_changes.for_item("Rope")), 0)
+
+    @patch('builtins.print')
+    def test_visited_rooms_survive_reordered_world(self, mock_print):
+        game = DungeonCrawler(world=self.world, store=self.store, session_id="s1")
+        game.handle_command('n')
+        game.handle_command('s')
+        game.save_progress()
+        self.store.flush()
+
+        # rooms.json gained a room ahead of the others, moving every room's index
+        annex = dict(ROOMS["entry"], title="Annex", exits={})
+        world = DictWorldSource({"annex": annex, "entry": ROOMS["entry"], "lair": ROOMS["lair"]}, ENEMIES)
+        resumed = DungeonCrawler(world=world, store=self.store, session_id="s1")
+        resumed.resume(self.store.load_snapshot("s1"))
+        rooms = resumed.game_state.rooms
+        self.assertEqual([room_id for room_id in rooms if resumed.game_state.has_visited(rooms[room_id].index)],
+                         ["entry", "lair"])
+
+    @patch('builtins.print')
+    def test_slain_roamers_stay_slain(self, mock_print):
+        roaming = dict(ROOMS["lair"]["enemy"], roams=True)
+        world = DictWorldSource(dict(ROOMS, lair=dict(ROOMS["lair"], enemy=roaming)), ENEMIES)
+        game = DungeonCrawler(world=world, store=self.store, session_id="s1")
+        game.game_state.player_name, game.game_state.player_class = "Aelwyn", "warrior"
+        self.assertEqual(len(game.roamers.roamers), 1)
+        game.game_state.mark_defeated("lair_goblin")
+        game.save_progress()
+        self.store.flush()
+
+        resumed = DungeonCrawler(world=world, store=self.store, session_id="s1")
+        resumed.resume(self.store.load_snapshot("s1"))
+        self.assertEqual(resumed.roamers.roamers, {})
+
+    @patch('builtins.print')
+    def test_quit_and_resume_records_one_run(self, mock_print):
+        clock = [time.time()]
+        with patch('time.time', side_effect=lambda: clock[0]):
+            game = DungeonCrawler(world=self.world, store=self.store, session_id="s1")
+            game.game_state.player_name, game.game_state.player_class = "Aelwyn", "warrior"
+            for _ in range(2):
+                clock[0] += 60  # Play a minute, quit
+                game.running = False
+                game.main_loop()
+                self.store.flush()
+                self.assertEqual(self.store.top("steps_taken"), [])
+
+                clock[0] += 3600  # Come back an hour later
+                game = DungeonCrawler(world=self.world, store=self.store, session_id="s1")
+                game.resume(self.store.load_snapshot("s1"))
+            clock[0] += 60
+            game.running = False
+            game.game_state.rooms.edit("lair").enemy = None
+            game.main_loop()
+        self.store.flush()
+        runs = self.store.top("duration")
+        self.assertEqual([run["outcome"] for run in runs], ["cleared"])
+        self.assertEqual(runs[0]["duration"], 180)
+
+    @patch('builtins.print')
+    def test_outcome(self, mock_print):
+        game = DungeonCrawler(world=self.world, store=self.store)
+        game.running = False
+        game.main_loop()
+        self.assertEqual(game.outcome, "quit")
+        game.game_state.rooms.edit("lair").enemy = None
+        game.main_loop()
+        self.assertEqual(game.outcome, "cleared")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import math
+import random
+from collections import Counter
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dungeon_crawler.dungeon_crawler import DungeonCrawler
+from dungeon_crawler.spawn import AliasSampler, SpawnTables, RARITY
+from dungeon_crawler.world import DictWorldSource
+
+ENEMIES = {name: {"name": name.capitalize(), "health": 5, "damage_range": [1, 2], "description": "Grr"}
+           for name in ("goblin", "skeleton", "orc", "troll", "boss")}
+SPAWNS = {
+    "crypt": {"chance": 0.4, "entries": [
+        {"type": "goblin", "weight": 10, "depth_scale": -0.1},
+        {"type": "skeleton", "weight": 6},
+        {"type": "orc", "weight": 4, "rarity": "uncommon"},
+        {"type": "troll", "weight": 3, "rarity": "rare", "depth_scale": 0.5},
+        {"type": "boss", "weight": 1, "rarity": "legendary", "depth_scale": 1.0}
+    ]},
+    "lair": {"entries": [{"type": "troll", "weight": 1}]}
+}
+ROOMS = {
+    "entry": {"title": "Entry Hall", "description": "A crumbling stone hall", "exits": {"north": "den"},
+              "dark": False, "items": [], "enemy": None, "npc": None},
+    "den": {"title": "Den", "description": "It smells", "exits": {"south": "entry"},
+            "dark": False, "items": [], "enemy": None, "npc": None, "region": "lair", "depth": 3}
+}
+
+def chi_square_critical(df: int, z: float = 3.09) -> float:
+    """Wilson-Hilferty approximation of the chi-square quantile for a normal z (3.09 is p = 0.001)"""
+    k = 2 / (9 * df)
+    return df * (1 - k + z * math.sqrt(k)) ** 3
+
+class TestAliasSampler(unittest.TestCase):
+    def test_tables_encode_weights_exactly(self):
+        weights = [5, 1, 0, 3, 11]
+        sampler = AliasSampler(list("abcde"), weights)
+        mass = Counter()
+        for i in range(sampler.size):
+            mass[sampler.outcomes[i]] += sampler.prob[i] / sampler.size
+            mass[sampler.alias[i]] += (1 - sampler.prob[i]) / sampler.size
+        for outcome, weight in zip("abcde", weights):
+            self.assertAlmostEqual(mass[outcome], weight / sum(weights))
+
+    def test_sampled_distribution_matches(self):
+        tables = SpawnTables(SPAWNS, ENEMIES)
+        odds = tables.weights("crypt", 4)
+        samples = Counter(tables.sampler("crypt", 4).sample_many(random.Random(7), 200000))
+        chi_square = sum((samples[outcome] - 200000 * p) ** 2 / (200000 * p) for outcome, p in odds.items())
+        self.assertLess(chi_square, chi_square_critical(len(odds) - 1))
+        self.assertEqual(set(samples) - set(odds), set())
+
+    def test_rejects_bad_weights(self):
+        with self.assertRaises(ValueError):
+            AliasSampler(["a", "b"], [0, 0])
+        with self.assertRaises(ValueError):
+            AliasSampler(["a"], [1, 2])
+
+class TestSpawnTables(unittest.TestCase):
+    def setUp(self):
+        self.tables = SpawnTables(SPAWNS, ENEMIES)
+
+    def test_chance_rarity_and_depth(self):
+        shallow = self.tables.weights("crypt", 0)
+        self.assertAlmostEqual(shallow[None], 0.6)
+        self.assertAlmostEqual(sum(shallow.values()), 1.0)
+        self.assertAlmostEqual(shallow["boss"] / shallow["skeleton"], RARITY["legendary"] / 6)
+
+        deep = self.tables.weights("crypt", 10)
+        self.assertNotIn("goblin", deep)
+        self.assertGreater(deep["boss"], shallow["boss"])
+
+    def test_samplers_compiled_once(self):
+        self.assertIs(self.tables.sampler("crypt", 3), self.tables.sampler("crypt", 3))
+        self.assertIsNone(self.tables.sampler("sewers", 3))
+
+    def test_unknown_enemy_type(self):
+        with self.assertRaises(ValueError):
+            SpawnTables({"crypt": {"entries": [{"type": "dragon"}]}}, ENEMIES)
+
+    def test_missing_keys(self):
+        for table in ([], {"chance": 0.5}, {"entries": {"type": "goblin"}}, {"entries": [{"weight": 2}]},
+                      {"entries": ["goblin"]}):
+            with self.assertRaisesRegex(ValueError, "crypt"):
+                SpawnTables({"crypt": table}, ENEMIES)
+
+    def test_chance_out_of_range(self):
+        for chance in (-0.1, 1.5, "0.5", True):
+            with self.assertRaises(ValueError):
+                SpawnTables({"crypt": {"chance": chance, "entries": [{"type": "goblin"}]}}, ENEMIES)
+        SpawnTables({"crypt": {"chance": 1, "entries": [{"type": "goblin"}]}}, ENEMIES)
+
+    @patch('builtins.print')
+    def test_bad_tables_stop_the_game_cleanly(self, mock_print):
+        spawns = {"crypt": {"chance": 2, "entries": [{"type": "goblin"}]}}
+        with self.assertRaises(SystemExit):
+            DungeonCrawler(world=DictWorldSource(ROOMS, ENEMIES, spawns))
+        self.assertIn("Invalid spawns.json", mock_print.call_args[0][0])
+
+class TestRandomEncounters(unittest.TestCase):
+    @patch('builtins.print')
+    def test_entering_region_spawns_enemy(self, mock_print):
+        game = DungeonCrawler(world=DictWorldSource(ROOMS, ENEMIES, SPAWNS), seed=1)
+        game.game_state.player_class = "warrior"
+        game.game_state.health = 10
+        with patch.object(game, 'create_enemy', wraps=game.create_enemy) as create_enemy:
+            game.handle_command('n')
+        create_enemy.assert_called_once_with("troll")
+        self.assertTrue(game.combat_manager.in_combat)
+
+        with patch('random.random', return_value=0.0), patch('random.randint', return_value=6):
+            game.handle_command('attack')
+        self.assertFalse(game.combat_manager.in_combat)
+        self.assertEqual(game.game_state.enemies_defeated, 1)
+        self.assertIsNone(game.spawned_foe)
+        self.assertEqual(game.game_state.defeated_enemies, set())
+
+if __name__ == '__main__':
+    unittest.main()
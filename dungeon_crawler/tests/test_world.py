@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import json
+import tempfile
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dungeon_crawler.dungeon_crawler import DungeonCrawler
+from dungeon_crawler.world import DictWorldSource, FileWorldSource, BundleWorldSource, compile_bundle, load_table
+from dungeon_crawler.dialogue import compile_dialogues, write_graph
+
+ROOMS = {
+    "entry": {"title": "Entry Hall", "description": "A crumbling stone hall", "exits": {},
+              "dark": False, "items": ["Health Potion"], "enemy": None, "npc": None}
+}
+ENEMIES = {"goblin": {"name": "Goblin", "health": 10, "damage_range": [1, 4], "description": "Grr"}}
+
+class TestWorldSources(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.rooms_path = os.path.join(self.tmp.name, 'rooms.json')
+        self.enemies_path = os.path.join(self.tmp.name, 'enemies.json')
+        with open(self.rooms_path, 'w') as f:
+            json.dump(ROOMS, f)
+        with open(self.enemies_path, 'w') as f:
+            json.dump(ENEMIES, f)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_sessions_share_parsed_world(self):
+        source = FileWorldSource(self.rooms_path, self.enemies_path)
+        first = DungeonCrawler(world=source)
+        second = DungeonCrawler(world=source)
+        self.assertIs(first.enemies, second.enemies)
+        self.assertIs(first.game_state.rooms["entry"].exits, second.game_state.rooms["entry"].exits)
+
+        # Item lists stay per session
+        first.game_state.rooms["entry"].items.clear()
+        self.assertEqual(second.game_state.rooms["entry"].items, ["Health Potion"])
+
+    def test_file_source_reparses_changed_file(self):
+        source = FileWorldSource(self.rooms_path, self.enemies_path)
+        rooms = source.rooms()
+        self.assertIs(source.rooms(), rooms)
+
+        with open(self.rooms_path, 'w') as f:
+            json.dump({**ROOMS, "cellar": ROOMS["entry"]}, f)
+        stat = os.stat(self.rooms_path)
+        os.utime(self.rooms_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        # Sessions keep the tables they have until the source is refreshed
+        self.assertIs(source.rooms(), rooms)
+        index = source.item_index()
+        self.assertEqual(source.refresh(), {})
+        rooms = source.rooms()
+        self.assertIn("cellar", rooms)
+        # The refresh already rebuilt the item index for the new rooms
+        self.assertEqual(index.room_count("Health Potion"), 2)
+        self.assertEqual(source.refresh(), {})
+        self.assertIs(source.rooms(), rooms)
+
+    def test_load_table(self):
+        path = os.path.join(self.tmp.name, 'table.json')
+        for text in ('{}', ' { "a" : [1, {"b": "c"}] ,\n"d":null } ', '{"a": 1, "a": 2}'):
+            with open(path, 'w') as f:
+                f.write(text)
+            self.assertEqual(load_table(path), json.loads(text))
+        for text in ('', '[]', '{', '{"a" 1}', '{"a": 1,}', '{"a": 1} x', '{1: 2}'):
+            with open(path, 'w') as f:
+                f.write(text)
+            with self.assertRaises(json.JSONDecodeError):
+                load_table(path)
+
+    def test_bundle_round_trip(self):
+        bundle_path = os.path.join(self.tmp.name, 'world.bundle')
+        compile_bundle(DictWorldSource(ROOMS, ENEMIES), bundle_path)
+        game = DungeonCrawler(world=BundleWorldSource(bundle_path))
+        self.assertEqual(game.game_state.rooms["entry"].title, "Entry Hall")
+        self.assertEqual(game.create_enemy("goblin").name, "Goblin")
+
+    def test_bundle_keeps_compiled_dialogues(self):
+        dialogue_path = os.path.join(self.tmp.name, 'world.dlg')
+        write_graph(compile_dialogues({"hermit": {"start": "greet", "nodes": {
+            "greet": {"text": "Well met.", "choices": []}}}}), dialogue_path)
+        rooms = {"entry": dict(ROOMS["entry"], npc={"name": "Hermit", "description": "Old", "dialogue": "hermit"})}
+        with open(self.rooms_path, 'w') as f:
+            json.dump(rooms, f)
+        bundle_path = os.path.join(self.tmp.name, 'world.bundle')
+        compile_bundle(FileWorldSource(self.rooms_path, self.enemies_path, dialogue_path), bundle_path)
+
+        graph = BundleWorldSource(bundle_path).dialogues()
+        self.assertEqual(graph.text(graph.start("hermit")), "Well met.")
+
+    def test_missing_file_exits(self):
+        source = FileWorldSource(os.path.join(self.tmp.name, 'missing.json'), self.enemies_path)
+        with self.assertRaises(SystemExit):
+            with patch('builtins.print'):
+                DungeonCrawler(world=source)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import json
+import queue
+import tempfile
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dungeon_crawler.dungeon_crawler import DungeonCrawler
+from dungeon_crawler.world_watcher import WorldWatcher, WorldUpdate, diff_entries
+from dungeon_crawler.world import DictWorldSource, FileWorldSource
+from dungeon_crawler.items import ItemIndex
+
+ROOMS = {
+    "entry": {"title": "Entry Hall", "description": "A crumbling stone hall", "exits": {"north": "lair"},
+              "dark": False, "items": [], "enemy": None, "npc": None},
+    "lair": {"title": "Lair", "description": "Bones everywhere", "exits": {"south": "entry"},
+             "dark": False, "items": [], "enemy": {"type": "goblin", "name": "Goblin", "description": "Grr"},
+             "npc": None}
+}
+
+class Session:
+    def __init__(self):
+        self.pending_updates = queue.SimpleQueue()
+
+class TestWorldWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.rooms_path = os.path.join(self.tmp.name, 'rooms.json')
+        self.enemies_path = os.path.join(self.tmp.name, 'enemies.json')
+        self.write(self.rooms_path, ROOMS)
+        self.write(self.enemies_path, {"goblin": {"name": "Goblin", "health": 10}})
+        self.spawns_path = os.path.join(self.tmp.name, 'spawns.json')
+        self.source = FileWorldSource(self.rooms_path, self.enemies_path)
+        self.watcher = WorldWatcher(self.source)
+        self.session = Session()
+        self.watcher.register(self.session)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, data):
+        with open(path, 'w') as f:
+            json.dump(data, f)
+        # Make sure the change is visible even on coarse mtime filesystems
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def test_diff_entries(self):
+        changed, removed = diff_entries({"a": 1, "b": 2, "c": 3}, {"a": 1, "b": 5, "d": 4})
+        self.assertEqual(changed, {"b": 5, "d": 4})
+        self.assertEqual(removed, ["c"])
+
+    def test_no_change(self):
+        self.assertIsNone(self.watcher.check())
+        self.assertTrue(self.session.pending_updates.empty())
+
+    def test_room_change_is_delivered(self):
+        rooms = json.loads(json.dumps(ROOMS))
+        rooms["lair"]["description"] = "Fresh bones everywhere"
+        del rooms["entry"]["exits"]["north"]
+        self.write(self.rooms_path, rooms)
+
+        update = self.watcher.check()
+        self.assertEqual(set(update.rooms), {"entry", "lair"})
+        self.assertEqual(update.removed_rooms, [])
+        self.assertIsNone(update.enemies)
+        self.assertIs(self.session.pending_updates.get_nowait(), update)
+
+    def test_enemy_change_is_delivered(self):
+        self.write(self.enemies_path, {"goblin": {"name": "Goblin", "health": 12}})
+        update = self.watcher.check()
+        self.assertEqual(update.rooms, {})
+        self.assertEqual(update.changed_enemies, ["goblin"])
+        self.assertEqual(update.enemies["goblin"]["health"], 12)
+
+    def test_spawn_change_is_delivered(self):
+        spawns = {"crypt": {"chance": 0.5, "entries": [{"type": "goblin"}]}}
+        self.write(self.spawns_path, spawns)
+        update = self.watcher.check()
+        self.assertEqual(update.spawns, spawns)
+        self.assertIsNone(update.enemies)
+
+    def test_invalid_json_is_ignored(self):
+        with open(self.rooms_path, 'w') as f:
+            f.write("{")
+        with patch('builtins.print') as mock_print:
+            self.assertIsNone(self.watcher.check())
+            self.assertIsNone(self.watcher.check())
+        self.assertEqual(mock_print.call_count, 1)  # Reported once, not on every poll
+
+        rooms = dict(ROOMS, vault=dict(ROOMS["entry"], title="Vault"))
+        self.write(self.rooms_path, rooms)
+        self.assertEqual(list(self.watcher.check().rooms), ["vault"])
+
+    def test_sessions_share_the_source(self):
+        with patch('builtins.print'):
+            game = DungeonCrawler(world=self.source, watcher=self.watcher)
+            other = DungeonCrawler(world=self.source, watcher=self.watcher)
+            with self.assertRaises(ValueError):
+                DungeonCrawler(world=DictWorldSource(ROOMS), watcher=self.watcher)
+        self.write(self.enemies_path, {"goblin": {"name": "Goblin", "health": 12}})
+        update = self.watcher.check()
+        self.assertIs(update.enemies, self.source.enemies())
+        game.apply_pending_updates()
+        other.apply_pending_updates()
+        self.assertIs(game.spawns, other.spawns)
+
+    @patch('builtins.print')
+    def test_sessions_only_read_the_watcher_snapshot(self, mock_print):
+        game = DungeonCrawler(world=self.source, watcher=self.watcher)
+        self.write(self.rooms_path, dict(ROOMS, entry=dict(ROOMS["entry"], items=["Rope"])))
+        self.write(self.spawns_path, {"crypt": {"chance": 0.5, "entries": [{"type": "goblin"}]}})
+        self.watcher.check()
+        # Reading files and compiling the tables all happened in check()
+        with patch('dungeon_crawler.world.os.stat', side_effect=AssertionError("stat")), \
+                patch('dungeon_crawler.world.load_table', side_effect=AssertionError("parse")), \
+                patch.object(ItemIndex, 'build_world_rooms', side_effect=AssertionError("index")), \
+                patch('dungeon_crawler.world.SpawnTables', side_effect=AssertionError("spawns")):
+            game.apply_pending_updates()
+            other = DungeonCrawler(world=self.source, watcher=self.watcher)
+        self.assertEqual(game.game_state.rooms["entry"].items.counts(), {"Rope": 1})
+        self.assertIs(other.spawns, game.spawns)
+
+    @patch('builtins.print')
+    def test_taken_and_dropped_items_survive_reload(self, mock_print):
+        self.write(self.rooms_path, dict(ROOMS, entry=dict(ROOMS["entry"], items=["Rope", "Torch"])))
+        self.watcher.check()
+        game = DungeonCrawler(world=self.source, watcher=self.watcher)
+        game.handle_command('take rope')
+        game.handle_command('drop rope')
+        game.handle_command('take torch')
+        self.write(self.rooms_path, dict(ROOMS, entry=dict(ROOMS["entry"], items=["Rope", "Torch", "Map"],
+                                                           description="Freshly swept")))
+        self.watcher.check()
+        game.apply_pending_updates()
+        room = game.game_state.rooms["entry"]
+        self.assertEqual(room.description, "Freshly swept")
+        self.assertEqual(room.items.counts(), {"Rope": 1, "Map": 1})
+        self.assertIn("Torch", game.game_state.inventory)
+        self.assertEqual(game.item_index.room_count("Torch", game.game_state.item_changes.for_item("Torch")), 0)
+
+class TestApplyWorldUpdate(unittest.TestCase):
+    def setUp(self):
+        # Start from an empty world and let the update build it
+        self.game = DungeonCrawler(world=DictWorldSource({}))
+        self.game.apply_world_update(WorldUpdate(rooms=ROOMS))
+
+    def test_defeated_enemy_stays_defeated(self):
+        self.game.game_state.defeated_enemies.add("lair_goblin")
+        self.game.apply_world_update(WorldUpdate(rooms={"lair": ROOMS["lair"]}))
+        self.assertIsNone(self.game.game_state.rooms["lair"].enemy)
+
+    def test_room_index_is_kept(self):
+        index = self.game.game_state.rooms["lair"].index
+        self.game.apply_world_update(WorldUpdate(rooms={"lair": ROOMS["lair"]}))
+        self.assertEqual(self.game.game_state.rooms["lair"].index, index)
+        self.assertEqual(self.game.room_ids[index], "lair")
+
+    def test_removed_current_room(self):
+        self.game.game_state.current_room = "lair"
+        with patch('builtins.print'):
+            self.game.apply_world_update(WorldUpdate(removed_rooms=["lair"]))
+            self.game.display_room()
+            self.game.handle_command('n')
+        self.assertNotIn("lair", self.game.game_state.rooms)
+        self.assertEqual(self.game.game_state.current_room, "entry")
+
+    def test_roaming_enemy_keeps_roaming(self):
+        roaming = {"type": "goblin", "name": "Goblin", "description": "Grr", "roams": True}
+        self.game.apply_world_update(WorldUpdate(rooms={"den": dict(ROOMS["lair"], enemy=roaming)}))
+        self.assertIsNone(self.game.game_state.rooms["den"].enemy)
+        self.assertEqual([roamer.room for roamer in self.game.roamers.roamers.values()], ["den"])
+
+        self.game.apply_world_update(WorldUpdate(rooms={"den": dict(ROOMS["lair"], enemy=roaming, title="Den")}))
+        self.assertIsNone(self.game.game_state.rooms["den"].enemy)
+        self.assertEqual(len(self.game.roamers.roamers), 1)
+
+    def test_pending_updates_applied_on_command(self):
+        self.game.pending_updates.put(WorldUpdate(enemies={"goblin": {"name": "Goblin"}}))
+        with patch('builtins.print'):
+            self.game.handle_command(':d')
+        self.assertEqual(self.game.enemies, {"goblin": {"name": "Goblin"}})
+
+if __name__ == '__main__':
+    unittest.main()
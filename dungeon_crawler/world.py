@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+World sources: where a session gets its room and enemy tables from.
+
+Usage: python -m dungeon_crawler.world compile OUTPUT [rooms.json] [enemies.json] [spawns.json]
+"""
+
+import gc
+import os
+import re
+import sys
+import copy
+import json
+import pickle
+import argparse
+import threading
+from typing import Any, Dict, Optional, Tuple
+from .dialogue import DialogueGraph, compile_dialogues, load_graph
+from .spawn import SpawnTables
+from .items import ItemIndex
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+def intern_strings(value: Any) -> Any:
+    """Recursively intern the strings in parsed JSON so repeated world text is stored once"""
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, dict):
+        return {sys.intern(key): intern_strings(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [intern_strings(item) for item in value]
+    return value
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_DECODER = json.JSONDecoder()
+
+def load_table(path: str) -> Dict[str, Any]:
+    """Parse a JSON file holding one object, entry by entry, with its strings interned
+
+    json.load parses a whole file in one call that holds the GIL, so every
+    other thread stalls for as long as a large rooms.json takes. Parsing one
+    entry per call lets them run in between. Raises JSONDecodeError like json.load.
+    """
+    with open(path, 'r') as f:
+        text = f.read()
+    index = _WHITESPACE.match(text, 0).end()
+    if text[index:index + 1] != '{':
+        raise json.JSONDecodeError("Expecting '{'", text, index)
+    table: Dict[str, Any] = {}
+    index = _WHITESPACE.match(text, index + 1).end()
+    if text[index:index + 1] == '}':
+        char = text[index]
+        index += 1
+    else:
+        char = ','
+    while char == ',':
+        if text[index:index + 1] != '"':
+            raise json.JSONDecodeError("Expecting property name enclosed in double quotes", text, index)
+        key, index = _DECODER.raw_decode(text, index)
+        index = _WHITESPACE.match(text, index).end()
+        if text[index:index + 1] != ':':
+            raise json.JSONDecodeError("Expecting ':' delimiter", text, index)
+        index = _WHITESPACE.match(text, index + 1).end()
+        value, index = _DECODER.raw_decode(text, index)
+        table[sys.intern(key)] = intern_strings(value)
+        index = _WHITESPACE.match(text, index).end()
+        char = text[index:index + 1]
+        if char not in (',', '}'):
+            raise json.JSONDecodeError("Expecting ',' delimiter", text, index)
+        index = _WHITESPACE.match(text, index + 1).end()
+    if index != len(text):
+        raise json.JSONDecodeError("Extra data", text, index)
+    return table
+
+def inline_dialogues(rooms: Dict[str, Dict[str, Any]]) -> DialogueGraph:
+    """Compile the dialogue trees written inline in the rooms' NPCs, each under its room's id"""
+    trees = {room_id: room['npc']['dialogue'] for room_id, room in rooms.items()
+             if room.get('npc') and isinstance(room['npc'].get('dialogue'), dict)}
+    return compile_dialogues(trees)
+
+class WorldSource:
+    """Provides the room and enemy tables for sessions, parsing each at most once
+
+    The returned tables are shared by every session using the source and
+    must not be modified.
+    """
+    def __init__(self):
+        # Compiled forms of the tables, each with the tables it was compiled from
+        self._spawn_tables: Optional[Tuple[Dict[str, Any], Dict[str, Any], SpawnTables]] = None
+        self._dialogues: Optional[Tuple[Dict[str, Any], DialogueGraph]] = None
+        self._room_ids: Optional[Tuple[Dict[str, Any], Tuple[str, ...]]] = None
+        self._item_index = ItemIndex()
+        self._item_rooms: Optional[Dict[str, Any]] = None  # Rooms table the index was last built from
+        self._compile_lock = threading.Lock()  # Sessions on other threads may ask at the same time
+
+    def rooms(self) -> Dict[str, Dict[str, Any]]:
+        raise NotImplementedError
+
+    def enemies(self) -> Dict[str, Dict[str, Any]]:
+        raise NotImplementedError
+
+    def spawns(self) -> Dict[str, Dict[str, Any]]:
+        """Return the random encounter tables by region; worlds without any return {}"""
+        return {}
+
+    def refresh(self) -> Dict[str, Exception]:
+        """Re-read any table that changed where it is stored, returning those that could not be read
+
+        Sources held in memory or in a bundle never change, so there is nothing to re-read.
+        """
+        return {}
+
+    def warm(self) -> None:
+        """Compile the item index, spawn tables and dialogues now, so sessions asking later find them ready"""
+        self.item_index()
+        self.room_ids()
+        self.dialogues()
+        try:
+            self.spawn_tables()
+        except ValueError:
+            pass  # Reported to each session that asks for them
+
+    def spawn_tables(self) -> SpawnTables:
+        """Return the spawn tables compiled for sampling, compiling them once per change"""
+        spawns, enemies = self.spawns(), self.enemies()
+        with self._compile_lock:
+            cached = self._spawn_tables
+            if cached is None or cached[0] is not spawns or cached[1] is not enemies:
+                cached = self._spawn_tables = (spawns, enemies, SpawnTables(spawns, enemies))
+            return cached[2]
+
+    def item_index(self) -> ItemIndex:
+        """Return the item index every session in this world shares
+
+        Its room side is rebuilt once per change to the rooms; what each
+        session carries is kept across changes.
+        """
+        rooms = self.rooms()
+        with self._compile_lock:
+            if self._item_rooms is not rooms:
+                self._item_index.set_world_rooms(rooms)
+                self._item_rooms = rooms
+            return self._item_index
+
+    def room_ids(self) -> Tuple[str, ...]:
+        """Return the room ids in table order, the order sessions number their rooms in"""
+        rooms = self.rooms()
+        with self._compile_lock:
+            cached = self._room_ids
+            if cached is None or cached[0] is not rooms:
+                cached = self._room_ids = (rooms, tuple(rooms))
+            return cached[1]
+
+    def dialogues(self) -> DialogueGraph:
+        """Return the compiled dialogue trees written inline in the rooms' NPCs
+
+        Inline trees are compiled under the id of the room the NPC is in.
+        """
+        rooms = self.rooms()
+        with self._compile_lock:
+            cached = self._dialogues
+            if cached is None or cached[0] is not rooms:
+                cached = self._dialogues = (rooms, inline_dialogues(rooms))
+            return cached[1]
+
+class DictWorldSource(WorldSource):
+    """A world held in memory, e.g. test fixtures or a generated level"""
+    def __init__(self, rooms: Dict[str, Dict[str, Any]], enemies: Optional[Dict[str, Dict[str, Any]]] = None,
+                 spawns: Optional[Dict[str, Dict[str, Any]]] = None):
+        super().__init__()
+        self._rooms = intern_strings(rooms)
+        self._enemies = intern_strings(enemies or {})
+        self._spawns = intern_strings(spawns or {})
+
+    def rooms(self) -> Dict[str, Dict[str, Any]]:
+        return self._rooms
+
+    def enemies(self) -> Dict[str, Dict[str, Any]]:
+        return self._enemies
+
+    def spawns(self) -> Dict[str, Dict[str, Any]]:
+        return self._spawns
+
+class FileWorldSource(WorldSource):
+    """A world read from rooms.json and enemies.json
+
+    Each file is parsed on first use; after that the tables only change when
+    refresh() finds a changed file, so sessions never stat or parse a file
+    once the world is loaded. Large dialogue sets can be compiled to a .dlg file and passed as
+    dialogue_path; NPCs then name their tree instead of writing it inline.
+    """
+    def __init__(self, rooms_path: Optional[str] = None, enemies_path: Optional[str] = None,
+                 dialogue_path: Optional[str] = None, spawns_path: Optional[str] = None):
+        super().__init__()
+        self.dialogue_path = dialogue_path
+        self._dialogue_graph: Optional[DialogueGraph] = None
+        rooms_path = rooms_path or os.path.join(DATA_DIR, 'rooms.json')
+        self.paths = {
+            "rooms": rooms_path,
+            "enemies": enemies_path or os.path.join(DATA_DIR, 'enemies.json'),
+            # Spawn tables default to the ones next to rooms.json
+            "spawns": spawns_path or os.path.join(os.path.dirname(rooms_path), 'spawns.json')
+        }
+        # The current tables, each with the (mtime, size) of the file it was parsed from.
+        # Replaced whole by refresh(), so readers need no lock
+        self._tables: Dict[str, Tuple[Optional[Tuple[int, int]], Dict[str, Any]]] = {}
+        self._no_spawns: Dict[str, Any] = {}  # The same empty table every time, so caches keyed on it hit
+        self._lock = threading.Lock()  # Held while reading files
+
+    @staticmethod
+    def _stamp(path: str) -> Optional[Tuple[int, int]]:
+        """Return a file's (mtime, size), or None if it doesn't exist"""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read(self, kind: str) -> Tuple[Optional[Tuple[int, int]], Dict[str, Any]]:
+        """Parse one file, raising FileNotFoundError or ValueError like json.load"""
+        path = self.paths[kind]
+        stamp = self._stamp(path)
+        if stamp is None and kind == "spawns":
+            return None, self._no_spawns  # Spawn tables are optional
+        return stamp, load_table(path)
+
+    def _load(self, kind: str) -> Dict[str, Any]:
+        cached = self._tables.get(kind)
+        if cached is None:
+            with self._lock:
+                cached = self._tables.get(kind)
+                if cached is None:
+                    cached = self._read(kind)
+                    self._tables = dict(self._tables, **{kind: cached})
+        return cached[1]
+
+    def rooms(self) -> Dict[str, Dict[str, Any]]:
+        return self._load("rooms")
+
+    def enemies(self) -> Dict[str, Dict[str, Any]]:
+        return self._load("enemies")
+
+    def spawns(self) -> Dict[str, Dict[str, Any]]:
+        return self._load("spawns")
+
+    def refresh(self) -> Dict[str, Exception]:
+        """Re-parse any file whose mtime or size changed and make its table current
+
+        Meant for the world watcher's thread. The item index, spawn tables and
+        inline dialogues are compiled for the new tables before they become
+        current, so no session compiles them on its own thread.
+        """
+        failed: Dict[str, Exception] = {}
+        changed = False
+        # Parsed tables hold no reference cycles, but a full collection while
+        # they are built would walk every one of them with the GIL held
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            with self._lock:
+                tables = dict(self._tables)
+                for kind, path in self.paths.items():
+                    cached = tables.get(kind)
+                    try:
+                        if cached is not None and cached[0] == self._stamp(path):
+                            continue
+                        entry = self._read(kind)
+                    except (FileNotFoundError, ValueError) as e:
+                        failed[kind] = e
+                        continue
+                    if cached is None or entry[1] is not cached[1]:
+                        tables[kind] = entry
+                        changed = True
+                if changed:
+                    self._publish(tables)
+        finally:
+            if changed:
+                gc.freeze()  # Keep later collections from walking the new tables too
+            if collecting:
+                gc.enable()
+        return failed
+
+    def _publish(self, tables: Dict[str, Tuple[Optional[Tuple[int, int]], Dict[str, Any]]]) -> None:
+        """Compile the caches for new tables, then make the tables and caches current together"""
+        rooms, enemies, spawns = (tables[kind][1] if kind in tables else None
+                                  for kind in ("rooms", "enemies", "spawns"))
+        placement = dialogues = spawn_tables = room_ids = None
+        if rooms is not None and rooms is not self._item_rooms:
+            placement = self._item_index.build_world_rooms(rooms)
+            room_ids = tuple(rooms)
+            if self.dialogue_path is None:
+                dialogues = inline_dialogues(rooms)
+        if enemies is not None and spawns is not None:
+            cached = self._spawn_tables
+            if cached is None or cached[0] is not spawns or cached[1] is not enemies:
+                try:
+                    spawn_tables = SpawnTables(spawns, enemies)
+                except ValueError:
+                    pass  # Reported to each session that asks for them
+        with self._compile_lock:
+            self._tables = tables
+            if placement is not None:
+                self._item_index.set_world_rooms(rooms, placement)
+                self._item_rooms = rooms
+                self._room_ids = (rooms, room_ids)
+            if dialogues is not None:
+                self._dialogues = (rooms, dialogues)
+            if spawn_tables is not None:
+                self._spawn_tables = (spawns, enemies, spawn_tables)
+
+    def dialogues(self) -> DialogueGraph:
+        if self.dialogue_path is None:
+            return super().dialogues()
+        with self._lock:
+            if self._dialogue_graph is None:
+                self._dialogue_graph = load_graph(self.dialogue_path)
+            return self._dialogue_graph
+
+class BundleWorldSource(WorldSource):
+    """A world precompiled with compile_bundle, loaded without any JSON parsing"""
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._world: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            if self._world is None:
+                with open(self.path, 'rb') as f:
+                    self._world = intern_strings(pickle.load(f))
+            return self._world
+
+    def rooms(self) -> Dict[str, Dict[str, Any]]:
+        return self._load()["rooms"]
+
+    def enemies(self) -> Dict[str, Dict[str, Any]]:
+        return self._load()["enemies"]
+
+    def spawns(self) -> Dict[str, Dict[str, Any]]:
+        return self._load().get("spawns", {})
+
+    def dialogues(self) -> DialogueGraph:
+        graph = self._load().get("dialogues")
+        return graph if graph is not None else super().dialogues()
+
+def compile_bundle(source: WorldSource, path: str) -> None:
+    """Write a source's rooms, enemies, spawn tables and compiled dialogues to a single bundle file"""
+    dialogues = source.dialogues()
+    if not isinstance(dialogues.text_blob, bytes):
+        # A graph loaded from a .dlg file reads its text from an mmap, which can't be pickled
+        dialogues = copy.copy(dialogues)
+        dialogues.text_blob = bytes(dialogues.text_blob)
+    with open(path, 'wb') as f:
+        pickle.dump({"rooms": source.rooms(), "enemies": source.enemies(), "spawns": source.spawns(),
+                     "dialogues": dialogues}, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+# Sessions that don't ask for a world share the bundled data files
+DEFAULT_WORLD = FileWorldSource()
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compile world files into a bundle")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    compile_parser = subparsers.add_parser('compile', help="write rooms, enemies and dialogues to one bundle file")
+    compile_parser.add_argument('output')
+    compile_parser.add_argument('rooms', nargs='?')
+    compile_parser.add_argument('enemies', nargs='?')
+    compile_parser.add_argument('spawns', nargs='?')
+    args = parser.parse_args(argv)
+
+    compile_bundle(FileWorldSource(args.rooms, args.enemies, spawns_path=args.spawns), args.output)
+    print(f"Wrote {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+import threading
+import weakref
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, Set, Tuple
+from colorama import Fore, Style
+from .world import DEFAULT_WORLD, WorldSource
+
+KINDS = ("rooms", "enemies", "spawns")
+
+@dataclass
+class WorldUpdate:
+    """A set of changes to the world data, ready to apply to a session"""
+    rooms: Dict[str, Dict[str, Any]] = field(default_factory=dict)  # Added or changed rooms
+    removed_rooms: List[str] = field(default_factory=list)
+    enemies: Optional[Dict[str, Dict[str, Any]]] = None  # Full enemy table, if it changed
+    changed_enemies: List[str] = field(default_factory=list)
+    spawns: Optional[Dict[str, Dict[str, Any]]] = None  # Full spawn tables, if they changed
+
+def diff_entries(old: Dict[str, Any], new: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """Return (added or changed entries, removed keys) between two JSON tables"""
+    changed = {key: value for key, value in new.items() if old.get(key) != value}
+    removed = [key for key in old if key not in new]
+    return changed, removed
+
+class WorldWatcher:
+    """Polls a world source's rooms, enemies and spawn tables and pushes changes to running sessions
+
+    The source does the reading, so sessions, the watcher and the source's
+    compiled caches all see the same tables. All re-reading and compiling
+    happens on the watcher's thread: sessions only pick up tables and caches
+    that are already built. A FileWorldSource re-parses a file only when its
+    mtime or size changes, so an idle poll is a few stats.
+    """
+    def __init__(self, source: Optional[WorldSource] = None, interval: float = 1.0):
+        self.source = source or DEFAULT_WORLD
+        self.interval = interval
+        self.sessions = weakref.WeakSet()
+        self._data: Dict[str, Dict[str, Any]] = {}
+        self._failed: Set[str] = set()  # Tables that could not be read on the last poll
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        for kind in KINDS:
+            try:
+                self._data[kind] = getattr(self.source, kind)()
+            except (FileNotFoundError, ValueError):
+                self._report(kind)
+                self._data[kind] = {}
+
+    def register(self, session) -> None:
+        """Start delivering world updates to a session"""
+        with self._lock:
+            self.sessions.add(session)
+
+    def start(self) -> None:
+        """Start polling in a background thread"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="world-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def _report(self, kind: str) -> None:
+        """Report a table that can't be read"""
+        if kind not in self._failed:
+            # Usually a half-written file; the next write will fix it, so say so only once
+            print(Fore.RED + f"Error: could not reload {kind}.json!" + Style.RESET_ALL)
+            self._failed.add(kind)
+
+    def check(self) -> Optional[WorldUpdate]:
+        """Re-parse any changed data file and send the differences to every session"""
+        update = WorldUpdate()
+        changed = False
+
+        failed = self.source.refresh()
+        for kind in KINDS:
+            if kind in failed:
+                self._report(kind)
+                continue
+            self._failed.discard(kind)
+            data = getattr(self.source, kind)()
+            if data is self._data[kind]:
+                continue
+            entries, removed = diff_entries(self._data[kind], data)
+            self._data[kind] = data
+            if not entries and not removed:
+                continue
+            changed = True
+            if kind == "rooms":
+                update.rooms, update.removed_rooms = entries, removed
+            elif kind == "enemies":
+                update.enemies = data
+                update.changed_enemies = list(entries) + removed
+            else:
+                update.spawns = data
+
+        if not changed:
+            return None
+
+        # Build what sessions will ask for while applying the update here, not on their threads
+        self.source.warm()
+        with self._lock:
+            sessions = list(self.sessions)
+        for session in sessions:
+            session.pending_updates.put(update)
+        return update